@@ -0,0 +1,76 @@
+"""
+Measures running many programs as separate `python -m src.core.main` processes, in one batch
+process, and on process pools of growing size. By default the programs are copies of one program
+doing a fixed amount of matrix work, so the pool should scale close to linearly with the number of
+workers, up to the number of cores.
+
+Usage: python -m benchmarks.batch_benchmark [--programs N] [--size N] [--jobs N ...] [PATH ...]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from src.core.batch import expand, run_batch
+
+program = """
+n = {size};
+A = ones(n);
+B = eye(n) .+ A;
+s = 0;
+for i = 0:20 {{
+    A = B * B .+ A;
+    s += A[0, 0];
+}}
+print s;
+"""
+
+
+def measure(function, *arguments):
+    start = time.perf_counter()
+    result = function(*arguments)
+    return time.perf_counter() - start, result
+
+
+def run_processes(filenames):
+    for filename in filenames:
+        subprocess.run([sys.executable, "-m", "src.core.main", filename], check=True, stdout=subprocess.DEVNULL)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("paths", nargs="*", help="programs to run instead of the generated ones")
+    argument_parser.add_argument("--programs", type=int, default=32)
+    argument_parser.add_argument("--size", type=int, default=300)
+    argument_parser.add_argument("--jobs", type=int, nargs="+",
+                                 default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    arguments = argument_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = expand(arguments.paths)
+        if not filenames:
+            for index in range(arguments.programs):
+                filename = os.path.join(directory, f"program{index}.txt")
+                with open(filename, "w") as file:
+                    file.write(program.format(size=arguments.size))
+                filenames.append(filename)
+
+        print(f"programs: {len(filenames)}, cores: {os.cpu_count()}")
+
+        elapsed, _ = measure(run_processes, filenames)
+        print(f"separate processes {elapsed:8.3f}s")
+
+        serial_time, expected = measure(run_batch, filenames)
+        assert all(result.status == "ok" for result in expected)
+        print(f"batch              {serial_time:8.3f}s")
+
+        for jobs in arguments.jobs:
+            elapsed, results = measure(run_batch, filenames, "interpreter", False, None, jobs)
+            assert [result.output for result in results] == [result.output for result in expected]
+            print(f"{jobs:3} workers        {elapsed:8.3f}s  speedup {serial_time / elapsed:5.2f}x  "
+                  f"efficiency {serial_time / elapsed / jobs:5.2f}")
+
+
+if __name__ == '__main__':
+    main()
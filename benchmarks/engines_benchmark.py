@@ -0,0 +1,60 @@
+"""
+Compares execution time of the available engines on the example programs.
+
+Usage: python -m benchmarks.engines_benchmark [files...] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import time
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.node_visitor import TypeChecker
+from src.core.main import engines
+
+default_files = ["examples/interpreter_example_1.txt",
+                 "examples/interpreter_example_3.txt",
+                 "examples/interpreter_example_4.txt",
+                 "examples/interpreter_example_5.txt"]
+
+
+def prepare(filename):
+    with open(filename, "r") as file:
+        text = file.read()
+
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(text, lexer=scanner.lexer)
+    type_checker = TypeChecker()
+    with contextlib.redirect_stdout(io.StringIO()):
+        type_checker.visit(ast)
+
+    return ast
+
+
+def measure(engine, filename, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        ast = prepare(filename)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            engines[engine]().run(ast)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("files", nargs="*", default=default_files)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    arguments = argument_parser.parse_args()
+
+    names = list(engines)
+    print(f"{'program':40}" + "".join(f"{name:>14}" for name in names) + f"{'speedup':>10}")
+    for filename in arguments.files:
+        times = [measure(engine, filename, arguments.repeat) for engine in names]
+        print(f"{filename:40}" + "".join(f"{t:13.4f}s" for t in times) + f"{times[0] / min(times[1:]):9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares separate and fused evaluation of chains of element-wise operations on large matrices,
+measuring time and peak memory (NumPy reports its allocations to tracemalloc).
+
+Fused evaluation uses blocks of rows, and numexpr as well when it is installed.
+
+Usage: python -m benchmarks.fusion_benchmark [--size N] [--iterations N] [--engine ENGINE]
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.node_visitor import TypeChecker
+from src.interpreter import operations
+from src.optimizer.fusion import ElementwiseFuser
+from src.core.main import engines
+
+program = """
+n = {size};
+A = ones(n);
+B = eye(n);
+C = ones(n) .+ ones(n);
+E = ones(n) ./ (C .+ C);
+D = zeros(n);
+for i = 0:{iterations} {{
+    D = A .+ B .- C .* E;
+    D = (D .+ A) ./ (C .- E) .* B .- A;
+}}
+print D[0, 0], D[1, 0];
+"""
+
+
+def run(text, engine, fuse):
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(text, lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+
+    if fuse:
+        ast = ElementwiseFuser().visit(ast)
+
+    output = io.StringIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        engines[engine]().run(ast)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak, output.getvalue()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--size", type=int, default=3000)
+    argument_parser.add_argument("--iterations", type=int, default=5)
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    arguments = argument_parser.parse_args()
+
+    text = program.format(size=arguments.size, iterations=arguments.iterations)
+    numexpr = operations.numexpr
+    variants = {"separate": (False, None), "fused": (True, None)}
+    if numexpr is not None:
+        variants["fused numexpr"] = (True, numexpr)
+
+    print(f"matrix size: {arguments.size}x{arguments.size}, iterations: {arguments.iterations}, "
+          f"engine: {arguments.engine}")
+
+    outputs = set()
+    for name, (fuse, backend) in variants.items():
+        operations.numexpr = backend
+        elapsed, peak, output = run(text, arguments.engine, fuse)
+        outputs.add(output)
+        print(f"{name:14} {elapsed:8.3f}s  peak {peak / 2 ** 20:8.1f} MB")
+
+    operations.numexpr = numexpr
+    assert len(outputs) == 1
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures time and peak memory of compound assignments on large matrices, which update the target
+in place, against the equivalent assignments building a new matrix.
+
+NumPy reports its allocations to tracemalloc, so the peak covers the array buffers.
+
+Usage: python -m benchmarks.inplace_benchmark [--size N] [--iterations N] [--engine ENGINE]
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.node_visitor import TypeChecker
+from src.core.main import engines
+
+setup = """
+n = {size};
+A = zeros(n);
+B = ones(n);
+"""
+
+programs = {
+    "compound": """
+for i = 0:{iterations} {{
+    A += B;
+    A .*= B;
+    A[0:10, 0:n] -= B[0:10, 0:n];
+}}
+print A[1, 1];
+""",
+    "assignment": """
+for i = 0:{iterations} {{
+    A = A .+ B;
+    A = A .* B;
+    A[0:10, 0:n] = A[0:10, 0:n] .- B[0:10, 0:n];
+}}
+print A[1, 1];
+"""}
+
+
+def run(text, engine):
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(text, lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+
+    output = io.StringIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        engines[engine]().run(ast)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak, output.getvalue()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--size", type=int, default=4000)
+    argument_parser.add_argument("--iterations", type=int, default=5)
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    arguments = argument_parser.parse_args()
+
+    print(f"matrix size: {arguments.size}x{arguments.size}, iterations: {arguments.iterations}, "
+          f"engine: {arguments.engine}")
+
+    outputs = set()
+    for name, program in programs.items():
+        text = setup.format(size=arguments.size) + program.format(iterations=arguments.iterations)
+        elapsed, peak, output = run(text, arguments.engine)
+        outputs.add(output)
+        print(f"{name:12} {elapsed:8.3f}s  peak {peak / 2 ** 20:8.1f} MB")
+
+    assert len(outputs) == 1
+
+
+if __name__ == '__main__':
+    main()
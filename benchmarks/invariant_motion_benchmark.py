@@ -0,0 +1,70 @@
+"""
+Measures loops over 500x500 matrices with loop-invariant expressions, with and without moving them out of the loop.
+
+Usage: python -m benchmarks.invariant_motion_benchmark [--size N] [--iterations N] [--engine ENGINE]
+"""
+import argparse
+import contextlib
+import io
+import time
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.node_visitor import TypeChecker
+from src.optimizer.invariant_motion import LoopInvariantMover
+from src.core.main import engines
+
+program = """
+n = {size};
+A = ones(n);
+B = eye(n) .+ eye(n);
+C = zeros(n);
+for i = 0:{iterations} {{
+    D = A' * B;
+    C = C .+ D .* ones(n);
+}}
+k = 0;
+while (k < {iterations}) {{
+    C = C ./ (B * B .+ ones(n));
+    k += 1;
+}}
+print C[0, 0];
+"""
+
+
+def run(size, iterations, engine, optimize):
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(program.format(size=size, iterations=iterations), lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+
+    if optimize:
+        ast = LoopInvariantMover().visit(ast)
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        engines[engine]().run(ast)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, output.getvalue()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--size", type=int, default=500)
+    argument_parser.add_argument("--iterations", type=int, default=20)
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    arguments = argument_parser.parse_args()
+
+    plain_time, plain_output = run(arguments.size, arguments.iterations, arguments.engine, optimize=False)
+    hoisted_time, hoisted_output = run(arguments.size, arguments.iterations, arguments.engine, optimize=True)
+
+    assert plain_output == hoisted_output
+    print(f"matrix size: {arguments.size}x{arguments.size}, iterations: {arguments.iterations}, "
+          f"engine: {arguments.engine}")
+    print(f"loop:    {plain_time:10.4f}s")
+    print(f"hoisted: {hoisted_time:10.4f}s")
+    print(f"speedup: {plain_time / hoisted_time:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures chains of matrix multiplications ending with a column vector, evaluated left to right
+and in the order chosen by the matrix chain optimization. Sizes are known statically in the
+first program and only at runtime in the second one.
+
+Usage: python -m benchmarks.matrix_chain_benchmark [--size N] [--iterations N] [--engine ENGINE]
+"""
+import argparse
+import contextlib
+import io
+import time
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.node_visitor import TypeChecker
+from src.optimizer.matrix_chain import MatrixChainOrderer
+from src.core.main import engines
+
+programs = {
+    "static sizes": """
+A = ones({size});
+B = eye({size});
+C = ones({size});
+v = {column};
+w = v;
+for i = 0:{iterations} {{
+    w = A * B * C * v;
+}}
+print w[0, 0];
+""",
+    "runtime sizes": """
+n = {size};
+A = ones(n);
+B = eye(n);
+C = ones(n);
+v = {column};
+w = v;
+for i = 0:{iterations} {{
+    w = A * B * C * v;
+}}
+print w[0, 0];
+"""}
+
+
+def run(text, engine, reorder):
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(text, lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+
+    if reorder:
+        ast = MatrixChainOrderer().visit(ast)
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        engines[engine]().run(ast)
+
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--size", type=int, default=500)
+    argument_parser.add_argument("--iterations", type=int, default=20)
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    arguments = argument_parser.parse_args()
+
+    column = "[" + ", ".join(["[1.0]"] * arguments.size) + "]"
+    print(f"matrix size: {arguments.size}x{arguments.size}, iterations: {arguments.iterations}, "
+          f"engine: {arguments.engine}")
+
+    for name, program in programs.items():
+        text = program.format(size=arguments.size, column=column, iterations=arguments.iterations)
+        plain_time, plain_output = run(text, arguments.engine, reorder=False)
+        ordered_time, ordered_output = run(text, arguments.engine, reorder=True)
+
+        assert plain_output == ordered_output
+        print(f"{name:14} left to right {plain_time:8.4f}s  ordered {ordered_time:8.4f}s  "
+              f"speedup {plain_time / ordered_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
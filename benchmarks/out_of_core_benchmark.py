@@ -0,0 +1,75 @@
+"""
+Compares in-memory and out-of-core evaluation of a tree of element-wise operations on matrices
+stored in .npy files, bound to the program as memory-mapped arrays, measuring time and peak memory
+(NumPy reports its allocations to tracemalloc).
+
+In memory, the operands are loaded with np.load and every operation allocates its full-size result.
+Out of core, the tree is evaluated in blocks of --block-size elements into a memory-mapped result.
+
+Usage: python -m benchmarks.out_of_core_benchmark [--size N] [--block-size N] [--engine ENGINE] [-O]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from src.core.main import engines
+from src.core.session import Session
+from src.interpreter import operations
+
+program = "return (A .+ B) .* (A .- B) ./ (B .+ B);"
+
+
+def run(arrays, engine, optimize):
+    session = Session(engine, optimize)
+    for name, array in arrays.items():
+        session.bind(name, array)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    _, value = session.run(program)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak, float(value[-1, -1]), isinstance(value, np.memmap)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--size", type=int, default=4000)
+    argument_parser.add_argument("--block-size", type=int, default=operations.out_of_core_block_size)
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    argument_parser.add_argument("-O", "--optimize", action="store_true")
+    arguments = argument_parser.parse_args()
+
+    operations.out_of_core_size = 0
+    operations.out_of_core_block_size = arguments.block_size
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {}
+        for index, name in enumerate("AB"):
+            paths[name] = os.path.join(directory, f"{name}.npy")
+            array = np.lib.format.open_memmap(paths[name], mode="w+", dtype=np.float64,
+                                              shape=(arguments.size, arguments.size))
+            array[:] = index + 1
+            array.flush()
+            del array
+
+        print(f"matrix size: {arguments.size}x{arguments.size}, block size: {arguments.block_size}, "
+              f"engine: {arguments.engine}, optimized: {arguments.optimize}")
+
+        results = set()
+        for name, mmap_mode in (("in memory", None), ("out of core", "r")):
+            arrays = {name: np.load(path, mmap_mode=mmap_mode) for name, path in paths.items()}
+            elapsed, peak, last, mapped = run(arrays, arguments.engine, arguments.optimize)
+            results.add(last)
+            print(f"{name:12} {elapsed:8.3f}s  peak {peak / 2 ** 20:8.1f} MB  mapped result: {mapped}")
+            del arrays
+
+        assert len(results) == 1
+
+
+if __name__ == '__main__':
+    main()
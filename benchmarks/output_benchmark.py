@@ -0,0 +1,75 @@
+"""
+Measures programs printing inside long loops, with every value printed as soon as its statement
+runs (a `print` call per statement, as engines used to do) and through the buffered output sink,
+which also reuses the text of matrices printed again unchanged.
+
+Output goes through a line buffered pipe to a `cat` process discarding it.
+
+Usage: python -m benchmarks.output_benchmark [--iterations N] [--repeat N] [--engine ENGINE]
+"""
+import io
+import time
+import subprocess
+import argparse
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.node_visitor import TypeChecker
+from src.interpreter.output import TextSink
+from src.core.main import engines
+
+programs = {
+    "scalars": """
+s = 0;
+for i = 0:{iterations} {{
+    s += i;
+    print i, s, "step";
+}}
+""",
+    "matrix": """
+A = [[1.5, 2.25, 3.125], [4.0, 5.5, 6.75], [7.0, 8.0, 9.0]];
+for i = 0:{iterations} {{
+    print A;
+}}
+"""}
+
+
+class PrintSink(TextSink):
+    """Prints every statement right away, without caching."""
+
+    def write(self, values):
+        print(", ".join(map(str, values)), file=self.stream)
+
+
+def run(text, engine, sink_class):
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(text, lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+
+    reader = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    with io.TextIOWrapper(reader.stdin, line_buffering=True) as stream:
+        start = time.perf_counter()
+        engines[engine](output=sink_class(stream)).run(ast)
+        elapsed = time.perf_counter() - start
+    reader.wait()
+
+    return elapsed
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--iterations", type=int, default=100000)
+    argument_parser.add_argument("--repeat", type=int, default=3, help="runs of each variant, the best is shown")
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    arguments = argument_parser.parse_args()
+
+    print(f"iterations: {arguments.iterations}, engine: {arguments.engine}")
+    for name, program in programs.items():
+        text = program.format(iterations=arguments.iterations)
+        print_time = min(run(text, arguments.engine, PrintSink) for _ in range(arguments.repeat))
+        buffered_time = min(run(text, arguments.engine, TextSink) for _ in range(arguments.repeat))
+        print(f"{name:8} print {print_time:8.3f}s  buffered {buffered_time:8.3f}s  "
+              f"speedup {print_time / buffered_time:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
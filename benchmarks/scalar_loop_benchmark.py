@@ -0,0 +1,56 @@
+"""
+Compares execution time of scalar loops run by the engines node by node and as specialized kernels
+keeping the variables in Python locals (compiled by Numba with --numba, when it is installed).
+
+Usage: python -m benchmarks.scalar_loop_benchmark [files...] [--repeat N] [--numba]
+"""
+import argparse
+import contextlib
+import io
+import time
+from benchmarks.engines_benchmark import prepare
+from src.core.main import engines
+from src.optimizer import scalar_loop
+from src.optimizer.scalar_loop import ScalarLoopSpecializer
+
+default_files = ["examples/interpreter_example_3.txt"]
+
+
+def measure(engine, filename, repeat, specialize):
+    best = float("inf")
+    for _ in range(repeat):
+        ast = prepare(filename)
+        if specialize:
+            ast = ScalarLoopSpecializer().visit(ast)
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            engines[engine]().run(ast)
+        best = min(best, time.perf_counter() - start)
+
+    return best, output.getvalue()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("files", nargs="*", default=default_files)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    argument_parser.add_argument("--numba", action="store_true", help="compile kernels with Numba")
+    arguments = argument_parser.parse_args()
+
+    if arguments.numba and scalar_loop.numba is None:
+        argument_parser.error("Numba is not installed")
+    scalar_loop.use_numba = arguments.numba
+
+    print(f"{'program':40}{'engine':>12}{'generic':>12}{'specialized':>13}{'speedup':>10}")
+    for filename in arguments.files:
+        for engine in engines:
+            generic, expected = measure(engine, filename, arguments.repeat, False)
+            specialized, output = measure(engine, filename, arguments.repeat, True)
+            assert output == expected, f"{engine} printed {output!r} instead of {expected!r}"
+            print(f"{filename:40}{engine:>12}{generic:11.4f}s{specialized:12.4f}s{generic / specialized:9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
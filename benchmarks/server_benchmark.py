@@ -0,0 +1,110 @@
+"""
+Load test of the program server: starts it on a temporary Unix socket and sends requests from
+several concurrent clients, reporting throughput and latency percentiles seen by the clients and
+the server. Running the same program as a new `python -m src.core.main` process is measured for
+reference.
+
+Usage: python -m benchmarks.server_benchmark [--clients N] [--requests N] [--workers N] [--size N]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from src.core.client import Client
+
+program = """
+n = {size};
+A = ones(n);
+B = eye(n) .+ A;
+C = A * B;
+return C[0, 0];
+"""
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def wait_for(socket_path, process):
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        try:
+            Client(socket_path).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+
+def load(socket_path, text, clients, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def client_thread():
+        with Client(socket_path) as client:
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.run(text)
+                elapsed = time.perf_counter() - start
+                assert response["status"] == "ok", response
+                with lock:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client_thread) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--clients", type=int, default=8)
+    argument_parser.add_argument("--requests", type=int, default=50)
+    argument_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    argument_parser.add_argument("--size", type=int, default=100)
+    arguments = argument_parser.parse_args()
+
+    text = program.format(size=arguments.size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "program.txt")
+        with open(filename, "w") as file:
+            file.write(text)
+
+        start = time.perf_counter()
+        for _ in range(5):
+            subprocess.run([sys.executable, "-m", "src.core.main", filename], check=True, stdout=subprocess.DEVNULL)
+        process_latency = (time.perf_counter() - start) / 5
+
+        socket_path = os.path.join(directory, "server.sock")
+        server = subprocess.Popen([sys.executable, "-m", "src.core.server", "--socket", socket_path,
+                                   "--workers", str(arguments.workers)], stderr=subprocess.DEVNULL)
+        try:
+            wait_for(socket_path, server)
+            elapsed, latencies = load(socket_path, text, arguments.clients, arguments.requests)
+            with Client(socket_path) as client:
+                metrics = client.metrics()
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"clients: {arguments.clients}, requests per client: {arguments.requests}, "
+          f"workers: {arguments.workers}, matrix size: {arguments.size}")
+    print(f"new process per run  {process_latency * 1000:8.2f} ms")
+    print(f"throughput           {len(latencies) / elapsed:8.1f} requests/s")
+    print(f"client latency       p50 {percentile(latencies, 0.5) * 1000:8.2f} ms  "
+          f"p90 {percentile(latencies, 0.9) * 1000:8.2f} ms  p99 {percentile(latencies, 0.99) * 1000:8.2f} ms")
+    print(f"server latency       p50 {metrics['p50'] * 1000:8.2f} ms  "
+          f"p90 {metrics['p90'] * 1000:8.2f} ms  p99 {metrics['p99'] * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
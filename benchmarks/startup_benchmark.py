@@ -0,0 +1,60 @@
+"""
+Measures the start-up time of `python -m src.core.main` on an empty program, with the lexer and
+parser tables generated from scratch (cold) and read from the tables written by a previous run
+(warm). Starting the Python interpreter alone is measured for reference.
+
+Every run is a separate process; cold runs use a new, empty COMPILER_TABLES_DIR.
+
+Usage: python -m benchmarks.startup_benchmark [--runs N] [--file FILE]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def measure(command, environment):
+    start = time.perf_counter()
+    subprocess.run(command, env=environment, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def run(runs, filename):
+    command = [sys.executable, "-m", "src.core.main", filename]
+    times = {"python": [], "cold": [], "warm": []}
+
+    with tempfile.TemporaryDirectory() as directory:
+        warm_environment = dict(os.environ, COMPILER_TABLES_DIR=os.path.join(directory, "warm"))
+        measure(command, warm_environment)
+
+        for run_index in range(runs):
+            times["python"].append(measure([sys.executable, "-c", "pass"], os.environ))
+
+            cold_directory = os.path.join(directory, f"cold{run_index}")
+            times["cold"].append(measure(command, dict(os.environ, COMPILER_TABLES_DIR=cold_directory)))
+
+            times["warm"].append(measure(command, warm_environment))
+
+    return times
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--runs", type=int, default=10)
+    argument_parser.add_argument("--file", default="examples/empty.txt")
+    arguments = argument_parser.parse_args()
+
+    times = run(arguments.runs, arguments.file)
+
+    print(f"file: {arguments.file}, runs: {arguments.runs}")
+    for name, values in times.items():
+        print(f"{name:7} median {statistics.median(values) * 1000:8.1f} ms  "
+              f"min {min(values) * 1000:8.1f} ms")
+    print(f"speedup: {statistics.median(times['cold']) / statistics.median(times['warm']):6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures element-wise `for` loops over vectors with and without the loop vectorizer.
+
+The vectors are created by the host and bound directly into the frame, because the language
+can only build vectors from literals.
+
+Usage: python -m benchmarks.vectorizer_benchmark [--size N] [--engine ENGINE]
+"""
+import argparse
+import time
+import numpy as np
+from src.scanner import scanner
+from src.parser import parser
+from src.type_checker.resolver import Resolver
+from src.interpreter.memory import Frame
+from src.optimizer.vectorizer import LoopVectorizer
+from src.core.main import engines
+
+program = """
+for i = 0:N {
+    A[i] = B[i] * 2 + C[i];
+    C[i] = A[i] / B[i] - 1;
+}
+"""
+
+
+def run(size, engine, optimize):
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(program, lexer=scanner.lexer)
+    if optimize:
+        ast = LoopVectorizer().visit(ast)
+
+    resolver = Resolver()
+    resolver.visit(ast)
+
+    rng = np.random.default_rng(0)
+    variables = {"N": size, "A": np.zeros(size), "B": rng.random(size) + 1, "C": rng.random(size)}
+    frame = Frame([None] * ast.slot_count)
+    for name, value in variables.items():
+        frame.values[resolver.slots[name]] = value
+
+    start = time.perf_counter()
+    engines[engine](frame).run(ast)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, variables["C"]
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--size", type=int, default=10 ** 6)
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter")
+    arguments = argument_parser.parse_args()
+
+    plain_time, plain_result = run(arguments.size, arguments.engine, optimize=False)
+    vectorized_time, vectorized_result = run(arguments.size, arguments.engine, optimize=True)
+
+    assert np.array_equal(plain_result, vectorized_result)
+    print(f"vector size: {arguments.size}, engine: {arguments.engine}")
+    print(f"loop:       {plain_time:10.4f}s")
+    print(f"vectorized: {vectorized_time:10.4f}s")
+    print(f"speedup:    {plain_time / vectorized_time:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
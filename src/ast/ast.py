@@ -2,6 +2,9 @@ from src.type_checker.variables_types import Type
 
 
 class Node:
+    fields = ()  # attributes holding child nodes (or lists of them), used by AST transformations
+    verified = False  # set by the TypeChecker when the runtime checks of the node cannot fail
+
     def __init__(self, position, children=None):
         self.position = position
         self.type = Type.UNKNOWN
@@ -15,10 +18,13 @@ class Node:
 
 
 class Program(Node):
+    fields = ('statements_list',)
+
     def __init__(self, position, statements_list):
         super().__init__(position, [statements_list])
 
         self.statements_list = statements_list
+        self.slot_count = None  # frame size, set by `Resolver`
 
 
 class Empty(Node):
@@ -34,6 +40,8 @@ class Number(Node):
 
 
 class Expression(Node):
+    fields = ('expression',)
+
     def __init__(self, position, expression):
         super().__init__(position, [expression])
 
@@ -41,6 +49,8 @@ class Expression(Node):
 
 
 class InnerVector(Node):
+    fields = ('inner_vector',)
+
     def __init__(self, position, inner_vector, new_expression):
         super().__init__(position, [inner_vector + [new_expression]])
 
@@ -51,6 +61,8 @@ class InnerVector(Node):
 
 
 class Vector(Node):
+    fields = ('inner_vector',)
+
     def __init__(self, position, inner_vector):
         super().__init__(position, [inner_vector])
 
@@ -58,6 +70,8 @@ class Vector(Node):
 
 
 class Matrix(Node):
+    fields = ('argument',)
+
     def __init__(self, position, matrix_type, argument):
         super().__init__(position, [matrix_type, argument])
 
@@ -65,7 +79,20 @@ class Matrix(Node):
         self.argument = argument
 
 
+class Load(Node):
+    fields = ('path', 'rows', 'columns')
+
+    def __init__(self, position, path, rows, columns):
+        super().__init__(position, [path, rows, columns])
+
+        self.path = path
+        self.rows = rows        # shape of a raw binary file, None for .npy files and vectors
+        self.columns = columns
+
+
 class Range(Node):
+    fields = ('from_index', 'to_index')
+
     def __init__(self, position, from_index, to_index):
         super().__init__(position, [from_index, to_index])
 
@@ -74,6 +101,8 @@ class Range(Node):
 
 
 class UnaryMinus(Node):
+    fields = ('value',)
+
     def __init__(self, position, value):
         super().__init__(position, [value])
 
@@ -81,15 +110,20 @@ class UnaryMinus(Node):
 
 
 class BinExpr(Node):
+    fields = ('left', 'right')
+
     def __init__(self, position, operator, left, right):
         super().__init__(position, [left, right])
 
         self.operator = operator
         self.left = left
         self.right = right
+        self.operation = None  # function applying the operation, bound by the Resolver to verified nodes
 
 
 class MatrixBinExpr(Node):
+    fields = ('left', 'right')
+
     def __init__(self, position, operator, left, right):
         super().__init__(position, [left, right])
 
@@ -99,6 +133,8 @@ class MatrixBinExpr(Node):
 
 
 class Transposition(Node):
+    fields = ('matrix',)
+
     def __init__(self, position, matrix):
         super().__init__(position, [matrix])
 
@@ -106,15 +142,20 @@ class Transposition(Node):
 
 
 class CompareExpr(Node):
+    fields = ('left', 'right')
+
     def __init__(self, position, operator, left, right):
         super().__init__(position, [left, right])
 
         self.operator = operator
         self.left = left
         self.right = right
+        self.operation = None  # function applying the operation, bound by the Resolver to verified nodes
 
 
 class SliceArgument(Node):
+    fields = ('argument',)
+
     def __init__(self, position, argument):
         super().__init__(position, [argument])
 
@@ -122,31 +163,42 @@ class SliceArgument(Node):
 
 
 class Slice(Node):
+    fields = ('slice_argument_1', 'slice_argument_2')
+
     def __init__(self, position, identifier, slice_argument_1, slice_argument_2):
         super().__init__(position, [slice_argument_1, slice_argument_2])
 
         self.identifier = identifier
         self.slice_argument_1 = slice_argument_1
         self.slice_argument_2 = slice_argument_2
+        self.slot = None
 
 
 class SliceOrID(Node):
+    fields = ('slice_or_id',)
+
     def __init__(self, position, slice_or_id):
         super().__init__(position, [slice_or_id])
 
         self.slice_or_id = slice_or_id
+        self.slot = None
 
 
 class AssignExpr(Node):
+    fields = ('left', 'right')
+
     def __init__(self, position, operator, left, right):
         super().__init__(position, [left, right])
 
         self.operator = operator
         self.left = left
         self.right = right
+        self.slot = None
 
 
 class StatementsList(Node):
+    fields = ('statements_list',)
+
     def __init__(self, position, statements_list, new_statement):
         super().__init__(position, [statements_list + [new_statement]])
 
@@ -157,6 +209,8 @@ class StatementsList(Node):
 
 
 class Return(Node):
+    fields = ('value',)
+
     def __init__(self, position, value):
         super().__init__(position, [value])
 
@@ -164,6 +218,8 @@ class Return(Node):
 
 
 class CodeBlock(Node):
+    fields = ('statements_list',)
+
     def __init__(self, position, statements_lists):
         super().__init__(position, [statements_lists])
 
@@ -178,15 +234,20 @@ class LoopStatement(Node):
 
 
 class For(Node):
+    fields = ('loop_range', 'statement')
+
     def __init__(self, position, iterator, loop_range, statement):
         super().__init__(position, [loop_range, statement])
 
         self.iterator = iterator
         self.loop_range = loop_range
         self.statement = statement
+        self.slot = None
 
 
 class While(Node):
+    fields = ('condition', 'statement')
+
     def __init__(self, position, condition, statement):
         super().__init__(position, [condition, statement])
 
@@ -195,6 +256,8 @@ class While(Node):
 
 
 class If(Node):
+    fields = ('condition', 'if_statement', 'else_statement')
+
     def __init__(self, position, condition, if_statement, else_statement):
         super().__init__(position, [condition, if_statement, else_statement])
 
@@ -203,8 +266,83 @@ class If(Node):
         self.else_statement = else_statement
 
 
+class Save(Node):
+    fields = ('value', 'path')
+
+    def __init__(self, position, value, path):
+        super().__init__(position, [value, path])
+
+        self.value = value
+        self.path = path
+
+
 class Print(Node):
+    fields = ('value',)
+
     def __init__(self, position, value):
         super().__init__(position, [value])
 
         self.value: InnerVector = value
+
+
+class KernelLoop(Node):
+    fields = ('loop',)
+
+    def __init__(self, position, loop, kernel):
+        super().__init__(position, [loop])
+
+        self.loop: For = loop  # fallback used when the kernel refuses to run
+        self.kernel = kernel   # kernel(frame, from_index, to_index) -> True if the whole loop was executed
+
+
+class Constant(Node):
+    def __init__(self, position, value):
+        super().__init__(position)
+
+        self.value = value  # array precomputed by the optimizer
+        self.copy = True    # evaluations get a fresh copy unless the value cannot be retained by the program
+
+
+class Invariant(Node):
+    fields = ('expression',)
+
+    def __init__(self, position, expression):
+        super().__init__(position, [expression])
+
+        self.expression = expression
+        self.copy = False  # whether the cached value can be retained by the program and has to be copied
+        self.slot = None   # frame slot caching the value, set by `Resolver`
+
+
+class HoistedLoop(Node):
+    fields = ('loop',)
+
+    def __init__(self, position, loop, invariants):
+        super().__init__(position, [loop])
+
+        self.loop = loop              # `For` or `While` containing the invariants
+        self.invariants = invariants  # `Invariant` nodes whose cached values are dropped around the loop
+
+
+class FusedExpr(Node):
+    fields = ('operands',)
+
+    def __init__(self, position, expression, operands, program):
+        super().__init__(position, [operands])
+
+        self.expression = expression  # original tree of `MatrixBinExpr` nodes
+        self.operands = operands      # leaves of the tree in evaluation order
+        self.program = program        # postfix form: operand index or `MatrixBinExpr` applied to two top values
+
+
+class MatrixChain(Node):
+    fields = ('operands',)
+
+    def __init__(self, position, expression, operands, program):
+        super().__init__(position, [operands])
+
+        self.expression = expression  # original tree of `*` operations
+        self.operands = operands      # leaves of the tree in evaluation order
+        self.program = program        # postfix form: operand index or `BinExpr` applied to two top values
+        self.dims = None              # matrix sizes known statically: operand i is dims[i] x dims[i + 1]
+        self.order = None             # optimal split points for `dims`
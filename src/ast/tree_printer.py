@@ -64,6 +64,17 @@ class TreePrinter:
 
         self.argument.print_tree(indent + 1)
 
+    @staticmethod
+    @add_to_class(Load)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("LOAD")
+
+        self.path.print_tree(indent + 1)
+        if self.rows:
+            self.rows.print_tree(indent + 1)
+            self.columns.print_tree(indent + 1)
+
     @staticmethod
     @add_to_class(Range)
     def print_tree(self, indent=0):
@@ -222,3 +233,59 @@ class TreePrinter:
         print("PRINT")
 
         self.value.print_tree(indent + 1)
+
+    @staticmethod
+    @add_to_class(Save)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("SAVE")
+
+        self.value.print_tree(indent + 1)
+        self.path.print_tree(indent + 1)
+
+    @staticmethod
+    @add_to_class(KernelLoop)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("KERNEL")
+
+        self.loop.print_tree(indent + 1)
+
+    @staticmethod
+    @add_to_class(Constant)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("CONSTANT")
+
+        for line in str(self.value).splitlines():
+            print_indent(indent + 1)
+            print(line)
+
+    @staticmethod
+    @add_to_class(Invariant)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("INVARIANT")
+
+        self.expression.print_tree(indent + 1)
+
+    @staticmethod
+    @add_to_class(HoistedLoop)
+    def print_tree(self, indent=0):
+        self.loop.print_tree(indent)
+
+    @staticmethod
+    @add_to_class(FusedExpr)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("FUSED")
+
+        self.expression.print_tree(indent + 1)
+
+    @staticmethod
+    @add_to_class(MatrixChain)
+    def print_tree(self, indent=0):
+        print_indent(indent)
+        print("CHAIN")
+
+        self.expression.print_tree(indent + 1)
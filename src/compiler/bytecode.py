@@ -0,0 +1,377 @@
+from enum import IntEnum
+from src.ast.ast import *
+from src.type_checker.variables_types import Type
+from src.interpreter.visit import *
+from src.type_checker.resolver import resolve
+
+
+class Opcode(IntEnum):
+    LOAD_CONST = 0      # argument: value
+    LOAD_NAME = 1       # argument: slot
+    LOAD_DEFINED = 2    # argument: (slot, Expression node), fails on uninitialized variable
+    STORE_NAME = 3      # argument: slot
+    POP_TOP = 4
+    BUILD_LIST = 5      # argument: number of elements
+    MAKE_VECTOR = 6     # argument: Vector node
+    MAKE_MATRIX = 7     # argument: Matrix node
+    MAKE_RANGE = 8      # argument: Range node
+    NEGATE = 9          # argument: UnaryMinus node
+    BINARY = 10         # argument: BinExpr node
+    MATRIX_BINARY = 11  # argument: MatrixBinExpr node
+    TRANSPOSE = 12      # argument: Transposition node
+    COMPARE = 13        # argument: CompareExpr node
+    LOAD_SLICE = 14     # argument: (slot, Slice node)
+    STORE_SLICE = 15    # argument: (slot, AssignExpr node)
+    COMPOUND = 16       # argument: AssignExpr node
+    PUSH_SCOPE = 17     # argument: scope name
+    POP_SCOPE = 18
+    JUMP = 19           # argument: target
+    JUMP_IF_FALSE = 20  # argument: target
+    FOR_RANGE = 21      # argument: For node
+    FOR_ITER = 22       # argument: (slot, exit target)
+    PRINT = 23
+    RETURN_VALUE = 24
+    RUN_KERNEL = 25     # argument: (KernelLoop node, target), leaves the range on the stack if refused
+    LOAD_TARGET = 26    # argument: (slot, Slice node), like LOAD_SLICE but keeps slice arguments for STORE_SLICE
+    LOAD_COPY = 27      # argument: array, pushes a copy of it
+    LOAD_INVARIANT = 28  # argument: (slot, copy, target), pushes the cached value and jumps if it is cached
+    STORE_INVARIANT = 29  # argument: (slot, copy), caches the value on top of the stack
+    CLEAR_SLOTS = 30    # argument: list of slots
+    FUSED = 31          # argument: (FusedExpr node, list of operand codes)
+    MATRIX_CHAIN = 32   # argument: (MatrixChain node, list of operand codes)
+    LOAD_DATA = 33      # argument: Load node
+    SAVE_DATA = 34      # argument: Save node
+    APPLY = 35          # argument: function bound to a statically verified BinExpr or CompareExpr
+
+
+class Code:
+    def __init__(self, instructions, slot_count):
+        self.instructions = instructions
+        self.slot_count = slot_count
+
+    def __str__(self):
+        lines = []
+        for index, (opcode, argument) in enumerate(self.instructions):
+            if isinstance(argument, tuple):
+                argument = argument[0]
+            if isinstance(argument, Node):
+                argument = ""
+            lines.append(f"{index:5} {opcode.name:15} {argument if argument is not None else ''}")
+
+        return "\n".join(lines)
+
+
+class BytecodeCompiler(object):
+    """
+    Lowers the AST into a flat list of `(opcode, argument)` instructions for `VirtualMachine`.
+
+    Variables use the frame slots given by `Resolver`. `break`, `continue` and `return` become
+    jumps (with explicit scope pops) instead of exceptions.
+    """
+
+    def __init__(self):
+        self.instructions = []
+        self.scope_depth = 0
+        self.loops = []  # (scope depth of the loop, continue target, break jumps to patch)
+
+    def compile_program(self, node: Program):
+        resolve(node)
+        self.compile(node)
+        self.emit(Opcode.LOAD_CONST, None)
+        self.emit(Opcode.RETURN_VALUE)
+
+        return Code(self.instructions, node.slot_count)
+
+    @staticmethod
+    def compile_expression(node):
+        """Compiles expression evaluated separately, e.g. an operand of a fused expression."""
+        compiler = BytecodeCompiler()
+        compiler.compile(node)
+        compiler.emit(Opcode.RETURN_VALUE)
+
+        return Code(compiler.instructions, 0)
+
+    def emit(self, opcode, argument=None):
+        self.instructions.append((opcode, argument))
+        return len(self.instructions) - 1
+
+    def patch(self, index, target):
+        opcode, argument = self.instructions[index]
+        if opcode in {Opcode.FOR_ITER, Opcode.RUN_KERNEL, Opcode.LOAD_INVARIANT}:
+            self.instructions[index] = (opcode, (*argument[:-1], target))
+        else:
+            self.instructions[index] = (opcode, target)
+
+    @on('node')
+    def compile(self, node):
+        """
+        This is the generic method that initializes the
+        dynamic dispatcher.
+        """
+
+    @when(Program)
+    def compile(self, node: Program):
+        self.compile(node.statements_list)
+
+    @when(Empty)
+    def compile(self, _):
+        pass
+
+    @when(Number)
+    def compile(self, node: Number):
+        self.emit(Opcode.LOAD_CONST, node.number)
+
+    @when(Constant)
+    def compile(self, node: Constant):
+        self.emit(Opcode.LOAD_COPY if node.copy else Opcode.LOAD_CONST, node.value)
+
+    @when(Expression)
+    def compile(self, node: Expression):
+        if Type.get_type(node.expression) == Type.STRING:
+            self.emit(Opcode.LOAD_CONST, node.expression)
+        elif isinstance(node.expression, SliceOrID) and not isinstance(node.expression.slice_or_id, Slice):
+            self.emit(Opcode.LOAD_DEFINED, (node.expression.slot, node))
+        else:
+            self.compile(node.expression)
+
+    @when(InnerVector)
+    def compile(self, node: InnerVector):
+        for expression in node.inner_vector:
+            self.compile(expression)
+        self.emit(Opcode.BUILD_LIST, len(node.inner_vector))
+
+    @when(Vector)
+    def compile(self, node: Vector):
+        self.compile(node.inner_vector)
+        self.emit(Opcode.MAKE_VECTOR, node)
+
+    @when(Matrix)
+    def compile(self, node: Matrix):
+        self.compile(node.argument)
+        self.emit(Opcode.MAKE_MATRIX, node)
+
+    @when(Load)
+    def compile(self, node: Load):
+        for argument in (node.path, node.rows, node.columns):
+            if argument is not None:
+                self.compile(argument)
+        self.emit(Opcode.LOAD_DATA, node)
+
+    @when(Range)
+    def compile(self, node: Range):
+        self.compile(node.from_index)
+        self.compile(node.to_index)
+        self.emit(Opcode.MAKE_RANGE, node)
+
+    @when(UnaryMinus)
+    def compile(self, node: UnaryMinus):
+        self.compile(node.value)
+        self.emit(Opcode.NEGATE, node)
+
+    @when(BinExpr)
+    def compile(self, node: BinExpr):
+        self.compile(node.left)
+        self.compile(node.right)
+        if node.operation is not None:
+            self.emit(Opcode.APPLY, node.operation)
+        else:
+            self.emit(Opcode.BINARY, node)
+
+    @when(MatrixBinExpr)
+    def compile(self, node: MatrixBinExpr):
+        self.compile(node.left)
+        self.compile(node.right)
+        self.emit(Opcode.MATRIX_BINARY, node)
+
+    @when(MatrixChain)
+    def compile(self, node: MatrixChain):
+        # operands are evaluated by the operation itself, interleaved with its checks
+        self.emit(Opcode.MATRIX_CHAIN, (node, [self.compile_expression(operand) for operand in node.operands]))
+
+    @when(FusedExpr)
+    def compile(self, node: FusedExpr):
+        # operands are evaluated by the operation itself, interleaved with its checks
+        self.emit(Opcode.FUSED, (node, [self.compile_expression(operand) for operand in node.operands]))
+
+    @when(Transposition)
+    def compile(self, node: Transposition):
+        self.compile(node.matrix)
+        self.emit(Opcode.TRANSPOSE, node)
+
+    @when(CompareExpr)
+    def compile(self, node: CompareExpr):
+        self.compile(node.left)
+        self.compile(node.right)
+        if node.operation is not None:
+            self.emit(Opcode.APPLY, node.operation)
+        else:
+            self.emit(Opcode.COMPARE, node)
+
+    @when(SliceArgument)
+    def compile(self, node: SliceArgument):
+        self.compile(node.argument)
+
+    @when(Slice)
+    def compile(self, node: Slice):
+        self._compile_slice_arguments(node)
+        self.emit(Opcode.LOAD_SLICE, (node.slot, node))
+
+    def _compile_slice_arguments(self, node: Slice):
+        self.compile(node.slice_argument_1)
+        if node.slice_argument_2:
+            self.compile(node.slice_argument_2)
+        else:
+            self.emit(Opcode.LOAD_CONST, None)
+
+    @when(SliceOrID)
+    def compile(self, node: SliceOrID):
+        if isinstance(node.slice_or_id, Slice):
+            self.compile(node.slice_or_id)
+        else:
+            self.emit(Opcode.LOAD_NAME, node.slot)
+
+    @when(AssignExpr)
+    def compile(self, node: AssignExpr):
+        left = node.left.slice_or_id
+
+        if isinstance(left, Slice):
+            # leaves both slice arguments and the current value on the stack for STORE_SLICE
+            self._compile_slice_arguments(left)
+            self.emit(Opcode.LOAD_TARGET, (node.slot, left))
+            self.compile(node.right)
+            self.emit(Opcode.STORE_SLICE, (node.slot, node))
+        elif node.operator != "=":
+            self.emit(Opcode.LOAD_NAME, node.slot)
+            self.compile(node.right)
+            self.emit(Opcode.COMPOUND, node)
+            self.emit(Opcode.STORE_NAME, node.slot)
+        else:
+            self.compile(node.right)
+            self.emit(Opcode.STORE_NAME, node.slot)
+
+    @when(StatementsList)
+    def compile(self, node: StatementsList):
+        for statement in node.statements_list:
+            if isinstance(statement, CodeBlock):
+                self._compile_scoped("code_block", statement)
+            else:
+                self.compile(statement)
+
+    def _compile_scoped(self, name, node):
+        self.emit(Opcode.PUSH_SCOPE, name)
+        self.scope_depth += 1
+        self.compile(node)
+        self.scope_depth -= 1
+        self.emit(Opcode.POP_SCOPE)
+
+    @when(Return)
+    def compile(self, node: Return):
+        if node.value:
+            self.compile(node.value)
+        else:
+            self.emit(Opcode.LOAD_CONST, None)
+        self.emit(Opcode.RETURN_VALUE)
+
+    @when(CodeBlock)
+    def compile(self, node: CodeBlock):
+        self.compile(node.statements_list)
+
+    @when(LoopStatement)
+    def compile(self, node: LoopStatement):
+        loop_depth, continue_target, break_jumps = self.loops[-1]
+
+        for _ in range(self.scope_depth - loop_depth):
+            self.emit(Opcode.POP_SCOPE)
+
+        if node.instruction.lower() == "break":
+            break_jumps.append(self.emit(Opcode.JUMP))
+        else:
+            self.emit(Opcode.JUMP, continue_target)
+
+    @when(For)
+    def compile(self, node: For):
+        self.compile(node.loop_range.from_index)
+        self.compile(node.loop_range.to_index)
+        self._compile_for_range(node)
+
+    @when(KernelLoop)
+    def compile(self, node: KernelLoop):
+        self.compile(node.loop.loop_range.from_index)
+        self.compile(node.loop.loop_range.to_index)
+        kernel_jump = self.emit(Opcode.RUN_KERNEL, (node, None))
+        self._compile_for_range(node.loop)
+        self.patch(kernel_jump, len(self.instructions))
+
+    @when(Invariant)
+    def compile(self, node: Invariant):
+        cached_jump = self.emit(Opcode.LOAD_INVARIANT, (node.slot, node.copy, None))
+        self.compile(node.expression)
+        self.emit(Opcode.STORE_INVARIANT, (node.slot, node.copy))
+        self.patch(cached_jump, len(self.instructions))
+
+    @when(HoistedLoop)
+    def compile(self, node: HoistedLoop):
+        slots = [invariant.slot for invariant in node.invariants]
+        self.emit(Opcode.CLEAR_SLOTS, slots)
+        self.compile(node.loop)
+        self.emit(Opcode.CLEAR_SLOTS, slots)
+
+    def _compile_for_range(self, node: For):
+        self.emit(Opcode.FOR_RANGE, node)
+        self.emit(Opcode.PUSH_SCOPE, "for")
+        self.scope_depth += 1
+
+        loop_start = self.emit(Opcode.FOR_ITER, (node.slot, None))
+        self._compile_loop_body(node.statement, loop_start, [loop_start])
+
+        self.emit(Opcode.POP_TOP)  # exhausted range iterator
+        self.scope_depth -= 1
+        self.emit(Opcode.POP_SCOPE)
+
+    @when(While)
+    def compile(self, node: While):
+        self.emit(Opcode.PUSH_SCOPE, "while")
+        self.scope_depth += 1
+
+        loop_start = len(self.instructions)
+        self.compile(node.condition)
+        exit_jump = self.emit(Opcode.JUMP_IF_FALSE)
+        self._compile_loop_body(node.statement, loop_start, [exit_jump])
+
+        self.scope_depth -= 1
+        self.emit(Opcode.POP_SCOPE)
+
+    def _compile_loop_body(self, statement, loop_start, exit_jumps):
+        self.loops.append((self.scope_depth, loop_start, exit_jumps))
+        self.compile(statement)
+        self.emit(Opcode.JUMP, loop_start)
+        self.loops.pop()
+
+        loop_end = len(self.instructions)
+        for jump in exit_jumps:
+            self.patch(jump, loop_end)
+
+    @when(If)
+    def compile(self, node: If):
+        self.compile(node.condition)
+        else_jump = self.emit(Opcode.JUMP_IF_FALSE)
+        self._compile_scoped("if", node.if_statement)
+
+        if node.else_statement:
+            end_jump = self.emit(Opcode.JUMP)
+            self.patch(else_jump, len(self.instructions))
+            self._compile_scoped("if", node.else_statement)
+            self.patch(end_jump, len(self.instructions))
+        else:
+            self.patch(else_jump, len(self.instructions))
+
+    @when(Save)
+    def compile(self, node: Save):
+        self.compile(node.value)
+        self.compile(node.path)
+        self.emit(Opcode.SAVE_DATA, node)
+
+    @when(Print)
+    def compile(self, node: Print):
+        self.compile(node.value)
+        self.emit(Opcode.PRINT)
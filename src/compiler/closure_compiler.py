@@ -0,0 +1,417 @@
+from src.ast.ast import *
+from src.type_checker.variables_types import Type
+from src.interpreter.visit import *
+from src.interpreter.memory import *
+from src.interpreter.output import TextSink
+from src.interpreter.operations import *
+from src.interpreter.exceptions import ReturnValueException
+from src.type_checker.resolver import resolve
+
+# signals returned by compiled statements, `None` means normal completion
+BREAK = "break"
+CONTINUE = "continue"
+
+
+class ClosureCompiler(object):
+    """
+    Compiles the AST once into nested Python closures, so that running the program
+    does not go through the dynamic dispatcher on every node evaluation.
+
+    Expressions compile to closures returning their value, statements compile to closures
+    returning `None`, `BREAK` or `CONTINUE`.
+    """
+
+    def __init__(self, frame=None, output=None):
+        self.frame = frame if frame is not None else Frame()
+        self.output = output if output is not None else TextSink()
+
+    def run(self, node: Program):
+        try:
+            return self.compile(node)()
+        finally:
+            self.output.flush()
+
+    @on('node')
+    def compile(self, node):
+        """
+        This is the generic method that initializes the
+        dynamic dispatcher.
+        """
+
+    @when(Program)
+    def compile(self, node: Program):
+        resolve(node)
+        self.frame.resize(node.slot_count)
+        statements_list = self.compile(node.statements_list)
+
+        def program():
+            try:
+                statements_list()
+                return None
+            except ReturnValueException as exception:
+                return exception.value
+
+        return program
+
+    @when(Empty)
+    def compile(self, _):
+        return lambda: None
+
+    @when(Number)
+    def compile(self, node: Number):
+        number = node.number
+        return lambda: number
+
+    @when(Constant)
+    def compile(self, node: Constant):
+        value = node.value
+        if node.copy:
+            return value.copy
+        return lambda: value
+
+    @when(Expression)
+    def compile(self, node: Expression):
+        if Type.get_type(node.expression) == Type.STRING:
+            string = node.expression
+            return lambda: string
+
+        expression = self.compile(node.expression)
+        if not isinstance(node.expression, SliceOrID):
+            return expression
+
+        return lambda: expression_value(node, expression())
+
+    @when(InnerVector)
+    def compile(self, node: InnerVector):
+        expressions = [self.compile(expression) for expression in node.inner_vector]
+        return lambda: [expression() for expression in expressions]
+
+    @when(Vector)
+    def compile(self, node: Vector):
+        inner_vector = self.compile(node.inner_vector)
+        return lambda: make_vector(node, inner_vector())
+
+    @when(Matrix)
+    def compile(self, node: Matrix):
+        argument = self.compile(node.argument)
+        return lambda: make_matrix(node, argument())
+
+    @when(Load)
+    def compile(self, node: Load):
+        path = self.compile(node.path)
+        if node.rows is None:
+            return lambda: load_data(node, path())
+
+        rows = self.compile(node.rows)
+        columns = self.compile(node.columns)
+        return lambda: load_data(node, path(), rows(), columns())
+
+    @when(Range)
+    def compile(self, node: Range):
+        from_index = self.compile(node.from_index)
+        to_index = self.compile(node.to_index)
+        return lambda: make_range(node, from_index(), to_index())
+
+    @when(UnaryMinus)
+    def compile(self, node: UnaryMinus):
+        value = self.compile(node.value)
+        return lambda: negate(node, value())
+
+    @when(BinExpr)
+    def compile(self, node: BinExpr):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        operation = node.operation
+        if operation is not None:
+            return lambda: operation(left(), right())
+
+        return lambda: binary_operation(node, left(), right())
+
+    @when(MatrixBinExpr)
+    def compile(self, node: MatrixBinExpr):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        return lambda: matrix_binary_operation(node, left(), right())
+
+    @when(MatrixChain)
+    def compile(self, node: MatrixChain):
+        operands = [self.compile(operand) for operand in node.operands]
+        return lambda: matrix_chain(node, lambda index: operands[index]())
+
+    @when(FusedExpr)
+    def compile(self, node: FusedExpr):
+        operands = [self.compile(operand) for operand in node.operands]
+        return lambda: fused_operation(node, lambda index: operands[index]())
+
+    @when(Transposition)
+    def compile(self, node: Transposition):
+        matrix = self.compile(node.matrix)
+        return lambda: transpose(node, matrix())
+
+    @when(CompareExpr)
+    def compile(self, node: CompareExpr):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        operation = node.operation
+        if operation is not None:
+            return lambda: operation(left(), right())
+
+        return lambda: compare(node, left(), right())
+
+    @when(SliceArgument)
+    def compile(self, node: SliceArgument):
+        return self.compile(node.argument)
+
+    @when(Slice)
+    def compile(self, node: Slice):
+        values = self.frame.values
+        slot = node.slot
+        argument_1 = self.compile(node.slice_argument_1)
+
+        if node.slice_argument_2:
+            argument_2 = self.compile(node.slice_argument_2)
+            return lambda: get_slice(node, values[slot], argument_1(), argument_2())
+
+        return lambda: get_slice(node, values[slot], argument_1(), None)
+
+    @when(SliceOrID)
+    def compile(self, node: SliceOrID):
+        if isinstance(node.slice_or_id, Slice):
+            return self.compile(node.slice_or_id)
+
+        values = self.frame.values
+        slot = node.slot
+        return lambda: values[slot]
+
+    @when(AssignExpr)
+    def compile(self, node: AssignExpr):
+        values = self.frame.values
+        set_variable = self.frame.set
+        slot = node.slot
+        left = node.left.slice_or_id
+        right = self.compile(node.right)
+        is_compound = node.operator != "="
+
+        if isinstance(left, Slice):
+            argument_1 = self.compile(left.slice_argument_1)
+            argument_2 = self.compile(left.slice_argument_2) if left.slice_argument_2 else lambda: None
+
+            def assign_to_slice():
+                index_1 = argument_1()
+                index_2 = argument_2()
+                left_value = get_slice(left, values[slot], index_1, index_2)
+                right_value = right()
+
+                if is_compound:
+                    right_value = compound_value(node, left_value, right_value)
+
+                if right_value is not left_value:  # otherwise the slice was updated in place
+                    assign_slice(node, values[slot], index_1, index_2, right_value)
+
+            return assign_to_slice
+
+        if is_compound:
+            def compound_assign():
+                left_value = values[slot]
+                set_variable(slot, compound_value(node, left_value, right()))
+
+            return compound_assign
+
+        def assign():
+            set_variable(slot, right())
+
+        return assign
+
+    @when(StatementsList)
+    def compile(self, node: StatementsList):
+        statements = tuple(self._compile_statement(statement) for statement in node.statements_list)
+
+        def statements_list():
+            for statement in statements:
+                signal = statement()
+                if signal is not None:
+                    return signal
+
+            return None
+
+        return statements_list
+
+    def _compile_statement(self, node):
+        statement = self.compile(node)
+        if not isinstance(node, CodeBlock):
+            return statement
+
+        return self._scoped("code_block", statement)
+
+    def _scoped(self, name, statement):
+        push = self.frame.push
+        pop = self.frame.pop
+
+        def scoped():
+            push(name)
+            signal = statement()
+            pop()
+            return signal
+
+        return scoped
+
+    @when(Return)
+    def compile(self, node: Return):
+        value = self.compile(node.value) if node.value else lambda: None
+
+        def return_statement():
+            raise ReturnValueException(value())
+
+        return return_statement
+
+    @when(CodeBlock)
+    def compile(self, node: CodeBlock):
+        return self.compile(node.statements_list)
+
+    @when(LoopStatement)
+    def compile(self, node: LoopStatement):
+        signal = BREAK if node.instruction.lower() == "break" else CONTINUE
+        return lambda: signal
+
+    @when(For)
+    def compile(self, node: For):
+        from_index = self.compile(node.loop_range.from_index)
+        to_index = self.compile(node.loop_range.to_index)
+        run_for = self._compile_for_range(node)
+
+        def for_loop():
+            start = from_index()
+            stop = to_index()
+            check_range(node, start, stop)
+
+            return run_for(start, stop)
+
+        return for_loop
+
+    @when(KernelLoop)
+    def compile(self, node: KernelLoop):
+        loop = node.loop
+        kernel = node.kernel
+        frame = self.frame
+        from_index = self.compile(loop.loop_range.from_index)
+        to_index = self.compile(loop.loop_range.to_index)
+        run_for = self._compile_for_range(loop)
+
+        def kernel_loop():
+            start = from_index()
+            stop = to_index()
+            check_range(loop, start, stop)
+
+            if not kernel(frame, start, stop):
+                run_for(start, stop)
+
+            return None
+
+        return kernel_loop
+
+    @when(Invariant)
+    def compile(self, node: Invariant):
+        values = self.frame.values
+        slot = node.slot
+        copy = node.copy
+        expression = self.compile(node.expression)
+
+        def invariant():
+            value = values[slot]
+            if value is None:
+                value = expression()
+                values[slot] = value
+
+            return value.copy() if copy else value
+
+        return invariant
+
+    @when(HoistedLoop)
+    def compile(self, node: HoistedLoop):
+        values = self.frame.values
+        slots = [invariant.slot for invariant in node.invariants]
+        loop = self.compile(node.loop)
+
+        def hoisted_loop():
+            for slot in slots:
+                values[slot] = None
+            loop()
+            for slot in slots:
+                values[slot] = None
+
+            return None
+
+        return hoisted_loop
+
+    def _compile_for_range(self, node: For):
+        set_variable = self.frame.set
+        push = self.frame.push
+        pop = self.frame.pop
+        slot = node.slot
+        statement = self.compile(node.statement)
+
+        def run_for(start, stop):
+            push("for")
+            for i in range(start, stop):
+                set_variable(slot, i)
+                if statement() is BREAK:
+                    break
+            pop()
+
+            return None
+
+        return run_for
+
+    @when(While)
+    def compile(self, node: While):
+        push = self.frame.push
+        pop = self.frame.pop
+        condition = self.compile(node.condition)
+        statement = self.compile(node.statement)
+
+        def while_loop():
+            push("while")
+            while condition():
+                if statement() is BREAK:
+                    break
+            pop()
+
+            return None
+
+        return while_loop
+
+    @when(If)
+    def compile(self, node: If):
+        condition = self.compile(node.condition)
+        if_statement = self._scoped("if", self.compile(node.if_statement))
+        else_statement = self._scoped("if", self.compile(node.else_statement)) if node.else_statement else None
+
+        def if_statement_():
+            if condition():
+                return if_statement()
+            elif else_statement:
+                return else_statement()
+
+            return None
+
+        return if_statement_
+
+    @when(Save)
+    def compile(self, node: Save):
+        value = self.compile(node.value)
+        path = self.compile(node.path)
+
+        def save_statement():
+            save_data(node, value(), path())
+
+        return save_statement
+
+    @when(Print)
+    def compile(self, node: Print):
+        value = self.compile(node.value)
+        write = self.output.write
+
+        def print_statement():
+            write(value())
+
+        return print_statement
@@ -0,0 +1,174 @@
+from src.ast.ast import *
+from src.compiler.bytecode import Opcode, BytecodeCompiler
+from src.interpreter.memory import Frame
+from src.interpreter.output import TextSink
+from src.interpreter.operations import *
+
+
+class VirtualMachine(object):
+    """
+    Stack-based virtual machine executing code produced by `BytecodeCompiler`.
+
+    Variables live in the slots of a `Frame`, the scoping rules are inlined into the dispatch loop.
+    """
+
+    def __init__(self, frame=None, output=None):
+        self.frame = frame if frame is not None else Frame()
+        self.output = output if output is not None else TextSink()
+
+    def run(self, node: Program):
+        try:
+            return self.execute(BytecodeCompiler().compile_program(node))
+        finally:
+            self.output.flush()
+
+    def execute(self, code):
+        instructions = code.instructions
+        self.frame.resize(code.slot_count)
+        values = self.frame.values
+        scopes = self.frame.scopes
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        LOAD_CONST, LOAD_NAME, LOAD_DEFINED, STORE_NAME = \
+            Opcode.LOAD_CONST, Opcode.LOAD_NAME, Opcode.LOAD_DEFINED, Opcode.STORE_NAME
+        BINARY, COMPARE, APPLY, JUMP, JUMP_IF_FALSE, FOR_ITER, COMPOUND = \
+            Opcode.BINARY, Opcode.COMPARE, Opcode.APPLY, Opcode.JUMP, Opcode.JUMP_IF_FALSE, Opcode.FOR_ITER, \
+            Opcode.COMPOUND
+
+        while True:
+            opcode, argument = instructions[pc]
+            pc += 1
+
+            # the most frequent instructions go first
+            if opcode == LOAD_CONST:
+                push(argument)
+            elif opcode == LOAD_DEFINED:
+                slot, node = argument
+                push(expression_value(node, values[slot]))
+            elif opcode == STORE_NAME:
+                value = pop()
+                if values[argument] is None:
+                    scopes[-1][1].append(argument)
+                values[argument] = value
+            elif opcode == BINARY:
+                right = pop()
+                stack[-1] = binary_operation(argument, stack[-1], right)
+            elif opcode == COMPARE:
+                right = pop()
+                stack[-1] = compare(argument, stack[-1], right)
+            elif opcode == APPLY:
+                right = pop()
+                stack[-1] = argument(stack[-1], right)
+            elif opcode == JUMP:
+                pc = argument
+            elif opcode == JUMP_IF_FALSE:
+                if not pop():
+                    pc = argument
+            elif opcode == FOR_ITER:
+                slot, target = argument
+                i = next(stack[-1], None)
+                if i is None:
+                    pc = target
+                else:
+                    if values[slot] is None:
+                        scopes[-1][1].append(slot)
+                    values[slot] = i
+            elif opcode == LOAD_NAME:
+                push(values[argument])
+            elif opcode == COMPOUND:
+                right = pop()
+                stack[-1] = compound_value(argument, stack[-1], right)
+            elif opcode == Opcode.PUSH_SCOPE:
+                scopes.append((argument, []))
+            elif opcode == Opcode.POP_SCOPE:
+                for slot in scopes.pop()[1]:
+                    values[slot] = None
+            elif opcode == Opcode.MATRIX_BINARY:
+                right = pop()
+                stack[-1] = matrix_binary_operation(argument, stack[-1], right)
+            elif opcode == Opcode.LOAD_SLICE:
+                slot, node = argument
+                argument_2 = pop()
+                stack[-1] = get_slice(node, values[slot], stack[-1], argument_2)
+            elif opcode == Opcode.LOAD_TARGET:
+                slot, node = argument
+                push(get_slice(node, values[slot], stack[-2], stack[-1]))
+            elif opcode == Opcode.STORE_SLICE:
+                slot, node = argument
+                right_value = pop()
+                left_value = pop()
+                argument_2 = pop()
+                argument_1 = pop()
+                if node.operator != "=":
+                    right_value = compound_value(node, left_value, right_value)
+                if right_value is not left_value:  # otherwise the slice was updated in place
+                    assign_slice(node, values[slot], argument_1, argument_2, right_value)
+            elif opcode == Opcode.NEGATE:
+                stack[-1] = negate(argument, stack[-1])
+            elif opcode == Opcode.TRANSPOSE:
+                stack[-1] = transpose(argument, stack[-1])
+            elif opcode == Opcode.BUILD_LIST:
+                elements = stack[len(stack) - argument:]
+                del stack[len(stack) - argument:]
+                push(elements)
+            elif opcode == Opcode.MAKE_VECTOR:
+                stack[-1] = make_vector(argument, stack[-1])
+            elif opcode == Opcode.MATRIX_CHAIN:
+                node, codes = argument
+                push(matrix_chain(node, lambda index: self.execute(codes[index])))
+            elif opcode == Opcode.FUSED:
+                node, codes = argument
+                push(fused_operation(node, lambda index: self.execute(codes[index])))
+            elif opcode == Opcode.LOAD_INVARIANT:
+                slot, copy, target = argument
+                value = values[slot]
+                if value is not None:
+                    push(value.copy() if copy else value)
+                    pc = target
+            elif opcode == Opcode.STORE_INVARIANT:
+                slot, copy = argument
+                values[slot] = stack[-1]
+                if copy:
+                    stack[-1] = stack[-1].copy()
+            elif opcode == Opcode.CLEAR_SLOTS:
+                for slot in argument:
+                    values[slot] = None
+            elif opcode == Opcode.LOAD_COPY:
+                push(argument.copy())
+            elif opcode == Opcode.MAKE_MATRIX:
+                stack[-1] = make_matrix(argument, stack[-1])
+            elif opcode == Opcode.MAKE_RANGE:
+                to_index = pop()
+                stack[-1] = make_range(argument, stack[-1], to_index)
+            elif opcode == Opcode.FOR_RANGE:
+                to_index = pop()
+                from_index = stack[-1]
+                check_range(argument, from_index, to_index)
+                stack[-1] = iter(range(from_index, to_index))
+            elif opcode == Opcode.POP_TOP:
+                pop()
+            elif opcode == Opcode.LOAD_DATA:
+                if argument.rows is None:
+                    stack[-1] = load_data(argument, stack[-1])
+                else:
+                    columns = pop()
+                    rows = pop()
+                    stack[-1] = load_data(argument, stack[-1], rows, columns)
+            elif opcode == Opcode.SAVE_DATA:
+                path = pop()
+                save_data(argument, pop(), path)
+            elif opcode == Opcode.PRINT:
+                self.output.write(pop())
+            elif opcode == Opcode.RETURN_VALUE:
+                return pop()
+            elif opcode == Opcode.RUN_KERNEL:
+                node, target = argument
+                to_index = stack[-1]
+                from_index = stack[-2]
+                check_range(node.loop, from_index, to_index)
+                if node.kernel(self.frame, from_index, to_index):
+                    del stack[-2:]
+                    pc = target
@@ -0,0 +1,147 @@
+"""
+Runs many programs in one process, so they share the loaded lexer and parser tables and NumPy.
+Every program gets a fresh type checker and engine, and its output is collected separately and
+printed under its file name once all programs have run, followed by a timing summary on stderr.
+
+With --jobs, the programs are spread over a pool of worker processes, each loading the tables once
+and running many programs; results still come back in the order the programs were given. Runtime
+errors, even ones the engines do not report, end only the program that raised them, and come back
+with its result.
+
+Paths may name files, directories (all .txt files in them) or glob patterns.
+
+Usage: python -m src.core.batch [--engine ENGINE] [-O] [--cache-dir DIR] [--jobs N] PATH [PATH ...]
+"""
+import os
+import io
+import sys
+import glob
+import time
+import argparse
+import contextlib
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+from dataclasses import dataclass
+from src.core import main
+from src.core.cache import ASTCache
+from src.interpreter.exceptions import ProgramRuntimeError
+
+
+@dataclass
+class ScriptResult:
+    filename: str
+    status: str  # "ok", "cannot open", "syntax error", "type error" or "runtime error"
+    output: str
+    time: float  # seconds spent on parsing, type checking and execution
+    cached: bool = False  # the type checked AST came from the cache
+    error: Optional[Exception] = None  # the runtime error that stopped the program
+    value: Any = None  # the value returned by the program
+
+
+def expand(paths):
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(glob.glob(os.path.join(path, "*.txt"))))
+        elif glob.has_magic(path):
+            filenames.extend(sorted(glob.glob(path)))
+        else:
+            filenames.append(path)
+
+    return filenames
+
+
+def run_script(filename, engine="interpreter", optimize=False, cache=None):
+    try:
+        with open(filename, "r") as file:
+            text = file.read()
+    except IOError:
+        return ScriptResult(filename, "cannot open", "", 0.0)
+
+    return run_source(text, filename, engine, optimize, cache)
+
+
+def run_source(text, filename="<source>", engine="interpreter", optimize=False, cache=None):
+    hits = cache.hits if cache else 0
+    runtime_error = None
+    value = None
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            correct, value = main.run(text, engine, optimize, cache, print_tree=False)
+            status = "ok" if correct else "type error"
+        except SyntaxError as error:
+            print(error.msg)
+            status = "syntax error"
+        except ProgramRuntimeError as error:
+            print(error)
+            status = "runtime error"
+            runtime_error = error
+        except Exception as error:  # a failure not reported by the engines, it ends only this program
+            print(f"Runtime error: {type(error).__name__}: {error}")
+            status = "runtime error"
+            runtime_error = error
+
+    elapsed = time.perf_counter() - start
+
+    cached = cache is not None and cache.hits > hits
+
+    return ScriptResult(filename, status, output.getvalue(), elapsed, cached, runtime_error, value)
+
+
+def run_batch(filenames, engine="interpreter", optimize=False, cache=None, jobs=1):
+    """
+    Runs the programs in order, or on `jobs` worker processes, and returns their results in order.
+    """
+    if jobs == 1:
+        return [run_script(filename, engine, optimize, cache) for filename in filenames]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(functools.partial(run_script, engine=engine, optimize=optimize, cache=cache),
+                                 filenames))
+
+
+def print_results(results, file=None):
+    file = file if file is not None else sys.stdout
+    for result in results:
+        print(f"==> {result.filename} <==", file=file)
+        print(result.output, end="", file=file)
+
+
+def print_summary(results, file=None):
+    file = file if file is not None else sys.stderr
+    width = max([len(result.filename) for result in results] + [len("total")])
+    for result in results:
+        print(f"{result.filename:{width}}  {result.status:13}  {result.time * 1000:10.2f} ms", file=file)
+    print(f"{'total':{width}}  {len(results):<13}  {sum(result.time for result in results) * 1000:10.2f} ms",
+          file=file)
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("paths", nargs="+", help="program files, directories or glob patterns")
+    argument_parser.add_argument("--engine", choices=main.engines.keys(), default="interpreter",
+                                 help="execution engine used to run the programs")
+    argument_parser.add_argument("-O", "--optimize", action="store_true",
+                                 help="run optimization passes before execution")
+    argument_parser.add_argument("--cache-dir", default=os.environ.get("COMPILER_CACHE_DIR"),
+                                 help="directory caching type checked ASTs of unchanged programs")
+    argument_parser.add_argument("-j", "--jobs", type=int, default=1,
+                                 help="number of worker processes running the programs")
+
+    return argument_parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    cache = ASTCache(arguments.cache_dir) if arguments.cache_dir else None
+
+    results = run_batch(expand(arguments.paths), arguments.engine, arguments.optimize, cache, arguments.jobs)
+    print_results(results)
+    print_summary(results)
+
+    if cache:
+        hits = sum(result.cached for result in results)
+        print(f"cache hits: {hits}, misses: {len(results) - hits}", file=sys.stderr)
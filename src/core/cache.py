@@ -0,0 +1,134 @@
+"""
+On-disk cache of parsed and type checked ASTs.
+
+An entry holds the pickled AST of a program that type checked correctly, with the types and sizes
+filled in by the TypeChecker, so an unchanged program goes straight to optimization and execution.
+Entries are keyed by a hash of the program text and of the version of the front end, which covers
+the scanner, the parser, the AST classes and every module of the type checker, whose sizes and
+flags end up in the pickled ASTs: changing any of them invalidates the whole cache, since their
+entries are never looked up again and age out.
+
+Programs with type errors are never cached, as the type checker has to report them on every run,
+and neither are programs loading data files, whose types depend on the files' headers.
+"""
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+from src.ast.ast import Load
+from src.optimizer.transformer import walk
+
+source_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+front_end_files = ["scanner/scanner.py", "parser/parser.py", "ast/ast.py"] + \
+                  sorted(os.path.relpath(path, source_directory)
+                         for path in glob.glob(os.path.join(source_directory, "type_checker", "*.py")))
+
+
+def front_end_version():
+    digest = hashlib.sha256()
+    for name in front_end_files:
+        with open(os.path.join(source_directory, name), "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+class ASTCache:
+    """
+    Cache directory with entries named after their keys. The least recently used entries are evicted
+    once the directory grows over `max_size` bytes, and entries unused for `max_age` seconds are
+    evicted as well.
+    """
+    suffix = ".ast"
+
+    def __init__(self, directory, max_size=64 * 2 ** 20, max_age=7 * 24 * 60 * 60):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self.version = front_end_version()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, text):
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def path(self, text):
+        return os.path.join(self.directory, self.key(text) + self.suffix)
+
+    def load(self, text):
+        """
+        Returns the type checked AST of `text`, or None when it is not cached.
+        """
+        path = self.path(text)
+        try:
+            with open(path, "rb") as file:
+                ast = pickle.load(file)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return ast
+
+    def store(self, text, ast):
+        """
+        Writes the type checked AST of `text`, replacing the entry atomically, and evicts old entries.
+        """
+        if any(isinstance(node, Load) for node in walk(ast)):
+            return
+
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, 10000))
+        try:
+            data = pickle.dumps(ast, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary, self.path(text))
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                try:
+                    status = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, name))
+
+        entries.sort(reverse=True)
+        now = time.time()
+        total_size = 0
+        for modified, size, name in entries:
+            total_size += size
+            if total_size > self.max_size or now - modified > self.max_age:
+                self.remove(name)
+
+    def remove(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+            self.evicted += 1
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                self.remove(name)
+
+    def report(self):
+        return f"cache hits: {self.hits}, misses: {self.misses}, evicted: {self.evicted}"
@@ -0,0 +1,94 @@
+"""
+Client of the program server (src/core/server.py).
+
+Runs every given file on the server, printing its output and the returned value, or prints
+the server's latency metrics.
+
+Usage: python -m src.core.client (--socket PATH | --port N) [--engine ENGINE] [-O] [--metrics] [FILE ...]
+"""
+import sys
+import json
+import socket
+import argparse
+from src.core import main
+
+
+class Client:
+    """
+    Connection to the server, sending requests one at a time.
+    """
+
+    def __init__(self, socket_path=None, port=None, host="127.0.0.1"):
+        if socket_path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(socket_path)
+        else:
+            self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile("rb")
+
+    def request(self, request):
+        self.socket.sendall(json.dumps(request).encode() + b"\n")
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+
+        return json.loads(line)
+
+    def run(self, source, engine=None, optimize=None):
+        request = {"source": source}
+        if engine is not None:
+            request["engine"] = engine
+        if optimize is not None:
+            request["optimize"] = optimize
+
+        return self.request(request)
+
+    def metrics(self):
+        return self.request({"command": "metrics"})
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser()
+    address = argument_parser.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", help="path of the server's Unix domain socket")
+    address.add_argument("--port", type=int, help="server's TCP port")
+    argument_parser.add_argument("--host", default="127.0.0.1")
+    argument_parser.add_argument("--engine", choices=main.engines.keys(), default=None,
+                                 help="execution engine, the server's default if not given")
+    argument_parser.add_argument("-O", "--optimize", action="store_true", default=None,
+                                 help="run optimization passes before execution")
+    argument_parser.add_argument("--metrics", action="store_true", help="print the server's latency metrics")
+    argument_parser.add_argument("files", nargs="*")
+
+    return argument_parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+
+    with Client(arguments.socket, arguments.port, arguments.host) as client:
+        for filename in arguments.files:
+            try:
+                with open(filename, "r") as file:
+                    text = file.read()
+            except IOError:
+                print("Cannot open {0} file".format(filename))
+                continue
+
+            response = client.run(text, arguments.engine, arguments.optimize)
+            print(response.get("output", response.get("message", "")), end="")
+            if response.get("value") is not None:
+                print(f"returned: {response['value']}", file=sys.stderr)
+
+        if arguments.metrics:
+            print(json.dumps(client.metrics(), indent=2))
@@ -1,32 +1,139 @@
+import os
 import sys
+import ast as literals
+import argparse
 from src.scanner import scanner
 from src.parser import parser
 from src.type_checker.node_visitor import TypeChecker
+from src.type_checker.resolver import Resolver
 from src.interpreter.interpreter import Interpreter
+from src.compiler.closure_compiler import ClosureCompiler
+from src.compiler.virtual_machine import VirtualMachine
+from src.optimizer.optimizer import Optimizer
+from src.core.cache import ASTCache
+from src.interpreter.exceptions import ProgramRuntimeError
+from src.interpreter.output import sinks
+from src.interpreter.profiler import Profiler, ProfilingInterpreter
+
+engines = {
+    "interpreter": Interpreter,
+    "closure": ClosureCompiler,
+    "vm": VirtualMachine,
+}
+
+
+def print_option(text):
+    name, _, value = text.partition("=")
+    try:
+        return name, literals.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("filename", nargs="?", default="examples/interpreter_example_2.txt")
+    # argument_parser.add_argument("filename", nargs="?", default="examples/work_example_2.txt")
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter",
+                                 help="execution engine used to run the program")
+    argument_parser.add_argument("-O", "--optimize", action="store_true",
+                                 help="run optimization passes before execution")
+    argument_parser.add_argument("--optimizer-report", action="store_true",
+                                 help="print what the optimization passes changed to stderr")
+    argument_parser.add_argument("--cache-dir", default=os.environ.get("COMPILER_CACHE_DIR"),
+                                 help="directory caching type checked ASTs of unchanged programs")
+    argument_parser.add_argument("--cache-stats", action="store_true",
+                                 help="print cache hits and misses to stderr")
+    argument_parser.add_argument("--output", choices=sinks.keys(), default="text",
+                                 help="format of printed values: text lines, JSON lines or .npy arrays")
+    argument_parser.add_argument("--print-option", type=print_option, action="append", default=[],
+                                 metavar="NAME=VALUE", help="NumPy print option used for vectors and matrices, "
+                                                            "e.g. precision=3")
+    argument_parser.add_argument("--check-stats", action="store_true",
+                                 help="print the number of runtime checks skipped thanks to static types to stderr")
+    argument_parser.add_argument("--profile", action="store_true",
+                                 help="print the nodes taking the most time to stderr (interpreter only)")
+    argument_parser.add_argument("--profile-listing", action="store_true",
+                                 help="with --profile, print the program with the time spent on every line as well")
+
+    return argument_parser.parse_args()
+
+
+def run(text, engine="interpreter", optimize=False, cache=None, print_tree=True, optimizer_report=False,
+        output=None, profiler=None, check_stats=False):
+    """
+    Parses, type checks and executes program `text`, printing its output (to the `output` sink if given).
+    With a `profiler`, the program is run by the profiling interpreter, whatever the engine.
+    With `check_stats`, the number of runtime checks the interpreter skipped is printed to stderr.
+    Returns whether the program type checked and the value it returned (None without a return statement).
+    Syntax errors are raised as SyntaxError and runtime errors as ProgramRuntimeError.
+    """
+    ast = cache.load(text) if cache else None
+    cached = ast is not None
+
+    if not cached:
+        scanner.lexer.lineno = 1
+        ast = parser.parser.parse(text, lexer=scanner.lexer)
+
+    if print_tree:
+        ast.print_tree()
+
+    if not cached:
+        typeChecker = TypeChecker()
+        typeChecker.visit(ast)
+
+        if not typeChecker.correct:
+            return False, None
+        if cache:
+            cache.store(text, ast)
+
+    if optimize:
+        optimizer = Optimizer()
+        ast = optimizer.optimize(ast)
+        if optimizer_report:
+            print(optimizer.report(), file=sys.stderr)
+
+    Resolver().visit(ast)
+    if profiler is not None:
+        engine = ProfilingInterpreter(output=output, profiler=profiler)
+    else:
+        engine = engines[engine](output=output)
+    value = engine.run(ast)
+
+    if check_stats and hasattr(engine, "skipped_checks"):
+        print(f"runtime checks skipped: {engine.skipped_checks}", file=sys.stderr)
+
+    return True, value
+
 
 if __name__ == '__main__':
+    arguments = parse_arguments()
 
     try:
-        filename = sys.argv[1] if len(sys.argv) > 1 else "examples/interpreter_example_2.txt"
-        # filename = sys.argv[1] if len(sys.argv) > 1 else "examples/work_example_2.txt"
+        filename = arguments.filename
         file = open(filename, "r")
     except IOError:
         print("Cannot open {0} file".format(filename))
         sys.exit(0)
 
-    parser = parser.parser
     text = file.read()
 
-    try:
-        ast = parser.parse(text, lexer=scanner.lexer)
-        ast.print_tree()
-
-        typeChecker = TypeChecker()
-        typeChecker.visit(ast)
-
-        if typeChecker.correct:
-            interpreter = Interpreter()
-            interpreter.visit(ast)
+    cache = ASTCache(arguments.cache_dir) if arguments.cache_dir else None
+    profiler = Profiler() if arguments.profile else None
 
+    try:
+        output = sinks[arguments.output](print_options=dict(arguments.print_option))
+        run(text, arguments.engine, arguments.optimize, cache, optimizer_report=arguments.optimizer_report,
+            output=output, profiler=profiler, check_stats=arguments.check_stats)
     except SyntaxError as error:
         print(error.msg)
+    except ProgramRuntimeError as error:
+        print(error)
+
+    if profiler:
+        print(profiler.report(), file=sys.stderr)
+        if arguments.profile_listing:
+            print(profiler.listing(text), file=sys.stderr)
+
+    if cache and arguments.cache_stats:
+        print(cache.report(), file=sys.stderr)
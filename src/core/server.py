@@ -0,0 +1,231 @@
+"""
+Long-running server executing programs sent over a Unix domain socket or a localhost TCP port,
+so the lexer and parser tables and NumPy are loaded once instead of on every run.
+
+Programs run on a pool of worker processes, which bounds how many run at the same time and keeps
+a failing program from affecting the server. Every connection may send any number of requests.
+
+Protocol: each request and each response is one JSON object on its own line.
+    {"source": "x = 1; return x;", "engine": "vm", "optimize": false}
+        -> {"status": "ok", "output": "...", "value": 1, "time": 0.0004, "latency": 0.0011}
+    {"command": "metrics"}
+        -> {"requests": 10, "errors": 0, "mean": 0.0011, "p50": 0.001, "p90": ..., "p99": ..., "max": ...}
+
+"status" is "ok", "syntax error", "type error" or "runtime error", the latter with an "error" object
+holding the kind, message and position of the runtime error. "value" is the value returned by the
+program, "time" the time spent running it and "latency" the time the server spent on the request.
+
+Usage: python -m src.core.server (--socket PATH | --port N) [--workers N] [--engine ENGINE] [-O]
+                                 [--cache-dir DIR]
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import collections
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from src.core import main
+from src.core.batch import run_source
+from src.core.cache import ASTCache
+
+
+def to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, range):
+        return list(value)
+
+    return value
+
+
+def encode(result):
+    response = {"status": result.status, "output": result.output, "value": to_json(result.value),
+                "time": result.time}
+    if result.error is not None:
+        response["error"] = encode_error(result.error)
+
+    return response
+
+
+def encode_error(error):
+    return {"kind": type(error).__name__, "message": getattr(error, "message", str(error)),
+            "position": getattr(error, "position", None)}
+
+
+class Metrics:
+    """
+    Counts requests and keeps the latencies of the most recent ones, from which percentiles are computed.
+    Updated by all connection threads.
+    """
+
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.latencies = collections.deque(maxlen=window)
+
+    def record(self, latency, error):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.latencies.append(latency)
+
+    def report(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            report = {"requests": self.requests, "errors": self.errors}
+
+        if latencies:
+            report["mean"] = sum(latencies) / len(latencies)
+            for percentile in (50, 90, 99):
+                report[f"p{percentile}"] = latencies[min(len(latencies) - 1, len(latencies) * percentile // 100)]
+            report["max"] = latencies[-1]
+
+        return report
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            start = time.perf_counter()
+            response = self.server.respond(line)
+            if "status" in response:
+                latency = time.perf_counter() - start
+                response["latency"] = latency
+                self.server.metrics.record(latency, response["status"] != "ok")
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class ProgramServer:
+    """
+    Mixin for socketserver servers handling connections in threads, which hand the programs to
+    a pool of `workers` processes. A pool whose worker died (e.g. killed by the OOM killer) cannot run
+    anything anymore, so it is replaced by a new one.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    executor = None
+
+    def start_workers(self, workers, engine, optimize, cache_dir):
+        self.engine = engine
+        self.optimize = optimize
+        self.cache = ASTCache(cache_dir) if cache_dir else None
+        self.metrics = Metrics()
+        self.workers = workers
+        self.executor_lock = threading.Lock()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+        # starts the workers, so the first requests do not wait for them
+        list(self.executor.map(run_source, [""] * workers))
+
+    def respond(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request should be an object")
+
+            if request.get("command") == "metrics":
+                return self.metrics.report()
+
+            source = request.get("source")
+            engine = request.get("engine", self.engine)
+            if not isinstance(source, str):
+                raise ValueError("request should have a source")
+            if engine not in main.engines:
+                raise ValueError(f"unknown engine {engine}")
+        except ValueError as error:
+            return {"status": "bad request", "message": str(error)}
+
+        executor = self.executor
+        try:
+            future = executor.submit(run_source, source, "<request>", engine,
+                                     bool(request.get("optimize", self.optimize)), self.cache)
+            return encode(future.result())
+        except Exception as error:  # e.g. a worker killed while running the program
+            if isinstance(error, BrokenProcessPool):
+                self.restart_workers(executor)
+            return {"status": "runtime error", "output": "", "error": encode_error(error)}
+
+    def restart_workers(self, broken):
+        """Replaces the broken pool, unless another connection thread has already done it."""
+        with self.executor_lock:
+            if self.executor is not broken:
+                return
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        broken.shutdown(wait=False)
+
+    def server_close(self):
+        super().server_close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class UnixProgramServer(ProgramServer, socketserver.ThreadingUnixStreamServer):
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class TCPProgramServer(ProgramServer, socketserver.ThreadingTCPServer):
+    pass
+
+
+def create_server(socket_path=None, port=None, host="127.0.0.1", workers=os.cpu_count() or 1,
+                  engine="interpreter", optimize=False, cache_dir=None):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixProgramServer(socket_path, RequestHandler)
+    else:
+        server = TCPProgramServer((host, port), RequestHandler)
+
+    server.start_workers(workers, engine, optimize, cache_dir)
+    return server
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser()
+    address = argument_parser.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", help="path of the Unix domain socket to listen on")
+    address.add_argument("--port", type=int, help="localhost TCP port to listen on")
+    argument_parser.add_argument("--host", default="127.0.0.1", help="address to listen on with --port")
+    argument_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                                 help="maximum number of programs running at the same time")
+    argument_parser.add_argument("--engine", choices=main.engines.keys(), default="interpreter",
+                                 help="execution engine used when a request does not choose one")
+    argument_parser.add_argument("-O", "--optimize", action="store_true",
+                                 help="run optimization passes when a request does not choose")
+    argument_parser.add_argument("--cache-dir", default=os.environ.get("COMPILER_CACHE_DIR"),
+                                 help="directory caching type checked ASTs of unchanged programs")
+
+    return argument_parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    server = create_server(arguments.socket, arguments.port, arguments.host, arguments.workers,
+                           arguments.engine, arguments.optimize, arguments.cache_dir)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    print(f"listening on {arguments.socket or f'{arguments.host}:{arguments.port}'}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,164 @@
+"""
+Sessions running a program piece by piece, like an interactive shell: each piece is type checked
+against the variables of the previous ones and runs in the same frame, so matrices built by one
+piece are used by the next without being rebuilt.
+
+Without arguments an interactive prompt is started; the given files are run first, which sets up
+the variables used afterwards. A piece ending with `return expression;` prints the expression.
+
+Programs embedded in Python may bind arrays of the host as variables with `Session.bind`, e.g.
+NumPy memory-mapped files too large to load, which element-wise operations process out of core.
+
+Usage: python -m src.core.session [--engine ENGINE] [-O] [FILE ...]
+"""
+import sys
+import copy
+import argparse
+import numpy as np
+from src.scanner import scanner
+from src.parser import parser
+from src.core.main import engines
+from src.type_checker.node_visitor import TypeChecker, assigned_names, assigned_after_return
+from src.type_checker.variables_types import Type
+from src.type_checker.resolver import Resolver
+from src.interpreter.memory import Frame
+from src.interpreter.exceptions import ProgramRuntimeError
+from src.optimizer.optimizer import Optimizer
+
+
+class Session:
+    """
+    Type checker, slots and frame shared by all pieces of a program run with `run`.
+    """
+
+    def __init__(self, engine="interpreter", optimize=False, output=None):
+        self.engine = engine
+        self.optimize = optimize
+        self.output = output
+        self.type_checker = TypeChecker(incremental=True)
+        self.resolver = Resolver()
+        self.frame = Frame()
+
+    def bind(self, name, value):
+        """
+        Makes `value`, a number or a NumPy vector or matrix, the value of variable `name` in the next pieces.
+        Arrays are bound as they are, without a copy, so a `np.memmap` stays mapped to its file.
+        """
+        value_type = Type.get_type(value)
+        if value_type not in {Type.INTNUM, Type.FLOAT, Type.VECTOR, Type.MATRIX} or isinstance(value, list):
+            raise TypeError(f"cannot bind {type(value).__name__} to variable {name}")
+        if isinstance(value, np.ndarray) and value.ndim > 2:
+            raise TypeError(f"cannot bind {value.ndim}-dimensional array to variable {name}")
+
+        if not self.type_checker.symbol_table.scopes:
+            self.type_checker.symbol_table.push_scope("program")
+        self.type_checker._put_symbol(name, value_type, value.shape[0] if value_type == Type.VECTOR else
+                                      getattr(value, "shape", None), int(value) if value_type == Type.INTNUM else None)
+
+        slot = self.resolver.slot(name)
+        self.frame.resize(slot + 1)
+        self.frame.set(slot, value)
+
+    def run(self, text):
+        """
+        Parses, type checks and executes the next piece `text`, printing its output.
+        Returns whether the piece type checked and the value it returned (None without a return statement).
+        A piece with type errors is not run and does not change the variables. Syntax errors are raised as
+        SyntaxError and runtime errors as ProgramRuntimeError; the statements before a runtime error keep
+        their effects, and the variables the piece assigns are no longer known to the type checker, as the
+        error may have left them with other types, sizes and values than checked. The same goes for variables
+        assigned after a return statement, which may have ended the piece before assigning them.
+        """
+        scanner.lexer.lineno = 1
+        ast = parser.parser.parse(text, lexer=scanner.lexer)
+
+        symbol_table = copy.deepcopy(self.type_checker.symbol_table)
+        self.type_checker.correct = True
+        self.type_checker.visit(ast)
+        if not self.type_checker.correct:
+            self.type_checker.symbol_table = symbol_table
+            return False, None
+
+        names = assigned_names(ast)
+        skipped_names = assigned_after_return(ast)
+        if self.optimize:
+            ast = Optimizer().optimize(ast)
+
+        self.resolver.visit(ast)
+        try:
+            value = engines[self.engine](self.frame, self.output).run(ast)
+            for name in skipped_names:
+                self.type_checker._put_symbol(name, Type.UNKNOWN)
+            return True, value
+        except ProgramRuntimeError:
+            self.type_checker.symbol_table = symbol_table
+            for name in names:
+                self.type_checker._put_symbol(name, Type.UNKNOWN)
+            raise
+        finally:
+            while len(self.frame.scopes) > 1:  # left by a runtime error inside a block
+                self.frame.pop()
+
+
+def complete(text):
+    return text.count("{") <= text.count("}") and text.rstrip().endswith((";", "}"))
+
+
+def interact(session):
+    prompts = sys.stdin.isatty()
+    text = ""
+    while True:
+        try:
+            line = input(("... " if text else ">>> ") if prompts else "")
+        except EOFError:
+            if prompts:
+                print()
+            return
+        except KeyboardInterrupt:
+            print()
+            text = ""
+            continue
+
+        text += line + "\n"
+        if not complete(text):
+            continue
+
+        execute(session, text)
+        text = ""
+
+
+def execute(session, text):
+    try:
+        _, value = session.run(text)
+        if value is not None:
+            print(value)
+    except SyntaxError as error:
+        print(error.msg)
+    except ProgramRuntimeError as error:
+        print(error)
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("files", nargs="*", help="programs run before the prompt starts")
+    argument_parser.add_argument("--engine", choices=engines.keys(), default="interpreter",
+                                 help="execution engine used to run the program")
+    argument_parser.add_argument("-O", "--optimize", action="store_true",
+                                 help="run optimization passes before execution")
+
+    return argument_parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    session = Session(arguments.engine, arguments.optimize)
+
+    for filename in arguments.files:
+        try:
+            with open(filename, "r") as file:
+                execute(session, file.read())
+        except IOError:
+            print("Cannot open {0} file".format(filename))
+            sys.exit(0)
+
+    interact(session)
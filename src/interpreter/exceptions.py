@@ -11,3 +11,46 @@ class BreakException(Exception):
 
 class ContinueException(Exception):
     pass
+
+
+class ProgramRuntimeError(RuntimeError):
+    """
+    Error raised by a running program, carrying the position of the node that caused it.
+    Propagates out of the engines' run() to the embedding host.
+    """
+
+    def __init__(self, message, position):
+        super().__init__(message, position)
+        self.message = message
+        self.position = position
+
+    def __str__(self):
+        return f"Runtime error: {self.message}, {self.position}"
+
+
+class UninitializedVariableError(ProgramRuntimeError):
+    pass
+
+
+class OperandTypeError(ProgramRuntimeError):  # operands or elements of types the operation does not accept
+    pass
+
+
+class ShapeMismatchError(ProgramRuntimeError):  # incompatible sizes of vectors and matrices
+    pass
+
+
+class IndexOutOfBoundsError(ProgramRuntimeError):
+    pass
+
+
+class ArithmeticOperationError(ProgramRuntimeError):  # division by zero or a number too large
+    pass
+
+
+class MatrixSizeError(ProgramRuntimeError):  # size of a new matrix which is negative or too large to allocate
+    pass
+
+
+class DataFileError(ProgramRuntimeError):  # data file that cannot be read or written
+    pass
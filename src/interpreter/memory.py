@@ -1,54 +1,31 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from typing import List, Tuple, Any
 
 
 @dataclass
-class Memory:
-    name: str
-    symbols: Dict[str, Any] = field(default_factory=dict)
+class Frame:
+    values: List[Any] = field(default_factory=list)  # slot -> current value, `None` if uninitialized
+    scopes: List[Tuple[str, List[int]]] = field(default_factory=lambda: [('global', [])])
 
-    def __contains__(self, item):  # variable name
-        return item in self.symbols
+    def get(self, slot):               # gets current value of variable in <slot>
+        return self.values[slot]
 
-    def get(self, name):         # gets from memory current value of variable <name>
-        return self.symbols[name]
+    def set(self, slot, value):        # sets variable in <slot>, creating it in the current scope if needed
+        if self.values[slot] is None:
+            self.scopes[-1][1].append(slot)
 
-    def put(self, name, value):  # puts into memory current value of variable <name>
-        self.symbols[name] = value
+        self.values[slot] = value
 
+    def push(self, name):              # creates new scope
+        self.scopes.append((name, []))
 
-@dataclass
-class MemoryStack:
-    stack: List[Memory] = field(default_factory=lambda: [Memory('global')])
-
-    def __contains__(self, item):
-        return self._find(item) is not None
-
-    def get(self, name):             # gets from memory stack current value of variable <name>
-        memory = self._find(name)
-        if memory:
-            return memory.get(name)
-        else:
-            return None
-
-    def set(self, name, value):  # inserts into memory stack variable <name> with value <value>
-        memory: Memory = self._find(name)
-        if not memory:
-            memory = self.stack[-1]
-
-        memory.put(name, value)
-
-    def push(self, name):  # creates new memory and pushes it onto the stack
-        self.stack.append(Memory(name=name))
-
-    def pop(self):          # pops the top memory from the stack
-        self.stack.pop()
+    def pop(self):                     # pops the top scope and forgets variables created in it
+        _, slots = self.scopes.pop()
+        for slot in slots:
+            self.values[slot] = None
 
     def get_memory_name(self):
-        return self.stack[-1].name
+        return self.scopes[-1][0]
 
-    def _find(self, name):  # finds first <memory> containing <name>
-        for mem in self.stack[::-1]:
-            if name in mem:
-                return mem
-        return None
+    def resize(self, size):            # makes room for <size> slots
+        self.values.extend([None] * (size - len(self.values)))
@@ -0,0 +1,607 @@
+from src.ast.ast import *
+from src.type_checker.variables_types import Type
+from src.type_checker.node_visitor import valid_operations
+from src.interpreter.exceptions import UninitializedVariableError, OperandTypeError, ShapeMismatchError, \
+    IndexOutOfBoundsError, DataFileError, ArithmeticOperationError, MatrixSizeError
+from functools import reduce, partial
+import numpy as np
+import operator
+import tempfile
+import os
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+fused_block_size = 2 ** 16  # elements of one block of fused element-wise evaluation
+
+# Element-wise results of at least `out_of_core_size` bytes computed from memory-mapped operands
+# are written to a memory-mapped temporary file in `out_of_core_directory` (the system default when
+# None), `out_of_core_block_size` elements at a time, so they never have to fit in memory.
+out_of_core_size = 2 ** 26
+out_of_core_block_size = 2 ** 20
+out_of_core_directory = None
+
+
+operators = {"+": operator.add,
+             "-": operator.sub,
+             "/": operator.truediv,
+             "*": operator.mul,
+             ".+": operator.add,
+             ".-": operator.sub,
+             "./": operator.truediv,
+             ".*": operator.mul
+             }
+
+# binary operator applied by a compound assignment, `+=` and `-=` are element-wise on arrays
+compound_operators = {"+=": "+",
+                      "-=": "-",
+                      "*=": "*",
+                      "/=": "/",
+                      ".+=": ".+",
+                      ".-=": ".-",
+                      ".*=": ".*",
+                      "./=": "./"
+                      }
+
+# element-wise operators which can write the result into the target array
+inplace_operators = {".+": np.add,
+                     ".-": np.subtract,
+                     ".*": np.multiply,
+                     "./": np.divide
+                     }
+comparison_operators = {"==": operator.eq,
+                        "!=": operator.ne,
+                        "<": operator.lt,
+                        "<=": operator.le,
+                        ">": operator.gt,
+                        ">=": operator.ge
+                        }
+
+
+def make_operation_table():
+    """
+    Returns valid binary operations keyed by (left type, right type, operator), with the functions applying
+    them, so operands are checked and the function is found with a single lookup. Multiplication of matrices
+    maps straight to the matrix product, without classifying the operands again.
+    """
+    functions = {**operators, **comparison_operators}
+    table = {}
+    for types, bin_operators in valid_operations.items():
+        if isinstance(types, tuple):
+            for bin_operator in bin_operators:
+                table[types + (bin_operator,)] = functions[bin_operator]
+    table[Type.MATRIX, Type.MATRIX, "*"] = operator.matmul
+
+    return table
+
+
+operation_table = make_operation_table()
+negated_types = {value_type for value_type, bin_operators in valid_operations.items()
+                 if isinstance(value_type, Type) and "-" in bin_operators}
+
+
+def bind_operation(node):
+    """
+    Binds the function applying a statically verified `BinExpr` or `CompareExpr` to its `operation`,
+    so engines call it without checking the operands and looking it up on every evaluation.
+    Integers and floats share their functions, so the static types are exact enough for numbers too.
+    Division can still fail on its values, so it is bound together with the node reporting the error.
+    """
+    operation = operation_table.get((node.left.type, node.right.type, node.operator)) if node.verified else None
+    node.operation = partial(divide, node) if operation is operator.truediv else operation
+
+
+def divide(node: BinExpr, left, right):
+    try:
+        return left / right
+    except ArithmeticError as exception:
+        error(str(exception), node, ArithmeticOperationError)
+
+
+# Runtime semantics shared by every execution engine. Each function receives the node
+# (for error positions) together with already evaluated operands.
+
+def expression_value(node: Expression, value):
+    if value is None and isinstance(node.expression, SliceOrID):
+        error(f"Uninitialized variable `{node.expression.slice_or_id}`", node.expression, UninitializedVariableError)
+
+    return value
+
+
+def make_vector(node: Vector, vector):
+    if len(vector) != 0:
+        vector_type = Type.get_type(vector[0])
+        for element in vector:
+            if Type.get_type(element) != vector_type:
+                error(f"vector elements should be of the same type. " +
+                      f"Found types: {vector_type} and {Type.get_type(element)}", node)
+
+        # vector is a matrix
+        if vector_type == Type.VECTOR:
+            for row in vector:
+                if type(row) is list:
+                    error(f"cannot make matrix with strings", node)
+
+            row_size = vector[0].shape
+            row_type = None
+
+            for row in vector:
+                if row.shape != row_size:
+                    error("matrix has rows with different sizes", node, ShapeMismatchError)
+
+                if row.shape[0] != 0 and row_type is None:
+                    row_type = Type.get_type(row[0])
+                elif row_type is not None and Type.get_type(row[0]) != row_type:
+                    error(f"matrix elements should be of the same type. " +
+                          f"Found types: {row_type} and {Type.get_type(row[0])}", node)
+
+    # matrix
+    if reduce(lambda x, y: x and isinstance(y, np.ndarray), vector, True):
+        return np.stack(vector)
+    # vector
+    elif reduce(lambda x, y: x and isinstance(y, (int, float, np.number)), vector, True):
+        return np.array(vector)
+    # list of strings
+    else:
+        return vector
+
+
+def make_matrix(node: Matrix, size):
+    matrix_type = node.matrix_type.lower()
+
+    if Type.get_type(size) != Type.INTNUM:
+        error(f"size of '{matrix_type}' matrix should be an integer. Found: {Type.get_type(size)}", node)
+    if size < 0:
+        error(f"size of '{matrix_type}' matrix should not be negative. Found: {size}", node, MatrixSizeError)
+
+    if matrix_type == "eye":
+        shape = size
+    else:
+        shape = (size, size)
+
+    try:
+        return {"ones": np.ones,
+                "zeros": np.zeros,
+                "eye": np.eye}[matrix_type](shape, dtype=float)
+    except (MemoryError, OverflowError, ValueError):  # e.g. more memory than available or elements than indexable
+        error(f"'{matrix_type}' matrix of size {size} is too large to allocate", node, MatrixSizeError)
+
+
+def load_data(node: Load, path, rows=None, columns=None):
+    """
+    Maps a data file into memory: a .npy file, or a raw file of float64 values read as a `rows` x `columns`
+    matrix or as a vector. The mapping is copy-on-write, so changing the matrix never changes the file.
+    """
+    if Type.get_type(path) != Type.STRING:
+        error(f"path of a data file should be a string. Found: {Type.get_type(path)}", node)
+    for dimension in (rows, columns):
+        if dimension is not None and Type.get_type(dimension) != Type.INTNUM:
+            error(f"size of a raw data file should be an integer. Found: {Type.get_type(dimension)}", node)
+
+    try:
+        if rows is not None:
+            data = np.memmap(path, dtype=np.float64, mode="c", shape=(rows, columns))
+        elif path.endswith(".npy"):
+            data = np.load(path, mmap_mode="c", allow_pickle=False)
+        else:
+            data = np.memmap(path, dtype=np.float64, mode="c")
+    except (OSError, ValueError) as exception:
+        error(f"cannot load `{path}`: {exception}", node, DataFileError)
+
+    if data.ndim not in {1, 2} or not np.issubdtype(data.dtype, np.number):
+        error(f"data file `{path}` should hold a vector or a matrix of numbers. Found {data.ndim} dimensions " +
+              f"of {data.dtype}", node, DataFileError)
+
+    return data
+
+
+def save_data(node: Save, value, path):
+    """
+    Writes a vector or a matrix to a .npy file, or as raw float64 values to any other file. The file is
+    replaced only once it is written completely, so a matrix mapped from it stays valid.
+    """
+    if Type.get_type(path) != Type.STRING:
+        error(f"path of a data file should be a string. Found: {Type.get_type(path)}", node)
+    if not isinstance(value, np.ndarray) or not np.issubdtype(value.dtype, np.number):
+        error(f"only vectors and matrices of numbers can be saved. Found: {Type.get_type(value)}", node)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            if path.endswith(".npy"):
+                np.save(file, value, allow_pickle=False)
+            else:
+                np.asarray(value, dtype=np.float64).tofile(file)
+        os.replace(temporary, path)
+    except OSError as exception:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        error(f"cannot save `{path}`: {exception}", node, DataFileError)
+
+
+def make_range(node: Range, from_index, to_index):
+    check_range(node, from_index, to_index)
+    return slice(from_index, to_index)
+
+
+def check_range(node, from_index, to_index):
+    range_types = (Type.get_type(from_index), Type.get_type(to_index))
+    if range_types[0] != Type.INTNUM or range_types[1] != Type.INTNUM:
+        error(f"Range should contain only integers. Found: {range_types[0]} and {range_types[1]}", node)
+
+
+def negate(node: UnaryMinus, value):
+    value_type = Type.get_type(value)
+
+    if value_type in negated_types:
+        return -value
+    else:
+        error(f"negation is possible only for numbers. Found: {value_type}", node.value)
+
+
+def binary_operation(node: BinExpr, left, right):
+    left_type, right_type = Type.get_type(left), Type.get_type(right)
+    function = operation_table.get((left_type, right_type, node.operator))
+    if function is None:
+        error(f"invalid types in binary expression. Left type: {left_type}, right type: {right_type}", node)
+
+    if function is operator.matmul and left.shape[1] != right.shape[0]:
+        error(f"incompatible matrices sizes in matrix multiplication. Found {left.shape} and {right.shape}",
+              node.right, ShapeMismatchError)
+
+    try:
+        return function(left, right)
+    except ArithmeticError as exception:  # division by zero, or an integer too large for a float
+        error(str(exception), node, ArithmeticOperationError)
+
+
+def matrix_binary_operation(node: MatrixBinExpr, left, right):
+    check_matrix_binary_operation(node, left, right)
+    return apply_matrix_binary_operation(node, left, right)
+
+
+def apply_matrix_binary_operation(node: MatrixBinExpr, left, right):
+    """Computes an element-wise operation whose operands are already checked."""
+    if isinstance(left, np.memmap) or isinstance(right, np.memmap):
+        operation = inplace_operators[node.operator]
+        dtype = operation.resolve_dtypes((left.dtype, right.dtype, None))[2]
+        if out_of_core(left.shape, dtype, (left, right)):
+            return _stream(operation, left, right, mapped_array(left.shape, dtype))
+
+    return operators[node.operator](left, right)
+
+
+def check_matrix_binary_operation(node: MatrixBinExpr, left, right):
+    left_type, right_type = Type.get_type(left), Type.get_type(right)
+    if (left_type, right_type, node.operator) not in operation_table:
+        error(f"matrix binary operations can be made only on matrices and vectors. Found {left_type} " +
+              f"and {right_type}", node)
+
+    if left.shape != right.shape:
+        error(f"incompatible sizes within operation: '{node.operator}'. Found: {left.shape} and {right.shape}, " +
+              "but they should be equal", node, ShapeMismatchError)
+
+
+def fused_operation(node: FusedExpr, evaluate):
+    """
+    Evaluates a tree of element-wise operations without full-size temporaries. Operands are
+    evaluated with `evaluate(index)` and checked in the original order, so errors are the same
+    as with separate evaluation of every operation.
+    """
+    operands = _check_program(node, evaluate)
+
+    if operands[0].size == 0:
+        return _evaluate_program(node, operands, lambda step, left, right: operators[step.operator](left, right))
+
+    dtypes = _resolve_dtypes(node, operands)
+    if out_of_core(operands[0].shape, dtypes[len(node.program) - 1], operands):
+        return _evaluate_blocked(node, operands, dtypes, mapped_array, out_of_core_block_size)
+
+    if numexpr is not None and all(operand.dtype == np.float64 for operand in operands):
+        return _evaluate_numexpr(node, operands)
+
+    return _evaluate_blocked(node, operands, dtypes)
+
+
+def element_wise_operation(node: FusedExpr, evaluate):
+    """
+    Evaluates a tree of element-wise operations like separate operations would, unless its result
+    goes out of core: then the tree is evaluated in blocks of rows into a memory-mapped result.
+    All operations are checked before any of them is computed.
+    """
+    operands = _check_program(node, evaluate)
+
+    if operands[0].size != 0:
+        dtypes = _resolve_dtypes(node, operands)
+        if out_of_core(operands[0].shape, dtypes[len(node.program) - 1], operands):
+            return _evaluate_blocked(node, operands, dtypes, mapped_array, out_of_core_block_size)
+
+    return _evaluate_program(node, operands, lambda step, left, right: operators[step.operator](left, right))
+
+
+def _check_program(node: FusedExpr, evaluate):
+    operands = []
+    stack = []
+    for step in node.program:
+        if type(step) is int:
+            operands.append(evaluate(step))
+            stack.append(operands[-1])
+        else:
+            right = stack.pop()
+            left = stack.pop()
+            if not step.verified:
+                check_matrix_binary_operation(step, left, right)
+            stack.append(left)  # element-wise result has the type and shape of its operands
+
+    return operands
+
+
+def out_of_core(shape, dtype, operands):
+    return (any(isinstance(operand, np.memmap) for operand in operands)
+            and int(np.prod(shape, dtype=np.int64)) * dtype.itemsize >= out_of_core_size)
+
+
+def mapped_array(shape, dtype):
+    """Returns an array mapped to an anonymous temporary file, removed once the array is freed."""
+    with tempfile.TemporaryFile(dir=out_of_core_directory) as file:
+        return np.memmap(file, dtype=dtype, mode="w+", shape=shape)
+
+
+def _block_rows(shape, block_size):
+    return min(shape[0], max(1, block_size // max(1, int(np.prod(shape[1:], dtype=np.int64)))))
+
+
+def _stream(operation, left, right, result):
+    rows = _block_rows(result.shape, out_of_core_block_size)
+    for start in range(0, result.shape[0], rows):
+        operation(left[start:start + rows], right[start:start + rows], out=result[start:start + rows])
+
+    return result
+
+
+def _evaluate_program(node: FusedExpr, operands, operation):
+    stack = []
+    for step in node.program:
+        if type(step) is int:
+            stack.append(operands[step])
+        else:
+            right = stack.pop()
+            stack.append(operation(step, stack.pop(), right))
+
+    return stack[0]
+
+
+def _evaluate_numexpr(node: FusedExpr, operands):
+    sources = []
+    for step in node.program:
+        if type(step) is int:
+            sources.append(f"a{step}")
+        else:
+            right = sources.pop()
+            sources.append(f"({sources.pop()} {step.operator[1]} {right})")
+
+    return numexpr.evaluate(sources[0], local_dict={f"a{index}": operand for index, operand in enumerate(operands)})
+
+
+def _resolve_dtypes(node: FusedExpr, operands):
+    """Returns dtypes of intermediate results, resolved the same way as for separate operations."""
+    dtypes = {}
+    stack = []
+    for index, step in enumerate(node.program):
+        if type(step) is int:
+            stack.append(operands[step].dtype)
+        else:
+            right = stack.pop()
+            dtypes[index] = inplace_operators[step.operator].resolve_dtypes((stack.pop(), right, None))[2]
+            stack.append(dtypes[index])
+
+    return dtypes
+
+
+def _evaluate_blocked(node: FusedExpr, operands, dtypes, allocate=np.empty, block_size=None):
+    """Evaluates blocks of rows one by one, keeping intermediate results in small reused buffers."""
+    shape = operands[0].shape
+    rows = _block_rows(shape, block_size or fused_block_size)
+    last = len(node.program) - 1
+
+    result = allocate(shape, dtypes[last])
+    scratch = {index: np.empty((rows,) + shape[1:], dtype=dtype) for index, dtype in dtypes.items() if index != last}
+
+    for start in range(0, shape[0], rows):
+        stop = min(start + rows, shape[0])
+        stack = []
+
+        for index, step in enumerate(node.program):
+            if type(step) is int:
+                stack.append(operands[step][start:stop])
+            else:
+                right = stack.pop()
+                out = result[start:stop] if index == last else scratch[index][:stop - start]
+                stack.append(inplace_operators[step.operator](stack.pop(), right, out=out))
+
+    return result
+
+
+class PendingProduct:
+    """Product of matrices whose multiplication order is not decided yet."""
+
+    def __init__(self, matrices):
+        self.matrices = matrices
+        self.shape = (matrices[0].shape[0], matrices[-1].shape[1])
+
+
+def matrix_chain(node: MatrixChain, evaluate):
+    """
+    Evaluates a tree of `*` operations. Products of matrices are multiplied in the cheapest order
+    once the whole chain is known, other operands as written. Operands are evaluated with
+    `evaluate(index)` and checked in the original order, so errors are the same as without reordering.
+    """
+    stack = []
+    for step in node.program:
+        if type(step) is int:
+            value = evaluate(step)
+            stack.append(PendingProduct([value]) if Type.get_type(value) == Type.MATRIX else value)
+            continue
+
+        right = stack.pop()
+        left = stack.pop()
+        if isinstance(left, PendingProduct) and isinstance(right, PendingProduct):
+            if left.shape[1] != right.shape[0]:
+                error(f"incompatible matrices sizes in matrix multiplication. Found {left.shape} and {right.shape}",
+                      step.right, ShapeMismatchError)
+            stack.append(PendingProduct(left.matrices + right.matrices))
+        else:
+            stack.append(binary_operation(step, _multiply_chain(node, left), _multiply_chain(node, right)))
+
+    return _multiply_chain(node, stack[0])
+
+
+def _multiply_chain(node: MatrixChain, value):
+    if not isinstance(value, PendingProduct):
+        return value
+
+    matrices = value.matrices
+    dims = [matrices[0].shape[0]] + [matrix.shape[1] for matrix in matrices]
+    order = node.order if dims == node.dims else matrix_chain_order(dims)
+
+    return _multiply(matrices, order, 0, len(matrices) - 1)
+
+
+def _multiply(matrices, order, i, j):
+    if i == j:
+        return matrices[i]
+
+    k = order[i][j]
+    return _multiply(matrices, order, i, k) @ _multiply(matrices, order, k + 1, j)
+
+
+def matrix_chain_order(dims):
+    """
+    Finds the cheapest order of multiplying matrices of sizes dims[i] x dims[i + 1] by dynamic programming.
+    Returns table whose [i][j] element is the split point of the product of matrices i..j, ties
+    keep the left to right order.
+    """
+    count = len(dims) - 1
+    cost = [[0] * count for _ in range(count)]
+    split = [[0] * count for _ in range(count)]
+
+    for length in range(2, count + 1):
+        for i in range(count - length + 1):
+            j = i + length - 1
+            cost[i][j] = None
+            for k in range(j - 1, i - 1, -1):
+                candidate = cost[i][k] + cost[k + 1][j] + dims[i] * dims[k + 1] * dims[j + 1]
+                if cost[i][j] is None or candidate < cost[i][j]:
+                    cost[i][j] = candidate
+                    split[i][j] = k
+
+    return split
+
+
+def transpose(node: Transposition, matrix):
+    if Type.get_type(matrix) == Type.MATRIX:
+        return np.transpose(matrix)
+    else:
+        error(f"only matrix can be transposed. Found: {Type.get_type(matrix)}", node)
+
+
+def compare(node: CompareExpr, left, right):
+    left_type, right_type = Type.get_type(left), Type.get_type(right)
+    function = operation_table.get((left_type, right_type, node.operator))
+    if function is None:
+        error(f"incompatible types for comparison. Found {left_type} and {right_type}", node)
+
+    return function(left, right)
+
+
+def get_slice(node: Slice, value, argument_1, argument_2):
+    if Type.get_type(value) not in {Type.VECTOR, Type.MATRIX, Type.STRING}:
+        error(f"only vectors and matrices can be sliced, found {Type.get_type(value)}", node)
+
+    size = (len(value),) if type(value) in {list, str} else value.shape
+
+    if type(argument_1) == int and (argument_1 >= size[0] or argument_1 < 0):
+        error(f"index {argument_1} is out of bounds for axis 0 with size {size[0]}", node, IndexOutOfBoundsError)
+    elif type(argument_1) not in {int, slice}:
+        error(f"first slice argument should be integer or slice, found: {type(argument_1)}", node)
+    elif type(argument_1) == slice:
+        if argument_1.start < 0 or argument_1.start > size[0] or \
+                argument_1.stop < 0 or argument_1.stop > size[0]:
+            error(f"slice {(argument_1.start, argument_1.stop)} " +
+                  f"is out of bounds for axis 0 with size {size[0]}", node, IndexOutOfBoundsError)
+
+    if argument_2 is not None:
+        if len(size) < 2:
+            error(f"2D slicing can be made only on matrices", node)
+
+        if type(argument_2) == int and (argument_2 >= size[1] or argument_2 < 0):
+            error(f"index {argument_1} is out of bounds for axis 1 with size {size[1]}", node, IndexOutOfBoundsError)
+        elif type(argument_2) not in {int, slice}:
+            error(f"second slice argument should be integer or slice, found: {type(argument_2)}", node)
+        elif type(argument_2) == slice:
+            if argument_2.start < 0 or argument_2.start > size[1] or \
+                    argument_2.stop < 0 or argument_2.stop > size[1]:
+                error(f"slice {(argument_2.start, argument_2.stop)} " +
+                      f"is out of bounds for axis 1 with size {size[1]}", node, IndexOutOfBoundsError)
+
+        return value[argument_1, argument_2]
+    else:
+        return value[argument_1]
+
+
+def compound_value(node: AssignExpr, left_value, right_value):
+    """
+    Returns the new value of the target. Element-wise operations on arrays are written into
+    `left_value` when its dtype can hold the result, in which case `left_value` itself is returned.
+
+    Arrays are shared on assignment, so this decides whether the aliases of the target change too:
+    after `X = A;`, `A += B`, `A -= B`, `A .+= B`, `A .-= B`, `A .*= B` and `A ./= B` change X as well,
+    while `A *= B` (the matrix product) and element-wise operations whose result the dtype of A cannot
+    hold (e.g. dividing a vector of integers or adding floats to it) bind A to a new array and leave X unchanged.
+    """
+    bin_operator = compound_operators[node.operator]
+
+    expression_type = (Type.get_type(left_value), Type.get_type(right_value))
+    if expression_type in {(Type.VECTOR, Type.VECTOR), (Type.MATRIX, Type.MATRIX)} and bin_operator in {"+", "-"}:
+        bin_operator = "." + bin_operator
+
+    function = operation_table.get(expression_type + (bin_operator,))
+    if function is None:
+        error(f"invalid types in binary expression. Left type: {expression_type[0]}, " +
+              f"right type: {expression_type[1]}", node)
+
+    if bin_operator in inplace_operators and isinstance(left_value, np.ndarray) and \
+            isinstance(right_value, np.ndarray):
+        if left_value.shape != right_value.shape:
+            error(f"incompatible sizes within operation: '{node.operator}'. Found: {left_value.shape} and " +
+                  f"{right_value.shape}, but they should be equal", node, ShapeMismatchError)
+
+        try:
+            return inplace_operators[bin_operator](left_value, right_value, out=left_value, casting="same_kind")
+        except TypeError:  # e.g. division of integers, the result needs a new array
+            pass
+    elif expression_type == (Type.MATRIX, Type.MATRIX) and left_value.shape[1] != right_value.shape[0]:
+        error(f"incompatible matrices sizes in matrix multiplication. Found {left_value.shape} and " +
+              f"{right_value.shape}", node.right, ShapeMismatchError)
+
+    try:
+        return function(left_value, right_value)
+    except ArithmeticError as exception:
+        error(str(exception), node, ArithmeticOperationError)
+
+
+def assign_slice(node: AssignExpr, vector, argument_1, argument_2, value):
+    try:
+        if argument_2 is not None:
+            vector[argument_1, argument_2] = value
+        else:
+            vector[argument_1] = value
+    except ValueError as exception:  # e.g. a vector of another size than the slice
+        error(f"cannot assign to slice: {exception}", node,
+              ShapeMismatchError if isinstance(value, np.ndarray) else OperandTypeError)
+
+
+def error(message, node, exception=OperandTypeError):
+    raise exception(message, node.position)
@@ -0,0 +1,127 @@
+"""
+Output sinks receiving the values of `print` statements from the engines.
+
+Sinks collect the output in a buffer, written to the stream when it grows over `buffer_size` and
+when the program ends. The engines flush their sink before a runtime error leaves `run`, so output
+stays ordered with the error messages printed on the same stream afterwards.
+"""
+import io
+import sys
+import json
+import hashlib
+import numpy as np
+
+
+class TextSink:
+    """
+    Writes every `print` statement as a line of comma separated values, like Python's `print` would.
+    Arrays are formatted with NumPy's print options updated by `print_options`, and the text of
+    recently printed arrays is reused while their contents do not change. Arrays over the print
+    threshold are summarized, which is cheaper than checking their contents, so they are not cached.
+    """
+
+    def __init__(self, stream=None, buffer_size=2 ** 16, print_options=None, cache_size=64):
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.print_options = dict(print_options or {})
+        self.cache_size = cache_size
+        self.cache = {}  # id of an array -> (array, digest of its contents, text)
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, values):
+        text = ", ".join([self.format(value) for value in values]) + "\n"
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def format(self, value):
+        if not isinstance(value, np.ndarray):
+            return str(value)
+
+        with np.printoptions(**self.print_options):
+            if value.size > np.get_printoptions()["threshold"]:
+                return str(value)
+
+            digest = self.digest(value)
+            entry = self.cache.get(id(value))
+            if entry is not None and entry[0] is value and entry[1] == digest:
+                return entry[2]
+
+            text = str(value)
+
+        if len(self.cache) >= self.cache_size:
+            del self.cache[next(iter(self.cache))]
+        self.cache[id(value)] = (value, digest, text)  # keeping the array keeps its id from being reused
+
+        return text
+
+    @staticmethod
+    def digest(value):
+        contents = hashlib.blake2b(np.ascontiguousarray(value).data, digest_size=16)
+        return value.shape, value.dtype, contents.digest()
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write("".join(self.buffer))
+            self.buffer.clear()
+            self.buffered = 0
+        self.stream.flush()
+
+
+class StructuredSink(TextSink):
+    """
+    Writes every `print` statement as a line holding a JSON array of the printed values, with vectors
+    and matrices as nested lists.
+    """
+
+    def write(self, values):
+        text = json.dumps([self.to_json(value) for value in values]) + "\n"
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    @staticmethod
+    def to_json(value):
+        if isinstance(value, (np.ndarray, np.generic)):
+            return value.tolist()
+        if isinstance(value, range):
+            return list(value)
+
+        return value
+
+
+class BinarySink(TextSink):
+    """
+    Writes every printed value as an array in the .npy format (numbers as 0-dimensional arrays),
+    so the output can be read back with repeated `np.load` calls. Writes go to the binary buffer
+    under a text stream, after the text written to it so far.
+    """
+
+    def __init__(self, stream=None, buffer_size=2 ** 16, print_options=None, cache_size=64):
+        super().__init__(stream, buffer_size, print_options, cache_size)
+        self.data = io.BytesIO()
+
+    def write(self, values):
+        for value in values:
+            np.lib.format.write_array(self.data, np.asarray(value), allow_pickle=False)
+
+        if self.data.tell() >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        binary = getattr(self.stream, "buffer", self.stream)
+        if self.data.tell():
+            self.stream.flush()
+            binary.write(self.data.getvalue())
+            self.data = io.BytesIO()
+        binary.flush()
+
+
+sinks = {
+    "text": TextSink,
+    "json": StructuredSink,
+    "binary": BinarySink,
+}
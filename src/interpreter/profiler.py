@@ -0,0 +1,108 @@
+"""
+Profiler of programs run by the interpreter, measuring every node evaluation.
+
+Profiling is done by `ProfilingInterpreter`, which wraps `Interpreter.visit`, so the plain
+`Interpreter` runs exactly as without a profiler. For every node class and source position it
+records the number of evaluations, cumulative time (with the nodes evaluated inside), self time
+(without them) and the bytes of NumPy arrays the evaluations allocated. An array counts as allocated
+by the first evaluation returning it, so passing along an operand or reading a variable does not
+count again.
+"""
+import re
+import time
+import weakref
+import numpy as np
+from dataclasses import dataclass
+from src.interpreter.interpreter import Interpreter
+
+
+@dataclass
+class NodeStatistics:
+    node: str  # class of the node
+    position: str
+    count: int = 0
+    cumulative: float = 0.0  # seconds
+    self: float = 0.0  # seconds
+    allocated: int = 0  # bytes
+
+
+class Profiler:
+    def __init__(self):
+        self.statistics = {}  # (class of the node, position) -> NodeStatistics
+        self.children = [0.0]  # time spent in nodes evaluated inside the ones being evaluated
+        self.arrays = weakref.WeakValueDictionary()  # id -> arrays returned so far
+
+    def record(self, node, elapsed, value):
+        children = self.children.pop()
+        self.children[-1] += elapsed
+
+        key = (type(node), getattr(node, "position", None))
+        statistics = self.statistics.get(key)
+        if statistics is None:
+            statistics = self.statistics[key] = NodeStatistics(type(node).__name__, key[1])
+
+        statistics.count += 1
+        statistics.cumulative += elapsed
+        statistics.self += elapsed - children
+        if isinstance(value, np.ndarray) and id(value) not in self.arrays:
+            self.arrays[id(value)] = value
+            if value.flags.owndata:
+                statistics.allocated += value.nbytes
+
+    def hot_spots(self, limit=None):
+        """Returns statistics sorted by self time, the most expensive first."""
+        return sorted(self.statistics.values(), key=lambda statistics: statistics.self, reverse=True)[:limit]
+
+    def report(self, limit=20):
+        lines = [f"{'self':>10} {'cumulative':>11} {'count':>9} {'allocated':>11}  node"]
+        for statistics in self.hot_spots(limit):
+            lines.append(f"{statistics.self * 1000:8.2f}ms {statistics.cumulative * 1000:9.2f}ms "
+                         f"{statistics.count:9} {statistics.allocated / 2 ** 20:9.2f}MB  "
+                         f"{statistics.node} at {statistics.position}")
+
+        return "\n".join(lines)
+
+    def listing(self, text):
+        """
+        Returns the program `text` with the self time, evaluations and allocated bytes of the nodes
+        of every line in front of it.
+        """
+        lines = {}
+        for statistics in self.statistics.values():
+            match = re.match(r"line (\d+)", statistics.position or "")
+            if match:
+                line = lines.setdefault(int(match.group(1)), [0.0, 0, 0])
+                line[0] += statistics.self
+                line[1] += statistics.count
+                line[2] += statistics.allocated
+
+        listing = []
+        for number, source in enumerate(text.splitlines(), 1):
+            if number in lines:
+                self_time, count, allocated = lines[number]
+                listing.append(f"{self_time * 1000:8.2f}ms {count:9} {allocated / 2 ** 20:9.2f}MB | {source}")
+            else:
+                listing.append(f"{'':30} | {source}")
+
+        return "\n".join(listing)
+
+
+class ProfilingInterpreter(Interpreter):
+    """
+    Interpreter recording every node evaluation in `profiler`.
+    """
+
+    def __init__(self, frame=None, output=None, profiler=None):
+        super().__init__(frame, output)
+        self.profiler = profiler if profiler is not None else Profiler()
+
+    def visit(self, node):
+        profiler = self.profiler
+        profiler.children.append(0.0)
+        value = None
+        start = time.perf_counter()
+        try:
+            value = Interpreter.visit(self, node)
+            return value
+        finally:
+            profiler.record(node, time.perf_counter() - start, value)
@@ -0,0 +1,182 @@
+import numpy as np
+from src.ast.ast import *
+from src.interpreter.operations import *
+from src.optimizer.transformer import NodeTransformer, walk
+
+
+class NotConstant(Exception):
+    pass
+
+
+class ConstantFolder(NodeTransformer):
+    """
+    Replaces expressions built only from literals with their values, e.g. `4.0 / 1` with `4.0`
+    and `zeros(3)` with a precomputed `Constant`, and removes `if` branches and `while` loops
+    that can never run. Expressions whose evaluation fails are kept, so the error is still
+    reported at runtime.
+    """
+
+    max_constant_size = 10 ** 6  # number of elements of the largest array kept in the tree
+
+    def __init__(self):
+        super().__init__()
+        self.folded = 0
+        self.removed = 0
+
+    # expressions
+
+    def visit_unary_minus(self, node: UnaryMinus):
+        self.generic_visit(node)
+        self._share(node.value)
+        return self._fold(node, negate, node.value)
+
+    def visit_bin_expr(self, node: BinExpr):
+        self.generic_visit(node)
+        self._share(node.left, node.right)
+        return self._fold(node, binary_operation, node.left, node.right)
+
+    def visit_matrix_bin_expr(self, node: MatrixBinExpr):
+        self.generic_visit(node)
+        self._share(node.left, node.right)
+        return self._fold(node, matrix_binary_operation, node.left, node.right)
+
+    def visit_compare_expr(self, node: CompareExpr):
+        self.generic_visit(node)
+        return self._fold(node, compare, node.left, node.right)
+
+    def visit_transposition(self, node: Transposition):
+        self.generic_visit(node)
+        return self._fold(node, transpose, node.matrix)
+
+    def visit_matrix(self, node: Matrix):
+        self.generic_visit(node)
+
+        # the size is checked before anything is allocated, the branch making the matrix may never run
+        try:
+            size = self._scalar_value(node.argument)
+        except NotConstant:
+            return node
+        if Type.get_type(size) == Type.INTNUM and not 0 <= size * size <= self.max_constant_size:
+            return node
+
+        return self._fold(node, make_matrix, node.argument)
+
+    def visit_vector(self, node: Vector):
+        self.generic_visit(node)
+        self._share(*node.inner_vector.inner_vector)
+        return self._fold(node, lambda vector_node, *elements: make_vector(vector_node, list(elements)),
+                          *node.inner_vector.inner_vector)
+
+    def visit_print(self, node: Print):
+        self.generic_visit(node)
+        self._share(*node.value.inner_vector)
+        return node
+
+    # statements
+
+    def visit_if(self, node: If):
+        self.generic_visit(node)
+
+        try:
+            condition = self._scalar_value(node.condition)
+        except NotConstant:
+            return node
+
+        if condition:
+            new_node = If(node.position, Number(node.condition.position, True), node.if_statement, None)
+        elif node.else_statement:
+            new_node = If(node.position, Number(node.condition.position, True), node.else_statement, None)
+        else:
+            new_node = Empty(node.position)
+
+        return self._replace(node, new_node)
+
+    def visit_while(self, node: While):
+        self.generic_visit(node)
+
+        try:
+            condition = self._scalar_value(node.condition)
+        except NotConstant:
+            return node
+
+        return node if condition else self._replace(node, Empty(node.position))
+
+    def visit_statements_list(self, node: StatementsList):
+        self.generic_visit(node)
+
+        statements = []
+        for statement in node.statements_list:
+            if isinstance(statement, Empty):
+                self.removed += 1
+                continue
+
+            # the list opens a scope for code blocks, so the `if` of an always taken branch can be dropped
+            if isinstance(statement, If) and statement.else_statement is None and \
+                    isinstance(statement.condition, Number) and statement.condition.number is True:
+                branch = statement.if_statement
+                if not isinstance(branch, CodeBlock):
+                    branch = CodeBlock(branch.position, StatementsList(branch.position, [], branch))
+                self.removed += count_nodes(statement) - count_nodes(branch)
+                statement = branch
+
+            statements.append(statement)
+
+        node.statements_list = statements
+        node.children = [statements]
+        return node
+
+    # helpers
+
+    def _fold(self, node, operation, *operands):
+        try:
+            values = [self._value(operand) for operand in operands]
+            value = operation(node, *values)
+        except Exception:  # NotConstant, or an error raised when the program runs instead
+            return node
+
+        if isinstance(value, np.ndarray):
+            if value.size > self.max_constant_size or not np.issubdtype(value.dtype, np.number):
+                return node
+            new_node = Constant(node.position, value)
+        elif isinstance(value, (int, float, np.number, np.bool_)):
+            new_node = Number(node.position, value)
+        else:
+            return node
+
+        new_node.type = node.type
+        new_node.size = node.size
+        self.folded += 1
+        return self._replace(node, new_node)
+
+    def _replace(self, node, new_node):
+        self.removed += count_nodes(node) - count_nodes(new_node)
+        return new_node
+
+    def _value(self, node):
+        if isinstance(node, Expression) and isinstance(node.expression, Node):
+            return self._value(node.expression)
+        if isinstance(node, Number):
+            return node.number
+        if isinstance(node, Constant):
+            return node.value
+
+        raise NotConstant
+
+    def _scalar_value(self, node):
+        value = self._value(node)
+        if isinstance(value, np.ndarray):
+            raise NotConstant
+        return value
+
+    @staticmethod
+    def _share(*operands):
+        """Marks constant operands of operations producing new values, they do not need to be copied."""
+        for operand in operands:
+            while isinstance(operand, Expression) and isinstance(operand.expression, Node):
+                operand = operand.expression
+            if isinstance(operand, Constant):
+                operand.copy = False
+
+
+def count_nodes(node):
+    return sum(1 for _ in walk(node))
@@ -0,0 +1,56 @@
+from src.ast.ast import *
+from src.optimizer.transformer import NodeTransformer
+from src.optimizer.vectorizer import unwrap
+
+
+class ElementwiseFuser(NodeTransformer):
+    """
+    Replaces maximal trees of at least two element-wise operations, e.g. `A .+ B .- C .* E`,
+    with `FusedExpr` nodes, which are evaluated in one pass without full-size temporaries.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fused = 0
+
+    def visit_matrix_bin_expr(self, node: MatrixBinExpr):
+        if count_operations(node) < 2:
+            return self.generic_visit(node)
+
+        fused = element_wise_tree(node, self.visit)
+        fused.type = node.type
+        fused.size = node.size
+        self.fused += 1
+
+        return fused
+
+
+def element_wise_tree(node: MatrixBinExpr, visit=lambda node: node):
+    """
+    Returns the `FusedExpr` form of the tree of element-wise operations rooted at `node`,
+    with `visit` applied to its operands.
+    """
+    operands = []
+    program = []
+    _flatten(node, operands, program, visit)
+
+    return FusedExpr(node.position, node, operands, program)
+
+
+def _flatten(node, operands, program, visit):
+    expression = unwrap(node)
+
+    if isinstance(expression, MatrixBinExpr):
+        _flatten(expression.left, operands, program, visit)
+        _flatten(expression.right, operands, program, visit)
+        program.append(expression)
+    else:
+        program.append(len(operands))
+        operands.append(visit(node))
+
+
+def count_operations(node):
+    node = unwrap(node)
+    if isinstance(node, MatrixBinExpr):
+        return 1 + count_operations(node.left) + count_operations(node.right)
+    return 0
@@ -0,0 +1,142 @@
+from src.ast.ast import *
+from src.type_checker.variables_types import Type
+from src.optimizer.transformer import NodeTransformer, replace_child, walk
+
+scalar_types = {Type.INTNUM, Type.FLOAT, Type.BOOLEAN, Type.STRING}
+array_types = {Type.VECTOR, Type.MATRIX}
+
+# expressions worth caching, scalar ones are cheaper to recompute than to look up, and only those
+# proved to be arrays are hoisted, since cached values are copied when stored in a variable
+hoisted_classes = (BinExpr, MatrixBinExpr, Transposition, Matrix)
+
+
+class LoopInvariantMover(NodeTransformer):
+    """
+    Moves matrix expressions which do not change between iterations, e.g. `A' * B` or `ones(n)`,
+    out of `for` and `while` loops. Loops are processed from the outermost one, so an expression
+    is owned by the outermost loop it is invariant in.
+
+    The expression is not evaluated before the loop, but wrapped in an `Invariant` node caching its
+    value on first evaluation. This keeps the evaluation order, so errors are reported where they
+    would be without the optimization and nothing is computed for loops that do not run.
+    The enclosing `HoistedLoop` drops cached values whenever the loop starts and ends.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hoisted = 0
+
+    def visit_for(self, node: For):
+        return self._visit_loop(node, [node.statement])
+
+    def visit_while(self, node: While):
+        return self._visit_loop(node, [node.condition, node.statement])
+
+    @staticmethod
+    def visit_kernel_loop(node: KernelLoop):
+        return node
+
+    def _visit_loop(self, node, parts):
+        hoister = InvariantHoister(node)
+        for part in parts:
+            hoister.visit(part)
+
+        self.generic_visit(node)  # nested loops
+
+        if not hoister.invariants:
+            return node
+
+        self.hoisted += len(hoister.invariants)
+        return HoistedLoop(node.position, node, hoister.invariants)
+
+
+class InvariantHoister(NodeTransformer):
+    """
+    Wraps maximal invariant subtrees of a loop in `Invariant` nodes.
+
+    An expression is invariant if it reads no variable assigned anywhere in the loop. Arrays are
+    shared on assignment, so when the loop writes array elements in place any array could be
+    changed through another name, and only expressions reading scalar variables are invariant then.
+    """
+
+    def __init__(self, loop):
+        super().__init__()
+        self.invariants = []
+        self.assigned = set()
+        self.writes_in_place = False
+
+        for node in walk(loop):
+            if isinstance(node, For):
+                self.assigned.add(node.iterator)
+            elif isinstance(node, AssignExpr):
+                target = node.left.slice_or_id
+                if isinstance(target, Slice):
+                    self.assigned.add(target.identifier)
+                    self.writes_in_place = True
+                else:
+                    self.assigned.add(target)
+                    if node.operator != "=" and node.left.type not in scalar_types:
+                        self.writes_in_place = True
+
+    def visit(self, node):
+        if isinstance(node, (Invariant, KernelLoop)):
+            return node
+
+        if isinstance(node, hoisted_classes) and node.type in array_types and self._is_invariant(node):
+            invariant = Invariant(node.position, node)
+            invariant.type = node.type
+            invariant.size = node.size
+            self.invariants.append(invariant)
+            return invariant
+
+        return super().visit(node)
+
+    def visit_assign_expr(self, node: AssignExpr):
+        self.generic_visit(node)
+        if node.operator == "=":
+            self._retain(node, "right")
+        return node
+
+    def visit_return(self, node: Return):
+        self.generic_visit(node)
+        if node.value:
+            self._retain(node, "value")
+        return node
+
+    def _is_invariant(self, node):
+        if isinstance(node, SliceOrID):
+            if isinstance(node.slice_or_id, Slice) or node.slice_or_id in self.assigned:
+                return False
+            return not self.writes_in_place or node.type in {Type.INTNUM, Type.FLOAT}
+        if isinstance(node, Expression) and not isinstance(node.expression, Node):
+            return True  # string literal
+        if isinstance(node, (Number, Constant)):
+            return True
+        if isinstance(node, (Expression, UnaryMinus, BinExpr, MatrixBinExpr, Transposition, CompareExpr,
+                             Matrix, Vector, InnerVector)):
+            return all(self._is_invariant(child) for child in self._children(node))
+
+        return False
+
+    @staticmethod
+    def _children(node):
+        for field in node.fields:
+            value = getattr(node, field)
+            yield from value if isinstance(value, list) else [value]
+
+    def _retain(self, parent, field):
+        """Handles invariant whose value is stored in a variable, so that it cannot change the cached value."""
+        value = getattr(parent, field)
+        while isinstance(value, Expression) and isinstance(value.expression, Node):
+            parent, field, value = value, "expression", value.expression
+
+        if not isinstance(value, Invariant):
+            return
+
+        if isinstance(value.expression, Transposition):
+            # a transposed matrix shares memory with the original one, which a copy would not
+            setattr(parent, field, value.expression)
+            replace_child(parent, value, value.expression)
+            self.invariants.remove(value)
+        else:
+            value.copy = True
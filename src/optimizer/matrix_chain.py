@@ -0,0 +1,63 @@
+from src.ast.ast import *
+from src.type_checker.variables_types import Type
+from src.type_checker.scope_manager import static
+from src.interpreter.operations import matrix_chain_order
+from src.optimizer.transformer import NodeTransformer
+from src.optimizer.vectorizer import unwrap
+
+scalar_types = {Type.INTNUM, Type.FLOAT, Type.BOOLEAN, Type.STRING}
+
+
+class MatrixChainOrderer(NodeTransformer):
+    """
+    Replaces trees of at least two matrix multiplications, e.g. `A * B * C * v`, with `MatrixChain`
+    nodes multiplying the matrices in the cheapest order. The order is found here when sizes of all
+    matrices are known statically, otherwise at runtime from the actual shapes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chains = 0
+        self.static = 0
+
+    def visit_bin_expr(self, node: BinExpr):
+        if count_products(node) < 2:
+            return self.generic_visit(node)
+
+        operands = []
+        program = []
+        self._flatten(node, operands, program)
+
+        chain = MatrixChain(node.position, node, operands, program)
+        chain.type = node.type
+        chain.size = node.size
+        self.chains += 1
+
+        if all(operand.type == Type.MATRIX and operand.size and static(*operand.size) for operand in operands):
+            chain.dims = [operands[0].size[0]] + [operand.size[1] for operand in operands]
+            chain.order = matrix_chain_order(chain.dims)
+            self.static += 1
+
+        return chain
+
+    def _flatten(self, node, operands, program):
+        expression = unwrap(node)
+
+        if is_product(expression):
+            self._flatten(expression.left, operands, program)
+            self._flatten(expression.right, operands, program)
+            program.append(expression)
+        else:
+            program.append(len(operands))
+            operands.append(self.visit(node))
+
+
+def is_product(node):
+    return isinstance(node, BinExpr) and node.operator == "*" and node.type not in scalar_types
+
+
+def count_products(node):
+    node = unwrap(node)
+    if is_product(node):
+        return 1 + count_products(node.left) + count_products(node.right)
+    return 0
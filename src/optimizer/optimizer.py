@@ -0,0 +1,41 @@
+from src.ast.ast import *
+from src.optimizer.constant_folder import ConstantFolder
+from src.optimizer.vectorizer import LoopVectorizer
+from src.optimizer.scalar_loop import ScalarLoopSpecializer
+from src.optimizer.invariant_motion import LoopInvariantMover
+from src.optimizer.fusion import ElementwiseFuser
+from src.optimizer.matrix_chain import MatrixChainOrderer
+
+
+class Optimizer:
+    """
+    Runs the optimization passes over a type checked AST, before slots are resolved.
+    """
+
+    def __init__(self):
+        self.constant_folder = ConstantFolder()
+        self.loop_vectorizer = LoopVectorizer()
+        self.scalar_loop_specializer = ScalarLoopSpecializer()
+        self.invariant_mover = LoopInvariantMover()
+        self.matrix_chain_orderer = MatrixChainOrderer()
+        self.elementwise_fuser = ElementwiseFuser()
+
+    def optimize(self, node: Program):
+        node = self.constant_folder.visit(node)
+        node = self.loop_vectorizer.visit(node)
+        node = self.scalar_loop_specializer.visit(node)
+        node = self.invariant_mover.visit(node)
+        node = self.matrix_chain_orderer.visit(node)
+        node = self.elementwise_fuser.visit(node)
+
+        return node
+
+    def report(self):
+        return "\n".join([f"folded expressions: {self.constant_folder.folded}",
+                          f"removed nodes: {self.constant_folder.removed}",
+                          f"vectorized loops: {self.loop_vectorizer.vectorized}",
+                          f"specialized scalar loops: {self.scalar_loop_specializer.specialized}",
+                          f"hoisted expressions: {self.invariant_mover.hoisted}",
+                          f"matrix chains: {self.matrix_chain_orderer.chains} " +
+                          f"({self.matrix_chain_orderer.static} ordered statically)",
+                          f"fused expressions: {self.elementwise_fuser.fused}"])
@@ -0,0 +1,228 @@
+from src.ast.ast import *
+from src.type_checker.variables_types import Type
+from src.interpreter.operations import compound_operators
+from src.optimizer.transformer import NodeTransformer
+from src.optimizer.vectorizer import unwrap
+import math
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Kernels are compiled to machine code by Numba when it is installed and `use_numba` is set.
+# Integers wrap around at 64 bits there instead of growing, so it is not the default.
+use_numba = False
+
+scalar_types = {Type.INTNUM, Type.FLOAT}
+python_types = {Type.INTNUM: int, Type.FLOAT: float}
+
+arithmetic_operators = {"+", "-", "*", "/"}
+comparison_operators = {"==", "!=", "<", "<=", ">", ">="}
+
+
+class NotSpecializable(Exception):
+    pass
+
+
+class ScalarLoopSpecializer(NodeTransformer):
+    """
+    Replaces `for` loops working only on variables the type checker proved to be integers or floats,
+    e.g. `for i = 1:N { pi += 4.0 / n - 4.0 / (n + 2); n += 4; }`, with `KernelLoop` nodes running
+    the whole loop as a Python function keeping the variables in its locals and using plain arithmetic,
+    instead of evaluating every node through the engine. Loops are tried from the outermost one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.specialized = 0
+
+    def visit_for(self, node: For):
+        try:
+            kernel = ScalarKernel(node)
+        except NotSpecializable:
+            return self.generic_visit(node)
+
+        self.specialized += 1
+        return KernelLoop(node.position, node, kernel)
+
+    @staticmethod
+    def visit_kernel_loop(node: KernelLoop):
+        return node
+
+
+class ScalarKernel:
+    """
+    Kernel of a scalar loop, generated as Python source. Variables are read from the frame before
+    the loop and written back after it, so a kernel refusing to run (operands which are not numbers
+    at runtime) or failing (e.g. dividing by zero) leaves the state untouched and the original loop
+    reports the error at the right iteration.
+
+    Locals live for the whole kernel, while the frame forgets variables created in a scope when the
+    scope ends. The kernel only runs when every variable the loop creates is safe to keep: the iterator,
+    variables assigned at the top of the body before any use, and iterators of nested loops read only
+    inside them. Other variables have to exist before the loop.
+    """
+
+    def __init__(self, loop: For):
+        self.loop = loop
+        self.variables = {}  # name -> a node of the variable, holding its slot once resolved
+        self.types = {}      # name -> static types of the values of the variable
+        self.lines = []
+        self.used = set()          # variables read or assigned so far
+        self.defined = set()       # variables assigned at the top of the body before any use
+        self.assigned = set()      # variables assigned by assignments
+        self.read_outside = set()  # variables read outside the loops iterating over them
+        self.iterators = []        # iterators of the nested loops being generated
+        self.nesting = 0           # scopes entered inside the body
+
+        self._variable(loop.iterator, loop, Type.INTNUM)
+        self.lines.append(f"for {local(loop.iterator)} in range(from_index, to_index):")
+        self._block(loop.statement, 1)
+
+        self.names = list(self.variables)
+        arguments = ", ".join(local(name) for name in self.names)
+        source = "\n".join([f"def kernel(from_index, to_index, {arguments}):"] +
+                           ["    " + line for line in self.lines] +
+                           [f"    return {arguments},"])
+        namespace = {}
+        exec(compile(source, f"<scalar kernel at {loop.position}>", "exec"), namespace)
+
+        self.source = source
+        self.function = namespace["kernel"]
+        self.compiled = None
+        self.stable = all(len(types) == 1 for types in self.types.values())
+        self.creatable = {loop.iterator} | self.defined | \
+                         {name for name in self.names if name not in self.assigned | self.read_outside}
+
+    def __call__(self, frame, from_index, to_index):
+        values = frame.values
+        slots = [self.variables[name].slot for name in self.names]
+        arguments = [values[slot] for slot in slots]
+        for name, value in zip(self.names, arguments):
+            if value is None and name not in self.creatable or value is not None and type(value) not in {int, float}:
+                return False
+
+        try:
+            results = self._function(arguments)(from_index, to_index, *arguments)
+        except (ArithmeticError, TypeError):  # e.g. division by zero or an uninitialized variable
+            return False
+
+        # variables created inside the loop are forgotten after it, like the iterator if it is new
+        for slot, argument, result in zip(slots, arguments, results):
+            if argument is not None:
+                values[slot] = result
+
+        return True
+
+    def _function(self, arguments):
+        if not use_numba or numba is None or not self.stable:
+            return self.function
+
+        for name, argument in zip(self.names, arguments):
+            if type(argument) is not python_types[next(iter(self.types[name]))]:
+                return self.function
+
+        if self.compiled is None:
+            self.compiled = numba.njit(self.function)
+        return self.compiled
+
+    # code generation
+
+    def _block(self, node, depth):
+        statements = node.statements_list.statements_list if isinstance(node, CodeBlock) else [node]
+        if not statements:
+            self._line("pass", depth)
+        for statement in statements:
+            self._statement(statement, depth)
+
+    def _scope(self, node, depth):
+        self.nesting += 1
+        self._block(node, depth)
+        self.nesting -= 1
+
+    def _statement(self, node, depth):
+        if isinstance(node, AssignExpr):
+            self._assignment(node, depth)
+        elif isinstance(node, If):
+            if not isinstance(node.condition, CompareExpr) or node.condition.operator not in comparison_operators:
+                raise NotSpecializable
+            self._line(f"if {self._value(node.condition.left)} {node.condition.operator} "
+                       f"{self._value(node.condition.right)}:", depth)
+            self._scope(node.if_statement, depth + 1)
+            if node.else_statement:
+                self._line("else:", depth)
+                self._scope(node.else_statement, depth + 1)
+        elif isinstance(node, For):
+            from_index = self._value(node.loop_range.from_index, {Type.INTNUM})
+            to_index = self._value(node.loop_range.to_index, {Type.INTNUM})
+            self._variable(node.iterator, node, Type.INTNUM)
+            self._line(f"for {local(node.iterator)} in range({from_index}, {to_index}):", depth)
+            self.iterators.append(node.iterator)
+            self._scope(node.statement, depth + 1)
+            self.iterators.pop()
+        elif isinstance(node, LoopStatement):
+            self._line(node.instruction.lower(), depth)
+        elif isinstance(node, CodeBlock):
+            self._scope(node, depth)
+        elif not isinstance(node, Empty):
+            raise NotSpecializable
+
+    def _assignment(self, node: AssignExpr, depth):
+        name = node.left.slice_or_id
+        if type(name) is not str or node.right.type not in scalar_types:
+            raise NotSpecializable
+
+        value = self._value(node.right)
+        if node.operator == "=":
+            value_type = node.right.type
+        else:
+            bin_operator = compound_operators[node.operator]
+            if bin_operator not in arithmetic_operators or node.left.type not in scalar_types:
+                raise NotSpecializable
+            value = f"{local(name)} {bin_operator} {value}"
+            value_type = result_type(bin_operator, node.left.type, node.right.type)
+
+        if self.nesting == 0 and node.operator == "=" and name not in self.used:
+            self.defined.add(name)
+        self.assigned.add(name)
+        self._variable(name, node, value_type)
+        self._line(f"{local(name)} = {value}", depth)
+
+    def _value(self, node, types=scalar_types):
+        if getattr(node, "type", None) not in types:
+            raise NotSpecializable
+        node = unwrap(node)
+
+        if isinstance(node, Number) and type(node.number) in {int, float} and math.isfinite(node.number):
+            return f"({node.number!r})"
+        if isinstance(node, SliceOrID) and type(node.slice_or_id) is str:
+            if node.slice_or_id not in self.iterators and node.slice_or_id != self.loop.iterator:
+                self.read_outside.add(node.slice_or_id)
+            self._variable(node.slice_or_id, node, node.type)
+            return local(node.slice_or_id)
+        if isinstance(node, UnaryMinus):
+            return f"(-{self._value(node.value)})"
+        if isinstance(node, BinExpr) and node.operator in arithmetic_operators:
+            return f"({self._value(node.left)} {node.operator} {self._value(node.right)})"
+
+        raise NotSpecializable
+
+    def _variable(self, name, node, value_type):
+        self.used.add(name)
+        self.variables.setdefault(name, node)
+        self.types.setdefault(name, set()).add(value_type)
+
+    def _line(self, line, depth):
+        self.lines.append("    " * depth + line)
+
+
+def local(name):
+    """Name of the local variable holding variable `name` in a kernel, never a Python keyword or builtin."""
+    return "v_" + name
+
+
+def result_type(bin_operator, left, right):
+    if bin_operator == "/" or Type.FLOAT in {left, right}:
+        return Type.FLOAT
+    return Type.INTNUM
@@ -0,0 +1,49 @@
+from src.ast.ast import *
+from src.type_checker.node_visitor import NodeVisitor
+
+
+class NodeTransformer(NodeVisitor):
+    """
+    Visitor whose `visit` returns the node that should replace the visited one.
+    `generic_visit` transforms all children listed in `fields` and keeps `children` in sync.
+    """
+
+    def generic_visit(self, node: Node):
+        for field in node.fields:
+            value = getattr(node, field)
+
+            if isinstance(value, list):
+                for index, element in enumerate(value):
+                    new_element = self.visit(element)
+                    if new_element is not element:
+                        value[index] = new_element
+                        replace_child(node, element, new_element)
+            elif isinstance(value, Node):
+                new_value = self.visit(value)
+                if new_value is not value:
+                    setattr(node, field, new_value)
+                    replace_child(node, value, new_value)
+
+        return node
+
+
+def replace_child(node: Node, old, new):
+    for index, child in enumerate(node.children):
+        if child is old:
+            node.children[index] = new
+        elif isinstance(child, list):
+            for element_index, element in enumerate(child):
+                if element is old:
+                    child[element_index] = new
+
+
+def walk(node):
+    """Yields the node and all its descendants."""
+    yield node
+    for field in node.fields:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            for element in value:
+                yield from walk(element)
+        elif isinstance(value, Node):
+            yield from walk(value)
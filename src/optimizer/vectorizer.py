@@ -0,0 +1,267 @@
+from collections import namedtuple
+from src.ast.ast import *
+from src.interpreter.operations import compound_operators
+from src.optimizer.transformer import NodeTransformer
+import numpy as np
+import operator
+
+# element-wise equivalents of scalar operators
+elementwise_operators = {"+": operator.add,
+                         "-": operator.sub,
+                         "*": operator.mul,
+                         "/": operator.truediv}
+
+# single index of an array access: kind is "affine" (iterator + offset), "constant" or "variable"
+Index = namedtuple("Index", ["kind", "value", "node"])
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+class LoopVectorizer(NodeTransformer):
+    """
+    Replaces `for` loops whose bodies consist only of element-wise slice assignments without
+    loop-carried dependencies, e.g. `for i = 0:N { A[i] = B[i] * 2 + C[i - 1]; }`,
+    with `KernelLoop` nodes running the whole loop as a few NumPy operations.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.vectorized = 0
+
+    def visit_for(self, node: For):
+        self.generic_visit(node)
+
+        try:
+            kernel = VectorKernel(node)
+        except NotVectorizable:
+            return node
+
+        self.vectorized += 1
+        return KernelLoop(node.position, node, kernel)
+
+
+class Access:
+    def __init__(self, node: Slice, indices):
+        self.node = node
+        self.name = node.identifier
+        self.indices = indices
+        self.key = tuple((index.kind, index.value) for index in indices)
+        self.affine_axes = sum(index.kind == "affine" for index in indices)
+
+
+class LoopContext:
+    def __init__(self, values, from_index, to_index):
+        self.values = values
+        self.from_index = from_index
+        self.to_index = to_index
+        self._iterator_values = None
+
+    def iterator_values(self):
+        if self._iterator_values is None:
+            self._iterator_values = np.arange(self.from_index, self.to_index)
+        return self._iterator_values
+
+    def index(self, access: Access):
+        if access.affine_axes == 1:
+            return tuple(slice(self.from_index + index.value, self.to_index + index.value)
+                         if index.kind == "affine" else self.index_value(index)
+                         for index in access.indices)
+
+        return tuple(self.iterator_values() + index.value
+                     if index.kind == "affine" else self.index_value(index)
+                     for index in access.indices)
+
+    def index_value(self, index: Index):
+        return index.value if index.kind == "constant" else self.values[index.node.slot]
+
+    def read(self, access: Access):
+        return self.values[access.node.slot][self.index(access)]
+
+    def write(self, access: Access, value):
+        self.values[access.node.slot][self.index(access)] = value
+
+
+class VectorKernel:
+    """
+    Kernel of a vectorizable loop. All runtime assumptions (operand types, bounds, aliasing)
+    are checked before anything is written, so refusing to run leaves the state untouched
+    and the original loop can report errors at the right iteration.
+    """
+
+    def __init__(self, loop: For):
+        self.loop = loop
+        self.accesses = []
+        self.writes = []
+        self.scalars = []
+        self.statements = [self._statement(statement) for statement in self._body(loop.statement)]
+        self.written = {access.name for access in self.writes}
+        self._check_dependencies()
+
+    def __call__(self, frame, from_index, to_index):
+        if from_index >= to_index:
+            return True
+
+        context = LoopContext(frame.values, from_index, to_index)
+        if not self._guards_hold(context):
+            return False
+
+        for statement in self.statements:
+            statement(context)
+
+        # the iterator keeps its last value only if it already existed outside of the loop
+        if frame.values[self.loop.slot] is not None:
+            frame.values[self.loop.slot] = to_index - 1
+
+        return True
+
+    # analysis
+
+    @staticmethod
+    def _body(statement):
+        if isinstance(statement, CodeBlock):
+            return statement.statements_list.statements_list
+        return [statement]
+
+    def _statement(self, node):
+        if not isinstance(node, AssignExpr) or not isinstance(node.left.slice_or_id, Slice):
+            raise NotVectorizable
+
+        target = self._access(node.left.slice_or_id)
+        self.writes.append(target)
+        value, value_has_array = self._value(node.right)
+
+        if node.operator == "=":
+            return lambda context: context.write(target, value(context))
+
+        bin_operator = compound_operators[node.operator]
+        if bin_operator not in elementwise_operators or bin_operator == "/" and not value_has_array:
+            raise NotVectorizable
+        function = elementwise_operators[bin_operator]
+
+        return lambda context: context.write(target, function(context.read(target), value(context)))
+
+    def _access(self, node: Slice):
+        arguments = [node.slice_argument_1] + ([node.slice_argument_2] if node.slice_argument_2 else [])
+        indices = tuple(self._index(argument.argument) for argument in arguments)
+        access = Access(node, indices)
+
+        if access.affine_axes == 0:
+            raise NotVectorizable
+
+        self.accesses.append(access)
+        return access
+
+    def _index(self, node):
+        node = unwrap(node)
+
+        if self._is_iterator(node):
+            return Index("affine", 0, None)
+        if isinstance(node, BinExpr) and node.operator in {"+", "-"}:
+            left, right = unwrap(node.left), unwrap(node.right)
+            if self._is_iterator(left) and _is_integer(right):
+                return Index("affine", right.number if node.operator == "+" else -right.number, None)
+            if node.operator == "+" and _is_integer(left) and self._is_iterator(right):
+                return Index("affine", left.number, None)
+        if _is_integer(node):
+            return Index("constant", node.number, None)
+        if isinstance(node, SliceOrID) and type(node.slice_or_id) is str:
+            self.scalars.append(node)
+            return Index("variable", node.slice_or_id, node)
+
+        raise NotVectorizable
+
+    def _value(self, node):
+        """Returns function evaluating the expression for all iterations and whether it reads an array."""
+        node = unwrap(node)
+
+        if isinstance(node, Number):
+            number = node.number
+            return lambda context: number, False
+        if self._is_iterator(node):
+            return lambda context: context.iterator_values(), False
+        if isinstance(node, SliceOrID) and type(node.slice_or_id) is str:
+            self.scalars.append(node)
+            return lambda context: context.values[node.slot], False
+        if isinstance(node, SliceOrID) and isinstance(node.slice_or_id, Slice):
+            access = self._access(node.slice_or_id)
+            return lambda context: context.read(access), True
+        if isinstance(node, UnaryMinus):
+            value, has_array = self._value(node.value)
+            return lambda context: -value(context), has_array
+        if isinstance(node, BinExpr) and node.operator in elementwise_operators:
+            left, left_has_array = self._value(node.left)
+            right, right_has_array = self._value(node.right)
+            # scalar division by zero raises in the interpreter, but gives inf on arrays
+            if node.operator == "/" and not right_has_array:
+                raise NotVectorizable
+
+            function = elementwise_operators[node.operator]
+            return lambda context: function(left(context), right(context)), left_has_array or right_has_array
+
+        raise NotVectorizable
+
+    def _is_iterator(self, node):
+        return isinstance(node, SliceOrID) and node.slice_or_id == self.loop.iterator
+
+    def _check_dependencies(self):
+        # every access to a written array has to touch the same element in a given iteration
+        for name in self.written:
+            keys = {access.key for access in self.accesses if access.name == name}
+            if len(keys) > 1:
+                raise NotVectorizable
+
+        if any(scalar.slice_or_id in self.written for scalar in self.scalars):
+            raise NotVectorizable
+
+    # runtime checks
+
+    def _guards_hold(self, context: LoopContext):
+        values = context.values
+
+        for scalar in self.scalars:
+            if not _is_number(values[scalar.slot]):
+                return False
+
+        arrays = {}
+        for access in self.accesses:
+            array = values[access.node.slot]
+            if not isinstance(array, np.ndarray) or array.ndim != len(access.indices) or \
+                    not np.issubdtype(array.dtype, np.number):
+                return False
+
+            for axis, index in enumerate(access.indices):
+                if not self._in_bounds(context, index, array.shape[axis]):
+                    return False
+
+            arrays[access.name] = array
+
+        for name in self.written:
+            for other_name, array in arrays.items():
+                if other_name != name and np.may_share_memory(arrays[name], array):
+                    return False
+
+        return True
+
+    @staticmethod
+    def _in_bounds(context: LoopContext, index: Index, size):
+        if index.kind == "affine":
+            return context.from_index + index.value >= 0 and context.to_index - 1 + index.value < size
+
+        value = context.index_value(index)
+        return type(value) is int and 0 <= value < size
+
+
+def unwrap(node):
+    while isinstance(node, Expression) and isinstance(node.expression, Node):
+        node = node.expression
+    return node
+
+
+def _is_integer(node):
+    return isinstance(node, Number) and type(node.number) is int
+
+
+def _is_number(value):
+    return type(value) in {int, float} or isinstance(value, (np.integer, np.floating))
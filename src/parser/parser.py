@@ -1,11 +1,13 @@
 import ply.yacc as yacc
+from src.parser import tables
 from src.scanner.scanner import *
 from src.ast.tree_printer import *
 
 precedence = (
     ('nonassoc', 'JUST_IF'),
     ('nonassoc', 'ELSE'),
-    ('nonassoc', 'ASSIGN', 'MINUS_ASSIGN', 'PLUS_ASSIGN', 'TIMES_ASSIGN', 'DIVIDE_ASSIGN'),
+    ('nonassoc', 'ASSIGN', 'MINUS_ASSIGN', 'PLUS_ASSIGN', 'TIMES_ASSIGN', 'DIVIDE_ASSIGN',
+     'PLUS_MAT_ASSIGN', 'MINUS_MAT_ASSIGN', 'TIMES_MAT_ASSIGN', 'DIVIDE_MAT_ASSIGN'),
     ('left', 'EQ', 'NE', 'GT', 'GE', 'LT', 'LE'),
     ('left', 'PLUS', 'MINUS'),
     ('left', 'TIMES', 'DIVIDE'),
@@ -69,6 +71,16 @@ def p_matrix_maker(p):
 
     p[0] = Matrix(position(p), p[1], p[3])
 
+
+def p_load(p):
+    """expression : LOAD '(' expression ')'
+                  | LOAD '(' expression ',' expression ',' expression ')' """
+
+    if len(p) == 5:
+        p[0] = Load(position(p), p[3], None, None)
+    else:
+        p[0] = Load(position(p), p[3], p[5], p[7])
+
     
 def p_range(p):
     """range : expression ':' expression"""
@@ -143,7 +155,11 @@ def p_statement(p):
                  | slice_or_id MINUS_ASSIGN expression ';'
                  | slice_or_id PLUS_ASSIGN expression ';'
                  | slice_or_id TIMES_ASSIGN expression ';'
-                 | slice_or_id DIVIDE_ASSIGN expression ';' """
+                 | slice_or_id DIVIDE_ASSIGN expression ';'
+                 | slice_or_id PLUS_MAT_ASSIGN expression ';'
+                 | slice_or_id MINUS_MAT_ASSIGN expression ';'
+                 | slice_or_id TIMES_MAT_ASSIGN expression ';'
+                 | slice_or_id DIVIDE_MAT_ASSIGN expression ';' """
 
     p[0] = AssignExpr(position(p), p[2], p[1], p[3])
 
@@ -205,6 +221,11 @@ def p_print(p):
     p[0] = Print(position(p), p[2])
 
 
+def p_save(p):
+    """statement : SAVE '(' expression ',' expression ')' ';' """
+    p[0] = Save(position(p), p[3], p[5])
+
+
 def p_error(p):
     if p:
         raise SyntaxError(f"Syntax error: {position(p)}, LexToken({p.type}, '{p.value}')")
@@ -212,4 +233,5 @@ def p_error(p):
         raise SyntaxError("Syntax error: unexpected end of input")
 
 
-parser = yacc.yacc(start='program')
+parser = yacc.yacc(start='program', optimize=1, debug=False, tabmodule=tables.table('parsetab'),
+                   outputdir=tables.directory, errorlog=yacc.NullLogger())
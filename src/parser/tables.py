@@ -0,0 +1,73 @@
+"""
+Precomputed lexer and parser tables.
+
+PLY builds its tables once and writes them as Python modules, which later runs import instead of
+analysing the grammar again. The tables are read in optimized mode, so they are never checked
+against the grammar; instead their names carry a digest of the scanner and parser sources, and
+a changed grammar simply generates new tables under a new name.
+
+The tables are kept next to the parser, unless the COMPILER_TABLES_DIR environment variable
+names another directory.
+"""
+import glob
+import hashlib
+import importlib.util
+import os
+
+package_directory = os.path.dirname(os.path.abspath(__file__))
+grammar_files = [os.path.join(package_directory, "..", "scanner", "scanner.py"),
+                 os.path.join(package_directory, "parser.py")]
+
+missing_package = "_compiler_tables"
+
+directory = os.environ.get("COMPILER_TABLES_DIR") or package_directory
+
+
+def grammar_version():
+    digest = hashlib.sha1()
+    for path in grammar_files:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()[:12]
+
+
+version = grammar_version()
+
+
+def table(name):
+    """
+    Returns the module holding table `name` when it was already generated, otherwise the name of the
+    module PLY should write into the table directory. Tables of previous grammar versions are removed.
+
+    PLY looks a plain name up inside the calling package, whatever the table directory is, so the
+    name is qualified with a package that does not exist; PLY writes the table under its last part.
+    """
+    module_name = f"{name}_{version}"
+    path = os.path.join(directory, module_name + ".py")
+
+    if os.path.exists(path):
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+            return module
+        except Exception:
+            remove(path)
+
+    for stale in glob.glob(os.path.join(directory, f"{name}_*.py")):
+        remove(stale)
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:  # PLY then builds the tables without writing them
+        pass
+
+    return f"{missing_package}.{module_name}"
+
+
+def remove(path):
+    """Removes a table file, unless another process starting at the same time did or the directory is read-only."""
+    try:
+        os.remove(path)
+    except OSError:  # e.g. FileNotFoundError or PermissionError
+        pass
@@ -1,11 +1,13 @@
 from ply import lex
+from src.parser import tables
 
-reserved = {word: word.upper() for word in 'if else for while break continue return eye zeros ones print'.split()}
+reserved = {word: word.upper() for word in 'if else for while break continue return eye zeros ones print load save'.split()}
 
 
 tokens = ['PLUS',  'MINUS',  'TIMES',  'DIVIDE',
           'PLUS_MAT', 'MINUS_MAT', 'TIMES_MAT', "DIVIDE_MAT", "TRANSPOSE",
           'ASSIGN', 'MINUS_ASSIGN', 'PLUS_ASSIGN', 'TIMES_ASSIGN', 'DIVIDE_ASSIGN',
+          'PLUS_MAT_ASSIGN', 'MINUS_MAT_ASSIGN', 'TIMES_MAT_ASSIGN', 'DIVIDE_MAT_ASSIGN',
           'EQ', 'NE', 'LT', 'LE', 'GT', 'GE',
           'FLOAT', 'INT', 'STRING', 'ID'
           ] + list(reserved.values())
@@ -28,6 +30,10 @@ t_MINUS_ASSIGN = r'-='
 t_PLUS_ASSIGN = r'\+='
 t_TIMES_ASSIGN = r'\*='
 t_DIVIDE_ASSIGN = r'/='
+t_PLUS_MAT_ASSIGN = r'\.\+='
+t_MINUS_MAT_ASSIGN = r'\.-='
+t_TIMES_MAT_ASSIGN = r'\.\*='
+t_DIVIDE_MAT_ASSIGN = r'\./='
 
 t_EQ = r'=='
 t_NE = r'!='
@@ -96,4 +102,4 @@ def position(token):
     return f"line {token.lexer.lineno}, column {find_column(token.lexer.lexdata, token.lexer.lexpos)}"
 
 
-lexer = lex.lex()
+lexer = lex.lex(optimize=1, lextab=tables.table('lextab'), outputdir=tables.directory)
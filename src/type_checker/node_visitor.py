@@ -1,6 +1,8 @@
 from src.ast.ast import *
 from src.type_checker.scope_manager import *
 from src.type_checker.variables_types import Type
+import os
+import numpy as np
 
 valid_operations = {
     Type.INTNUM: {"-"},
@@ -58,14 +60,23 @@ class NodeVisitor:
 
 
 class TypeChecker(NodeVisitor):
-    def __init__(self):
+    def __init__(self, incremental=False):
         super().__init__()
         self.correct = True
+        self.incremental = incremental  # programs are checked one after another in the same program scope
+        self.saved_paths = set()  # data files written by the program, None if some path is not a literal
+        self.retyped = 0  # changes of the type or size of existing variables inside loops
+        self.unified = []  # unknowns with values found by unification, forgotten when leaving their block
 
     def visit_program(self, node: Program):
-        self.symbol_table.push_scope("program")
+        self.saved_paths |= saved_paths(node)
+        if not self.incremental or not self.symbol_table.scopes:
+            self.symbol_table.push_scope("program")
+
         self.visit(node.statements_list)
-        self.symbol_table.pop_scope()
+
+        if not self.incremental:
+            self.symbol_table.pop_scope()
 
     def visit_empty(self, node: Empty):
         pass
@@ -161,8 +172,8 @@ class TypeChecker(NodeVisitor):
             self._error(f"Size of '{node.matrix_type}' matrix should be an integer. Found: {node.argument.type}, " +
                         f"{node.position}")
 
-        if type(node.argument) == Expression and type(node.argument.expression) == Number:
-            size = node.argument.expression.number
+        if node.argument.type == Type.INTNUM:
+            size = self._integer(node.argument)
             node.size = (size, size)
             node.type = Type.MATRIX
         else:
@@ -202,11 +213,14 @@ class TypeChecker(NodeVisitor):
                 else:
                     node.type = node.left.type if node.left.type != Type.UNKNOWN else node.right.type
 
+                # integers may turn into floats in loops, and floats do not work with strings
+                node.verified = Type.UNKNOWN not in expr_type and Type.STRING not in expr_type
+
                 if node.type == Type.MATRIX:
                     if node.left.type == Type.UNKNOWN or node.right.type == Type.UNKNOWN:
                         node.type = Type.UNKNOWN
                     else:
-                        self.__check_matrix_multiplication(node)
+                        node.verified = self.__check_matrix_multiplication(node)
                         node.size = (node.left.size[0], node.right.size[1])
             else:
                 node.type = Type.UNKNOWN
@@ -214,10 +228,67 @@ class TypeChecker(NodeVisitor):
                             f"right type: {node.right.type}, {node.position}")
 
     def __check_matrix_multiplication(self, node):
-        if node.left.size[1] != node.right.size[0]:
+        """Reports sizes which cannot be multiplied. Returns whether they can be for sure."""
+        same = self._unify(node.left.size[1], node.right.size[0])
+        if same is False:
             self._error(f"Incompatible matrices sizes in matrix multiplication. " +
                         f"Found {node.left.size} and {node.right.size}, {node.right.position}")
 
+        return same is True
+
+    def _unify(self, first, second):
+        """
+        Returns whether two sizes (integers, dimensions or their pairs) are equal: True or False when it is
+        known before execution, None when it depends on unknowns. In the latter case the sizes are assumed
+        equal from now on in the current block, as the program stops at runtime when they are not.
+        """
+        if isinstance(first, tuple) and isinstance(second, tuple):
+            results = [self._unify(first_size, second_size) for first_size, second_size in zip(first, second)]
+            if False in results:
+                return False
+            return None if None in results else True
+
+        value = difference(first, second)
+        if value is not None:
+            return value == 0
+
+        unknown = unify(first, second)
+        if unknown is not None:
+            self.unified.append(unknown)
+        return None
+
+    def _dimension(self, node):
+        """Returns the integer or dimension an integer expression evaluates to, None when it cannot tell."""
+        while type(node) is Expression and isinstance(node.expression, Node):
+            node = node.expression
+
+        if type(node) is Number:
+            return node.number if type(node.number) is int else None
+        if type(node) is SliceOrID and type(node.slice_or_id) is str:
+            symbol = self.symbol_table.get(node.slice_or_id)
+            return symbol.value if type(symbol) is VariableSymbol and symbol.type == Type.INTNUM else None
+        if type(node) is UnaryMinus:
+            value = self._dimension(node.value)
+            return None if value is None else -value
+        if type(node) is BinExpr and node.operator in {"+", "-", "*"}:
+            left = self._dimension(node.left)
+            right = self._dimension(node.right)
+            if left is None or right is None:
+                return None
+            if node.operator == "+":
+                return left + right
+            if node.operator == "-":
+                return left - right
+            if type(left) is int or type(right) is int:
+                return left * right
+
+        return None
+
+    def _integer(self, node, name="?"):
+        """Returns the integer or dimension an integer expression evaluates to, a new unknown when it cannot tell."""
+        value = self._dimension(node)
+        return value if value is not None else Dimension.of(Unknown(name))
+
     def visit_matrix_bin_expr(self, node: MatrixBinExpr):
         self.generic_visit(node)
 
@@ -227,13 +298,17 @@ class TypeChecker(NodeVisitor):
             if expr_type in possible_operations and node.operator in possible_operations[expr_type]:
                 if expr_type[0] == Type.UNKNOWN or expr_type[1] == Type.UNKNOWN:
                     node.type = Type.UNKNOWN
-                elif node.left.size == node.right.size:
-                    node.type = node.left.type
-                    node.size = node.left.size
-                else:
+                    return
+
+                same = self._unify(node.left.size, node.right.size)
+                if same is False:
                     node.type = Type.UNKNOWN
                     self._error(f"Incompatible sizes within operation: '{node.operator}'. Found: {node.left.size} and " +
                                 f"{node.right.size}, but they should be equal, {node.position}")
+                else:
+                    node.type = node.left.type
+                    node.size = node.left.size
+                    node.verified = same is True
             else:
                 node.type = Type.UNKNOWN
                 self._error("Matrix binary operations can be made only on matrices and vectors. " +
@@ -266,6 +341,9 @@ class TypeChecker(NodeVisitor):
             if expr_type not in possible_operations or node.operator not in possible_operations[expr_type]:
                 self._error("Incompatible types for comparison. " +
                             f"Left type: {node.left.type}, right type: {node.right.type}, {node.position}")
+            else:
+                # integers may turn into floats in loops, and floats do not work with strings
+                node.verified = Type.UNKNOWN not in expr_type and Type.STRING not in expr_type
 
         node.type = Type.BOOLEAN
 
@@ -294,6 +372,12 @@ class TypeChecker(NodeVisitor):
             node.type = symbol.type
             return
 
+        # indices written as numbers are checked against the size of the variable below
+        sizes = (symbol.size,) if symbol.type == Type.VECTOR else (symbol.height, symbol.width)
+        node.verified = static(*sizes) and all(self._is_slice_argument_literal(argument)
+                                               for argument in (node.slice_argument_1, node.slice_argument_2)
+                                               if argument)
+
         if node.slice_argument_1 and node.slice_argument_2:
             # sliced element must be 2D (a Matrix)
             if symbol.type != Type.MATRIX:
@@ -312,7 +396,7 @@ class TypeChecker(NodeVisitor):
     def _get_number_from_expression(expr):
         if type(expr) is UnaryMinus and type(expr.value.expression) is Number:
             return -expr.value.expression.number
-        elif type(expr.expression) is Number:
+        elif type(expr) is Expression and type(expr.expression) is Number:
             return expr.expression.number
         return None
 
@@ -324,14 +408,12 @@ class TypeChecker(NodeVisitor):
 
         return (from_idx, to_idx) if (from_idx is not None and to_idx is not None) else (None, None)
 
+    def _range_dimensions(self, slice_range: Range):
+        return self._integer(slice_range.from_index), self._integer(slice_range.to_index)
+
     def _visit_matrix_in_slice(self, node, symbol: MatrixSymbol):
         if node.slice_argument_1.type == Type.RANGE:
-
-            # gets indices if it's simple
-            from_idx, to_idx = self._get_indices_from_range(node.slice_argument_1.argument)
-            if from_idx is None or to_idx is None:
-                node.type = Type.UNKNOWN
-                return
+            from_idx, to_idx = self._range_dimensions(node.slice_argument_1.argument)
 
             if not (symbol.is_in(from_idx, 0, is_range=True) and symbol.is_in(to_idx, 0, is_range=True)):
                 self._error(f'Bad index {node.position}')
@@ -340,21 +422,17 @@ class TypeChecker(NodeVisitor):
             node.type = Type.MATRIX
             node.size = (to_idx - from_idx, symbol.width)
         elif node.slice_argument_1.type == Type.INTNUM:
-            if self._is_slice_argument_a_number(node.slice_argument_1):
-                idx = self._get_number_from_slice_argument(node.slice_argument_1)
-                if not symbol.is_in(idx, 0):
-                    self._error(f'Bad index {node.position}')
-                node.type = Type.VECTOR
-                node.size = symbol.width
+            idx = self._integer(node.slice_argument_1.argument)
+            if not symbol.is_in(idx, 0):
+                self._error(f'Bad index {node.position}')
+            node.type = Type.VECTOR
+            node.size = symbol.width
         else:
             node.type = Type.UNKNOWN
 
     def _visit_vector_in_slice(self, node, symbol: VectorSymbol):
         if node.slice_argument_1.type == Type.RANGE:
-            from_idx, to_idx = self._get_indices_from_range(node.slice_argument_1.argument)
-            if from_idx is None or to_idx is None:
-                node.type = Type.UNKNOWN
-                return
+            from_idx, to_idx = self._range_dimensions(node.slice_argument_1.argument)
 
             if not (symbol.is_in(from_idx, is_range=True) and symbol.is_in(to_idx, is_range=True)):
                 self._error(f'Bad index {node.position}')
@@ -363,85 +441,46 @@ class TypeChecker(NodeVisitor):
             node.type = Type.VECTOR
             node.size = to_idx - from_idx
         elif node.slice_argument_1.type == Type.INTNUM:
-            if self._is_slice_argument_a_number(node.slice_argument_1):
-                idx = self._get_number_from_slice_argument(node.slice_argument_1)
-                if not symbol.is_in(idx):
-                    self._error(f'Bad index {node.position}')
-                node.type = Type.UNKNOWN
+            idx = self._integer(node.slice_argument_1.argument)
+            if not symbol.is_in(idx):
+                self._error(f'Bad index {node.position}')
+            node.type = Type.UNKNOWN
         else:
             node.type = Type.UNKNOWN
 
     def _visit_matrix_in_slice_2d(self, node, symbol: MatrixSymbol):
-        if node.slice_argument_1.type == Type.RANGE:
-            # gets indices if it's simple
-            from_idx1, to_idx1 = self._get_indices_from_range(node.slice_argument_1.argument)
-            if from_idx1 is None or to_idx1 is None:
-                node.type = Type.UNKNOWN
-                return
-
-            if not (symbol.is_in(from_idx1, 0, is_range=True) and symbol.is_in(to_idx1, 0, is_range=True)):
-                self._error(f'Bad index {node.position}')
-                node.type = Type.UNKNOWN
-                return
-
-            if node.slice_argument_2.type == Type.RANGE:
-                # gets indices if it's simple
-                from_idx2, to_idx2 = self._get_indices_from_range(node.slice_argument_2.argument)
-                if from_idx1 is None or to_idx1 is None:
-                    node.type = Type.UNKNOWN
-                    return
-
-                if not (symbol.is_in(0, from_idx2, is_range=True) and symbol.is_in(0, to_idx2, is_range=True)):
+        sizes = []
+        for argument, axis_size in ((node.slice_argument_1, symbol.height), (node.slice_argument_2, symbol.width)):
+            if argument.type == Type.RANGE:
+                from_idx, to_idx = self._range_dimensions(argument.argument)
+                if not (within(from_idx, axis_size, is_range=True) and within(to_idx, axis_size, is_range=True)):
                     self._error(f'Bad index {node.position}')
                     node.type = Type.UNKNOWN
                     return
-
-                node.type = Type.MATRIX
-                node.size = (to_idx1 - from_idx1, to_idx2 - from_idx1)
-            elif node.slice_argument_2.type == Type.INTNUM:
-                if self._is_slice_argument_a_number(node.slice_argument_2):
-                    idx = self._get_number_from_slice_argument(node.slice_argument_2)
-                    if not symbol.is_in(0, idx):
-                        self._error(f'Bad index {node.position}')
-                        node.type = Type.UNKNOWN
-                        return
-                    node.type = Type.VECTOR
-                    node.size = to_idx1 - from_idx1
-                else:
-                    node.type = Type.UNKNOWN
-            else:
-                node.type = Type.UNKNOWN
-        elif node.slice_argument_1.type == Type.INTNUM:
-            if self._is_slice_argument_a_number(node.slice_argument_1):
-                idx = self._get_number_from_slice_argument(node.slice_argument_1)
-
-                if not symbol.is_in(idx, 0):
+                sizes.append(to_idx - from_idx)
+            elif argument.type == Type.INTNUM:
+                if not within(self._integer(argument.argument), axis_size):
                     self._error(f'Bad index {node.position}')
                     node.type = Type.UNKNOWN
                     return
-
-                if node.slice_argument_2.type == Type.RANGE:
-                    from_idx, to_idx = self._get_indices_from_range(node.slice_argument_2.argument)
-
-                    if not (symbol.is_in(0, from_idx, is_range=True) and symbol.is_in(0, to_idx, is_range=True)):
-                        self._error(f'Bad index {node.position}')
-                        node.type = Type.UNKNOWN
-                        return
-
-                    node.type = Type.VECTOR
-                    node.size = to_idx - from_idx
-                elif node.slice_argument_2.type == Type.INTNUM:
-                    if self._is_slice_argument_a_number(node.slice_argument_2):
-                        idx2 = self._get_number_from_slice_argument(node.slice_argument_2)
-                        if not symbol.is_in(0, idx2):
-                            self._error(f'Bad index {node.position}')
-                    node.type = Type.UNKNOWN
-                else:
-                    node.type = Type.UNKNOWN
             else:
                 node.type = Type.UNKNOWN
+                return
+
+        if len(sizes) == 2:
+            node.type = Type.MATRIX
+            node.size = tuple(sizes)
+        elif len(sizes) == 1:
+            node.type = Type.VECTOR
+            node.size = sizes[0]
         else:
-            node.type = Type.UNKNOWN
+            node.type = Type.UNKNOWN  # element of unknown type
+
+    @classmethod
+    def _is_slice_argument_literal(cls, slice_argument):
+        if slice_argument.type == Type.RANGE:
+            return None not in cls._get_indices_from_range(slice_argument.argument)
+        return cls._is_slice_argument_a_number(slice_argument)
 
     @staticmethod
     def _is_slice_argument_a_number(slice_argument):
@@ -493,28 +532,27 @@ class TypeChecker(NodeVisitor):
                 return
 
             size = node.right.size
-            self._put_symbol(node.left.slice_or_id, node.right.type, size)
+            self._put_symbol(node.left.slice_or_id, node.right.type, size, self._value(node))
 
         elif type(node.left.slice_or_id) is str:  # old id
             left = self.symbol_table.get(node.left.slice_or_id)
+            signature = symbol_signature(left)
             if node.operator == "=":
-                if left.type != node.right.type and self.symbol_table.is_conditional():
+                if signature != (node.right.type, node.right.size) and self.symbol_table.is_conditional():
                     self._put_symbol(node.left.slice_or_id, Type.UNKNOWN)
                 else:
                     size = node.right.size
-                    self._put_symbol(node.left.slice_or_id, node.right.type, size)
+                    self._put_symbol(node.left.slice_or_id, node.right.type, size, self._value(node))
             else:
                 # update symbol type
-                bad_types = {Type.MATRIX, Type.VECTOR}
-                if left.type in bad_types or node.right.type in bad_types:
-                    self._error(
-                        f"Invalid types in assign-binary expression. Left type: {left.type}, right type: {node.right.type}, " +
-                        f"{node.position}")
-                    node.type = Type.UNKNOWN
-                    return
-
+                array_types = {Type.MATRIX, Type.VECTOR}
                 if left.type == Type.UNKNOWN or node.right.type == Type.UNKNOWN:
                     left.type = Type.UNKNOWN
+                elif left.type in array_types or node.right.type in array_types:
+                    self.__check_array_compound(node, left)
+                elif node.operator.startswith("."):
+                    self._error(f"Invalid types in assign-binary expression. Left type: {left.type}, right type: {node.right.type}, " +
+                                f"{node.position}")
                 elif left.type == node.right.type:
                     pass
                 elif ({left.type, node.right.type} - {Type.FLOAT, Type.INTNUM}) == set():
@@ -523,6 +561,13 @@ class TypeChecker(NodeVisitor):
                     self._error(f"Invalid types in assign-binary expression. Left type: {left.type}, right type: {node.right.type}, " +
                                 f"{node.position}")
                     left.type = Type.UNKNOWN
+
+                if left.type == Type.INTNUM:
+                    left.value = self._value(node, left.value)
+
+            if self.symbol_table.is_loop() and changes_kind(signature,
+                                                             symbol_signature(self.symbol_table.get(node.left.slice_or_id))):
+                self.retyped += 1
         else:
             assert isinstance(node.left.slice_or_id, Slice)
 
@@ -530,9 +575,45 @@ class TypeChecker(NodeVisitor):
             if node.type in {Type.MATRIX, Type.VECTOR}:
                 node.size = node.left.size
 
-    def _put_symbol(self, name, type, size=None):
+    def __check_array_compound(self, node, left):
+        operator = node.operator[:-1]
+
+        if left.type == node.right.type and operator in {"+", "-", ".+", ".-", ".*", "./"}:  # element-wise
+            if self._unify(node.left.size, node.right.size) is False:
+                self._error(f"Incompatible sizes within operation: '{node.operator}'. Found: {node.left.size} and " +
+                            f"{node.right.size}, but they should be equal, {node.position}")
+        elif left.type == node.right.type == Type.MATRIX and operator == "*":
+            if self._unify(node.left.size[1], node.right.size[0]) is False:
+                self._error(f"Incompatible matrices sizes in matrix multiplication. " +
+                            f"Found {node.left.size} and {node.right.size}, {node.right.position}")
+            else:
+                size = (node.left.size[0], node.right.size[1])
+                if size != tuple(node.left.size) and self.symbol_table.is_conditional():
+                    self._put_symbol(node.left.slice_or_id, Type.UNKNOWN)  # like a conditional assignment
+                else:
+                    self._put_symbol(node.left.slice_or_id, Type.MATRIX, size)
+        else:
+            self._error(f"Invalid types in assign-binary expression. Left type: {left.type}, right type: {node.right.type}, " +
+                        f"{node.position}")
+            node.type = Type.UNKNOWN
+
+    def _value(self, node: AssignExpr, previous=None):
+        """Returns the integer or dimension assigned to an integer variable."""
+        if node.right.type != Type.INTNUM:
+            return None
+
+        name = node.left.slice_or_id
+        if node.operator == "=":
+            return self._integer(node.right, name)
+
+        right = self._dimension(node.right)
+        if previous is None or right is None or node.operator not in {"+=", "-="}:
+            return Dimension.of(Unknown(name))
+        return previous + right if node.operator == "+=" else previous - right
+
+    def _put_symbol(self, name, type, size=None, value=None):
         if type not in {Type.VECTOR, Type.MATRIX}:
-            self.symbol_table.put(name, VariableSymbol(name, type))
+            self.symbol_table.put(name, VariableSymbol(name, type, value))
         else:
             assert size, f"{name} {type}"
             if type == Type.VECTOR:
@@ -561,17 +642,31 @@ class TypeChecker(NodeVisitor):
             self._error(f"Statement '{node.instruction}' should be in a loop, {node.position}")
 
     def visit_for(self, node: For):
+        retyped = self.retyped
+        self.visit(node.loop_range)
+        block = self._enter_block(node.statement, loop=True)
         self.symbol_table.push_scope("for")  # not a real scope
-        self.symbol_table.put(node.iterator, VariableSymbol(node.iterator, Type.INTNUM))
-        self.generic_visit(node)
+        self.symbol_table.put(node.iterator, VariableSymbol(node.iterator, Type.INTNUM,
+                                                            Dimension.of(Unknown(node.iterator))))
+        self.visit(node.statement)
         self.symbol_table.pop_scope()
+        self._leave_block(block)
+
+        if self.retyped != retyped:  # the body was checked with types of the first iteration only
+            clear_verified(node)
 
         node.type = Type.NULL
 
     def visit_while(self, node: While):
+        retyped = self.retyped
+        block = self._enter_block(node, loop=True)
         self.symbol_table.push_scope("while")  # not a real scope
         self.generic_visit(node)
         self.symbol_table.pop_scope()
+        self._leave_block(block)
+
+        if self.retyped != retyped:  # the body was checked with types of the first iteration only
+            clear_verified(node)
 
         if node.condition.type is not Type.BOOLEAN:
             self._error(f"Loop condition should be a boolean value, {node.condition.position}")
@@ -580,7 +675,12 @@ class TypeChecker(NodeVisitor):
 
     def visit_if(self, node: If):
         self.symbol_table.push_scope("if")  # not a real scope
-        self.generic_visit(node)
+        self.visit(node.condition)
+        for statement in (node.if_statement, node.else_statement):
+            if statement:
+                block = self._enter_block(statement, loop=False)
+                self.visit(statement)
+                self._leave_block(block)
         self.symbol_table.pop_scope()
 
         if node.condition.type is not Type.BOOLEAN:
@@ -588,6 +688,69 @@ class TypeChecker(NodeVisitor):
 
         node.type = Type.NULL
 
+    def _enter_block(self, node, loop):
+        """
+        Starts checking a block which may run any number of times (`loop`) or not at all. Integers assigned in a
+        loop take many values, so they are unknown from its start.
+        """
+        names = assigned_names(node)
+        if loop:
+            self._forget_values(names)
+
+        return len(self.unified), names
+
+    def _leave_block(self, block):
+        """Forgets what depended on running the block: integers assigned in it and sizes unified in it."""
+        unified, names = block
+        for unknown in self.unified[unified:]:
+            unknown.value = None
+        del self.unified[unified:]
+
+        self._forget_values(names)
+
+    def _forget_values(self, names):
+        for name in names:
+            symbol = self.symbol_table.get(name)
+            if type(symbol) is VariableSymbol and symbol.type == Type.INTNUM:
+                symbol.value = Dimension.of(Unknown(name))
+
+    def visit_load(self, node: Load):
+        arguments = [argument for argument in (node.path, node.rows, node.columns) if argument]
+        for argument in arguments:
+            self.visit(argument)
+        node.type = Type.UNKNOWN
+
+        if any([self.__check_null(node, argument) for argument in arguments]):
+            return
+        if node.path.type not in {Type.STRING, Type.UNKNOWN}:
+            self._error(f"Path of a data file should be a string. Found: {node.path.type}, {node.position}")
+            return
+        for dimension in arguments[1:]:
+            if dimension.type not in {Type.INTNUM, Type.UNKNOWN}:
+                self._error(f"Size of a raw data file should be an integer. Found: {dimension.type}, {node.position}")
+                return
+
+        values = [literal_value(argument) for argument in arguments]
+        shape = None if values[0] in self.saved_paths or None in self.saved_paths else data_file_shape(*values)
+        if shape is not None and len(shape) == 1:
+            node.type = Type.VECTOR
+            node.size = shape[0]
+        elif shape is not None and len(shape) == 2:
+            node.type = Type.MATRIX
+            node.size = shape
+
+    def visit_save(self, node: Save):
+        self.visit(node.value)
+        self.visit(node.path)
+        node.type = Type.NULL
+
+        if self.__check_null(node, node.value) or self.__check_null(node, node.path):
+            return
+        if node.value.type not in {Type.VECTOR, Type.MATRIX, Type.UNKNOWN}:
+            self._error(f"Only vectors and matrices can be saved. Found: {node.value.type}, {node.position}")
+        if node.path.type not in {Type.STRING, Type.UNKNOWN}:
+            self._error(f"Path of a data file should be a string. Found: {node.path.type}, {node.position}")
+
     def visit_print(self, node: Print):
         self.visit(node.value)
         node.type = Type.NULL
@@ -597,6 +760,122 @@ class TypeChecker(NodeVisitor):
         self.correct = False
 
 
+def symbol_signature(symbol):
+    """Type and size of a variable, in the form they have in nodes."""
+    if symbol.type == Type.VECTOR:
+        return symbol.type, symbol.size
+    if symbol.type == Type.MATRIX:
+        return symbol.type, (symbol.height, symbol.width)
+
+    return symbol.type, None
+
+
+def assigned_names(node):
+    """Names of variables assigned in `node`."""
+    names = set()
+    if isinstance(node, AssignExpr) and type(node.left.slice_or_id) is str:
+        names.add(node.left.slice_or_id)
+
+    for child in node.children:
+        for element in (child if isinstance(child, list) else [child]):
+            if isinstance(element, Node):
+                names |= assigned_names(element)
+
+    return names
+
+
+def assigned_after_return(node):
+    """Names of variables assigned in `node` after its first return statement, which may end the program before them."""
+    names = set()
+    returned = False
+
+    def visit(node):
+        nonlocal returned
+        if isinstance(node, Return):
+            returned = True
+        elif returned and isinstance(node, AssignExpr) and type(node.left.slice_or_id) is str:
+            names.add(node.left.slice_or_id)
+
+        for child in node.children:
+            for element in (child if isinstance(child, list) else [child]):
+                if isinstance(element, Node):
+                    visit(element)
+
+    visit(node)
+    return names
+
+
+def changes_kind(signature, new_signature):
+    """Whether a variable changes its type or size, not counting changes between integers and floats."""
+    numbers = {Type.INTNUM, Type.FLOAT}
+    return signature != new_signature and not (signature[0] in numbers and new_signature[0] in numbers)
+
+
+def clear_verified(node):
+    for child in node.children:
+        if isinstance(child, list):
+            for element in child:
+                clear_verified(element)
+        elif isinstance(child, Node):
+            child.verified = False
+            clear_verified(child)
+
+
+def literal_value(node):
+    """Value of a string or number literal, None for other expressions."""
+    if type(node) == Expression:
+        if type(node.expression) is str:
+            return node.expression
+        if type(node.expression) == Number:
+            return node.expression.number
+
+    return None
+
+
+def saved_paths(node):
+    paths = set()
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, Save):
+            paths.add(literal_value(node.path))
+
+        for field in node.fields:
+            value = getattr(node, field)
+            nodes.extend([element for element in (value if isinstance(value, list) else [value])
+                          if isinstance(element, Node)])
+
+    return paths
+
+
+def data_file_shape(path, rows=None, columns=None):
+    """
+    Shape of the array a data file holds, read from the header of .npy files. Raw files hold float64
+    values, as a matrix of the given size or a vector. None if the shape is not known statically.
+    """
+    if path is None:
+        return None
+    if rows is not None or columns is not None:
+        return (rows, columns) if rows is not None and columns is not None else None
+
+    try:
+        if not path.endswith(".npy"):
+            return (os.path.getsize(path) // np.dtype(np.float64).itemsize,)
+
+        with open(path, "rb") as file:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(file)
+            elif version == (2, 0):
+                shape, _, _ = np.lib.format.read_array_header_2_0(file)
+            else:
+                return None
+    except (OSError, ValueError):
+        return None
+
+    return shape
+
+
 def to_snake_case(name):
     snake_case_name = ""
     for i in range(len(name)):
@@ -0,0 +1,73 @@
+from src.ast.ast import *
+from src.type_checker.node_visitor import NodeVisitor
+from src.interpreter.operations import bind_operation
+
+
+class Resolver(NodeVisitor):
+    """
+    Gives every variable a fixed slot in a flat frame and stores it in the `slot` field of
+    `SliceOrID`, `Slice`, `AssignExpr` and `For` nodes, so that engines never search for a name.
+    Cached values of `Invariant` nodes get slots as well.
+
+    A name can have at most one live binding at a time (assignment reuses the innermost existing
+    binding), so a single slot per name is enough. Scope lifetimes are handled by `Frame`.
+
+    Binary operations and comparisons verified by the type checker get the functions applying them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.slots = {}  # variable name (or `Invariant` node) -> slot index
+
+    def slot(self, name):
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def generic_visit(self, node: Node):
+        for child in node.children:
+            if isinstance(child, list):
+                for element in child:
+                    self.visit(element)
+            elif isinstance(child, Node):
+                self.visit(child)
+
+    def visit_program(self, node: Program):
+        self.generic_visit(node)
+        node.slot_count = len(self.slots)
+
+    def visit_slice(self, node: Slice):
+        self.generic_visit(node)
+        node.slot = self.slot(node.identifier)
+
+    def visit_slice_or_id(self, node: SliceOrID):
+        if isinstance(node.slice_or_id, Slice):
+            self.visit(node.slice_or_id)
+            node.slot = node.slice_or_id.slot
+        else:
+            node.slot = self.slot(node.slice_or_id)
+
+    def visit_assign_expr(self, node: AssignExpr):
+        self.generic_visit(node)
+        node.slot = node.left.slot
+
+    def visit_bin_expr(self, node: BinExpr):
+        self.generic_visit(node)
+        bind_operation(node)
+
+    def visit_compare_expr(self, node: CompareExpr):
+        self.generic_visit(node)
+        bind_operation(node)
+
+    def visit_invariant(self, node: Invariant):
+        self.generic_visit(node)
+        node.slot = self.slot(node)  # keyed by the node, so it cannot clash with variable names
+
+    def visit_for(self, node: For):
+        node.slot = self.slot(node.iterator)
+        self.generic_visit(node)
+
+
+def resolve(node: Program):
+    if node.slot_count is None:
+        Resolver().visit(node)
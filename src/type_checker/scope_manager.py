@@ -1,15 +1,169 @@
 from src.type_checker.variables_types import Type
 
 
+class Unknown:
+    """
+    Integer computed at runtime, e.g. the value of `n` after `n = n + 1` in a loop. Every
+    assignment gives a new unknown, so an unknown stands for one value wherever it is used.
+    Once the program checks at runtime that the unknown equals some dimension, `value` is set
+    to that dimension.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.value = None
+
+
+class Dimension:
+    """
+    Size depending on unknowns, a sum of their integer multiples and a constant, like `n - 1`
+    or `k + 2`. Arithmetic on dimensions and integers gives integers when all unknowns cancel out.
+    Dimensions are equal when they are provably equal for all values of the unknowns.
+    """
+
+    def __init__(self, terms, constant=0):
+        self.terms = terms  # unknown -> its nonzero multiplier
+        self.constant = constant
+
+    @staticmethod
+    def of(unknown):
+        return Dimension({unknown: 1})
+
+    @staticmethod
+    def make(terms, constant):
+        terms = {unknown: multiplier for unknown, multiplier in terms.items() if multiplier != 0}
+        return Dimension(terms, constant) if terms else constant
+
+    def normalized(self):
+        """Returns the dimension with the known values of unknowns substituted."""
+        terms = {}
+        constant = self.constant
+        for unknown, multiplier in self.terms.items():
+            value = unknown.value.normalized() if isinstance(unknown.value, Dimension) else unknown.value
+            if value is None:
+                terms[unknown] = terms.get(unknown, 0) + multiplier
+            elif isinstance(value, Dimension):
+                for other, other_multiplier in value.terms.items():
+                    terms[other] = terms.get(other, 0) + multiplier * other_multiplier
+                constant += multiplier * value.constant
+            else:
+                constant += multiplier * value
+
+        return Dimension.make(terms, constant)
+
+    def __add__(self, other):
+        if isinstance(other, Dimension):
+            terms = dict(self.terms)
+            for unknown, multiplier in other.terms.items():
+                terms[unknown] = terms.get(unknown, 0) + multiplier
+            return Dimension.make(terms, self.constant + other.constant)
+        if type(other) is int:
+            return Dimension.make(self.terms, self.constant + other)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return self * -1
+
+    def __sub__(self, other):
+        return self + -other
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if type(other) is int:
+            return Dimension.make({unknown: multiplier * other for unknown, multiplier in self.terms.items()},
+                                  self.constant * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return isinstance(other, (Dimension, int)) and difference(self, other) == 0
+
+    def __hash__(self):
+        value = self.normalized()
+        if isinstance(value, int):
+            return hash(value)
+        return hash((frozenset(value.terms.items()), value.constant))
+
+    def __repr__(self):
+        value = self.normalized()
+        if isinstance(value, int):
+            return str(value)
+
+        text = ""
+        for unknown, multiplier in value.terms.items():
+            sign = "-" if multiplier < 0 else "+"
+            factor = "" if abs(multiplier) == 1 else f"{abs(multiplier)}*"
+            text += f" {sign} {factor}{unknown.name}" if text else f"{'-' if multiplier < 0 else ''}{factor}{unknown.name}"
+        if value.constant:
+            text += f" {'-' if value.constant < 0 else '+'} {abs(value.constant)}"
+
+        return text
+
+
+def difference(first, second):
+    """Returns `first - second` as an integer, or None when it depends on unknowns."""
+    value = first - second
+    if isinstance(value, Dimension):
+        value = value.normalized()
+
+    return value if type(value) is int else None
+
+
+def unify(first, second):
+    """
+    Records that two dimensions are equal, which the program has just checked at runtime.
+    Returns the unknown whose value was set, or None when neither can be expressed by the other.
+    """
+    value = first - second
+    if not isinstance(value, Dimension):
+        return None
+
+    value = value.normalized()
+    if not isinstance(value, Dimension):
+        return None
+    for unknown, multiplier in value.terms.items():
+        if abs(multiplier) == 1:
+            # unknown * multiplier + rest = 0
+            unknown.value = (Dimension.make({other: other_multiplier for other, other_multiplier in value.terms.items()
+                                             if other is not unknown}, value.constant) * -multiplier)
+            return unknown
+
+    return None
+
+
+def within(index, size, is_range=False):
+    """Whether the index may be in bounds, false only when it is out of bounds for sure."""
+    above_start = index if type(index) is int else None
+    below_end = difference(size, index)
+
+    if above_start is not None and above_start < 0:
+        return False
+    if below_end is not None and (below_end < 0 if is_range else below_end <= 0):
+        return False
+
+    return True
+
+
+def static(*sizes):
+    """Whether all the sizes are integers, known before execution."""
+    return all(type(size) is int for size in sizes)
+
+
 class Symbol:
     name = None
     type = None
 
 
 class VariableSymbol(Symbol):
-    def __init__(self, name, symbol_type):
+    def __init__(self, name, symbol_type, value=None):
         self.name = name
         self.type = symbol_type
+        self.value = value  # integer or dimension the variable holds, if it is an integer
 
 
 class VectorSymbol(Symbol):
@@ -19,10 +173,7 @@ class VectorSymbol(Symbol):
         self.size = size
 
     def is_in(self, idx, is_range=False):
-        if is_range:
-            return 0 <= idx <= self.size
-        else:
-            return 0 <= idx < self.size
+        return within(idx, self.size, is_range)
 
 
 class MatrixSymbol(Symbol):
@@ -33,10 +184,7 @@ class MatrixSymbol(Symbol):
         self.height = height
 
     def is_in(self, height_idx, width_idx, is_range=False):
-        if is_range:
-            return 0 <= width_idx <= self.width and 0 <= height_idx <= self.height
-        else:
-            return 0 <= width_idx < self.width and 0 <= height_idx < self.height
+        return within(height_idx, self.height, is_range) and within(width_idx, self.width, is_range)
 
 
 class SymbolTable(object):
@@ -82,7 +230,7 @@ class SymbolTable(object):
 
     def is_conditional(self):
         for name, _ in self.scopes:
-            if name in {"while", "if"}:
+            if name in {"for", "while", "if"}:
                 return True
 
         return False
@@ -15,18 +15,29 @@ class Type(Enum):
 
     @staticmethod
     def get_type(obj):
-        obj_type = type(obj)
-        if obj_type is int:
-            return Type.INTNUM
-        if obj_type is float:
-            return Type.FLOAT
-        if obj_type is str:
-            return Type.STRING
-        if isinstance(obj, np.ndarray):
-            if len(obj.shape) == 1:
-                return Type.VECTOR
-            else:
-                return Type.MATRIX
-        if obj_type is list:
-            return Type.VECTOR
-        return Type.UNKNOWN
+        value_type = value_types.get(type(obj))
+        if value_type is None:
+            value_type = classify(type(obj))
+        if value_type is array:
+            return Type.VECTOR if obj.ndim == 1 else Type.MATRIX
+        return value_type
+
+
+array = object()  # marks classes of arrays, whose type depends on the number of dimensions
+
+# Python class of a value -> its type, filled in by `classify` for classes met for the first time
+value_types = {int: Type.INTNUM, float: Type.FLOAT, str: Type.STRING, list: Type.VECTOR, np.ndarray: array}
+
+
+def classify(value_class):
+    if issubclass(value_class, np.integer):  # elements of vectors and matrices
+        value_type = Type.INTNUM
+    elif issubclass(value_class, np.floating):
+        value_type = Type.FLOAT
+    elif issubclass(value_class, np.ndarray):  # e.g. np.memmap
+        value_type = array
+    else:
+        value_type = Type.UNKNOWN
+
+    value_types[value_class] = value_type
+    return value_type
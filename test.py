@@ -1,5 +1,6 @@
 import os
 import pytest
+import numpy as np
 
 
 def check_parser(parser, scanner, text, capfd, filename):
@@ -26,3 +27,797 @@ def test_parser(capfd):
                 check_parser(parser, scanner, text, capfd, filename)
         else:
             check_parser(parser, scanner, text, capfd, filename)
+
+
+def test_parser_tables(tmp_path, monkeypatch):
+    from src.parser import tables
+
+    def remove(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(tables, "directory", str(tmp_path))
+    (tmp_path / "parsetab_0123456789ab.py").write_text("stale")
+    (tmp_path / f"parsetab_{tables.version}.py").write_text("broken = ")
+    monkeypatch.setattr(tables.os, "remove", remove)  # read-only directory, or removed by another process
+
+    assert tables.table("parsetab") == f"{tables.missing_package}.parsetab_{tables.version}"
+
+
+def run_program(engine, text, capfd, transform=None):
+    from src.parser import parser as parser_module
+    from src.scanner import scanner
+    from src.type_checker.node_visitor import TypeChecker
+    from src.core.main import engines
+    from src.interpreter.exceptions import ProgramRuntimeError
+
+    scanner.lexer.lineno = 1
+    try:
+        ast = parser_module.parser.parse(text, lexer=scanner.lexer)
+    except SyntaxError as error:
+        return error.msg
+
+    type_checker = TypeChecker()
+    type_checker.visit(ast)
+
+    if type_checker.correct:
+        if transform is not None:
+            ast = transform(ast)
+        try:
+            engines[engine]().run(ast)
+        except ProgramRuntimeError as error:
+            print(error)
+
+    out, err = capfd.readouterr()
+    return out
+
+
+def test_engines(capfd):
+    from src.core.main import engines
+
+    example_dir = "examples"
+
+    for filename in os.listdir(example_dir):
+        filename = os.path.join(example_dir, filename)
+        if "error" in filename or "interpreter_example_3" in filename:
+            continue
+
+        text = open(filename, "r").read()
+        expected = run_program("interpreter", text, capfd)
+
+        for engine in engines:
+            assert run_program(engine, text, capfd) == expected, f"Engine {engine} failed on {filename}"
+
+
+def test_vectorizer(capfd):
+    from src.core.main import engines
+    from src.optimizer.vectorizer import LoopVectorizer
+
+    text = """
+    A = [1, 2, 3, 4, 5, 6];
+    B = [1.5, 2.5, 3.5, 4.5, 5.5, 6.5];
+    C = zeros(4);
+    k = 2;
+    for i = 0:6 A[i] = B[i] * 2 + i;
+    for i = 1:5 { B[i] = B[i - 1] + A[i]; }
+    for i = 0:4 { C[i, k] = i * 3; C[i, i] = -1; C[1, i] += 0.5; }
+    for j = 0:5 { A[j + 1] = A[j] / B[j]; }
+    i = 7;
+    for i = 0:3 A[i] = 1;
+    print A, B, C, i;
+    for q = 0:9 A[q] = 0;
+    """
+    expected = run_program("interpreter", text, capfd)
+
+    vectorizer = LoopVectorizer()
+    for engine in engines:
+        assert run_program(engine, text, capfd, vectorizer.visit) == expected, f"Engine {engine} failed"
+    assert vectorizer.vectorized == 3 * len(engines)
+
+
+def test_scalar_loops(capfd):
+    from src.core.main import engines
+    from src.optimizer.scalar_loop import ScalarLoopSpecializer
+
+    text = """
+    x = 0;
+    s = 0.0;
+    i = 10;
+    for i = 1:6 {
+        for j = 0:i {
+            if (j == 3) {
+                continue;
+            }
+            s += j / i;
+            x += 1;
+        }
+        if (s > 2) {
+            break;
+        } else {
+            x = x * 2;
+        }
+    }
+    k = 2;
+    for m = 0:4 { k = k * k * k; }
+    print x, s, i, k;
+    for m = 0:4 { A = ones(2); }
+    """
+    expected = run_program("interpreter", text, capfd)
+    assert expected == "25, 2.25, 4, 2417851639229258349412352\n"
+
+    specializer = ScalarLoopSpecializer()
+    for engine in engines:
+        assert run_program(engine, text, capfd, specializer.visit) == expected, f"Engine {engine} failed"
+    assert specializer.specialized == 2 * len(engines)
+
+    # t is forgotten at the end of the first branch, so the kernel does not run and the loop fails
+    text = "s = 0; for k = 0:3 { if (k == 0) { t = 5; } else { s = t; } } print s;"
+    for engine in engines:
+        assert run_program(engine, text, capfd, ScalarLoopSpecializer().visit) == \
+               "Runtime error: Uninitialized variable `t`, line 1, column 58\n", f"Engine {engine} failed"
+
+    # the kernel gives up and the loop raises the error itself
+    text = "x = 0; for i = 0:3 { x = x + 1 / (1 - i); } print x;"
+    for engine in engines:
+        assert run_program(engine, text, capfd, ScalarLoopSpecializer().visit) == \
+               "Runtime error: division by zero, line 1, column 42\n", f"Engine {engine} failed"
+
+
+def test_value_types(tmp_path):
+    from src.type_checker.variables_types import Type
+    from src.interpreter.operations import operation_table
+
+    mapped = np.memmap(tmp_path / "m.dat", dtype=np.float64, mode="w+", shape=(2, 3))
+    values = [(1, Type.INTNUM), (np.int32(1), Type.INTNUM), (1.5, Type.FLOAT), (np.float32(1), Type.FLOAT),
+              ("a", Type.STRING), (np.ones(2), Type.VECTOR), (["a"], Type.VECTOR), (np.ones((2, 2)), Type.MATRIX),
+              (mapped, Type.MATRIX), (mapped[0], Type.VECTOR), (True, Type.UNKNOWN), (None, Type.UNKNOWN)]
+    for _ in range(2):  # classes met for the first time, then looked up
+        assert [Type.get_type(value) for value, _ in values] == [value_type for _, value_type in values]
+
+    assert operation_table[Type.MATRIX, Type.MATRIX, "*"](np.eye(2), np.ones((2, 1))).shape == (2, 1)
+    assert operation_table[Type.STRING, Type.INTNUM, "*"]("ab", 2) == "abab"
+    assert (Type.VECTOR, Type.VECTOR, "*") not in operation_table
+
+
+def test_operation_binding(capfd):
+    import operator
+    from src.core.main import engines
+    from src.scanner import scanner
+    from src.parser import parser
+    from src.type_checker.node_visitor import TypeChecker
+    from src.type_checker.resolver import Resolver
+    from src.optimizer.transformer import walk
+    from src.ast.ast import BinExpr, CompareExpr
+
+    text = """
+    A = eye(2) * ones(2);
+    x = 3 * 1.5;
+    s = "ab" * 2;
+    if (x < 5) {
+        print A, x, s;
+    }
+    """
+    scanner.lexer.lineno = 1
+    ast = parser.parser.parse(text, lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+    Resolver().visit(ast)
+    operations = [node.operation for node in walk(ast) if isinstance(node, (BinExpr, CompareExpr))]
+    assert operations == [operator.matmul, operator.mul, None, operator.lt]  # strings are checked at runtime
+
+    expected = run_program("interpreter", text, capfd)
+    assert expected.endswith("4.5, abab\n")
+    for engine in engines:
+        assert run_program(engine, text, capfd) == expected, f"Engine {engine} failed"
+
+
+def test_constant_folder(capfd):
+    from src.core.main import engines
+    from src.ast.ast import AssignExpr, Constant, Expression, If, MatrixBinExpr, While
+    from src.optimizer.constant_folder import ConstantFolder
+    from src.optimizer.transformer import walk
+    from src.optimizer.vectorizer import unwrap
+
+    text = """
+    y = 2 * 3 + -1;
+    B = eye(3);
+    for i = 0:3 {
+        C = ones(3) .+ B;
+        D = zeros(3);
+        D[1, 1] = i;
+        print C, D;
+    }
+    if (1 < 2) { z = 1; print z; } else { print "never"; }
+    if (1 > 2) print "no";
+    if (1 == 2) print "no"; else print "else";
+    while (1 > 2) { print "loop"; }
+    print y, [1, 2, 3] .* [2, 2, 2];
+    """
+    expected = run_program("interpreter", text, capfd)
+
+    trees = []
+
+    def fold(ast):
+        trees.append(ConstantFolder().visit(ast))
+        return trees[-1]
+
+    for engine in engines:
+        assert run_program(engine, text, capfd, fold) == expected, f"Engine {engine} failed"
+
+    nodes = list(walk(trees[-1]))
+    assert not any(isinstance(node, (If, While)) for node in nodes)
+    assert {node.expression for node in nodes if isinstance(node, Expression) and type(node.expression) is str} == \
+           {"else"}
+    values = {node.left.slice_or_id: unwrap(node.right) for node in nodes
+              if isinstance(node, AssignExpr) and type(node.left.slice_or_id) is str}
+    assert (values["y"].number, values["z"].number) == (5, 1)
+    assert np.array_equal(values["B"].value, np.eye(3)) and np.array_equal(values["D"].value, np.zeros((3, 3)))
+    assert isinstance(values["C"], MatrixBinExpr) and np.array_equal(unwrap(values["C"].left).value, np.ones((3, 3)))
+    assert [2, 4, 6] in [node.value.tolist() for node in nodes if isinstance(node, Constant)]
+
+    # matrices of invalid or huge constant sizes are left to the branches which may never make them
+    text = """
+    x = 1.0;
+    if (x > 100.0) {
+        A = ones(-1);
+        B = ones(200000);
+    }
+    print x;
+    """
+    folder = ConstantFolder()
+    assert run_program("interpreter", text, capfd, folder.visit) == "1.0\n"
+    assert folder.folded == 1  # only -1
+
+
+def test_invariant_motion(capfd):
+    from src.core.main import engines
+    from src.optimizer.invariant_motion import LoopInvariantMover
+
+    text = """
+    n = 3;
+    A = ones(n);
+    B = eye(n);
+    for i = 0:2 {
+        D = A' * B;
+        D[0, 0] = i;
+        G = zeros(n);
+        print D, G .+ ones(n);
+    }
+    X = A;
+    k = 0;
+    while (k < 2) {
+        X[0, 1] = k;
+        print A * B;
+        k += 1;
+    }
+    for i = 0:3 {
+        if (i == 2) break;
+        H = A * B;
+        H[i, i] = 5;
+        print H;
+    }
+    """
+    expected = run_program("interpreter", text, capfd)
+
+    for engine in engines:
+        mover = LoopInvariantMover()
+        assert run_program(engine, text, capfd, mover.visit) == expected, f"Engine {engine} failed"
+        assert mover.hoisted == 2
+
+    text = """
+    V = ["a", "b"];
+    s = V[0];
+    y = "";
+    for i = 0:3 {
+        y = s + s;
+    }
+    print y;
+    """
+    for engine in engines:
+        mover = LoopInvariantMover()
+        assert run_program(engine, text, capfd, mover.visit) == "aa\n", f"Engine {engine} failed"
+        assert mover.hoisted == 0
+
+
+def test_compound_assignment(capfd):
+    from src.core.main import engines
+
+    text = """
+    A = ones(3);
+    X = A;
+    A += eye(3);
+    A .*= A;
+    M = zeros(4);
+    M[1:3, 2] += [5, 6];
+    M[0, 0:4] .-= [1.5, 2.5, 3.5, 4.5];
+    V = [1, 2, 3];
+    V ./= [2, 2, 2];
+    print A, X, M, V;
+    """
+    expected = run_program("interpreter", text, capfd)
+    assert expected == str(np.full((3, 3), 1.0) + 3 * np.eye(3)) + ", " + str(np.full((3, 3), 1.0) + 3 * np.eye(3)) + \
+        ", " + str(np.array([[-1.5, -2.5, -3.5, -4.5], [0, 0, 5, 0], [0, 0, 6, 0], [0, 0, 0, 0]])) + ", [0.5 1.  1.5]\n"
+
+    for engine in engines:
+        assert run_program(engine, text, capfd) == expected, f"Engine {engine} failed"
+
+    # whether the alias X of the target changes with it
+    cases = [("ones(2)", "+=", "eye(2)", True),
+             ("ones(2)", "-=", "eye(2)", True),
+             ("ones(2)", ".+=", "eye(2)", True),
+             ("ones(2)", ".-=", "eye(2)", True),
+             ("ones(2)", ".*=", "zeros(2)", True),
+             ("ones(2)", "./=", "ones(2) .+ ones(2)", True),
+             ("ones(2)", "*=", "zeros(2)", False),
+             ("[1, 2]", "+=", "[1, 1]", True),
+             ("[1, 2]", ".+=", "[0.5, 0.5]", False),
+             ("[1, 2]", "./=", "[2, 2]", False)]
+    for value, operator, operand, aliased in cases:
+        text = f"A = {value}; X = A; A {operator} {operand}; print A; print X; print {value};"
+        for engine in engines:
+            lines = run_program(engine, text, capfd).splitlines()
+            a, x, original = (lines[i * len(lines) // 3:(i + 1) * len(lines) // 3] for i in range(3))
+            assert a != original and x == (a if aliased else original), f"Engine {engine} failed on {text}"
+
+
+def test_fusion(capfd, monkeypatch):
+    from src.core.main import engines
+    from src.interpreter import operations
+    from src.optimizer.fusion import ElementwiseFuser
+
+    text = """
+    n = 3;
+    A = ones(n);
+    B = eye(n);
+    C = [[1, 2, 3], [4, 5, 6], [7, 8, 9]];
+    E = [[2, 2, 2], [2, 2, 2], [2, 2, 2]];
+    print A .+ B .- C .* E, (C .* E) ./ (E .+ E) .- C, C .* E .- E;
+    print [1, 2, 3] ./ [2, 2, 2] .+ [1, 1, 1];
+    X = zeros(C[0, 1]);  # size unknown before execution
+    print A .+ A .* X;
+    """
+    expected = run_program("interpreter", text, capfd)
+
+    monkeypatch.setattr(operations, "fused_block_size", 4)
+    for engine in engines:
+        fuser = ElementwiseFuser()
+        assert run_program(engine, text, capfd, fuser.visit) == expected, f"Engine {engine} failed"
+        assert fuser.fused == 5
+
+
+def test_matrix_chain(capfd):
+    from src.core.main import engines
+    from src.interpreter.operations import matrix_chain_order
+    from src.optimizer.matrix_chain import MatrixChainOrderer
+
+    assert matrix_chain_order([10, 100, 5, 50])[0][2] == 1  # (A * B) * C
+    assert matrix_chain_order([5, 5, 5, 5, 1])[0][3] == 0   # A * (B * (C * v))
+    assert matrix_chain_order([5, 5, 5, 5, 1])[1][3] == 1
+
+    text = """
+    A = [[1, 2, 3], [4, 5, 6]];
+    B = [[1, 0], [0, 1], [1, 1]];
+    C = [[2, 1], [1, 2]];
+    v = [[1], [2]];
+    n = 2;
+    E = eye(n);
+    print A * B * C * v, (A * B) * (C * v), E * E * C * v;
+    x = 2;
+    print x * 3 * 4, "ab" * 2;
+    G = ones(C[0, 0] + 1);  # size unknown before execution
+    print E * E * G;
+    """
+    expected = run_program("interpreter", text, capfd)
+
+    for engine in engines:
+        orderer = MatrixChainOrderer()
+        assert run_program(engine, text, capfd, orderer.visit) == expected, f"Engine {engine} failed"
+        assert (orderer.chains, orderer.static) == (4, 3)
+
+
+def test_frame_scopes():
+    from src.interpreter.memory import Frame
+
+    frame = Frame()
+    frame.resize(2)
+    frame.set(0, 1)
+    frame.push("if")
+    frame.set(0, 2)
+    frame.set(1, 3)
+    frame.pop()
+
+    assert frame.values == [2, None]
+
+
+def test_ast_cache(capfd, tmp_path):
+    from src.parser import parser as parser_module
+    from src.scanner import scanner
+    from src.type_checker.node_visitor import TypeChecker
+    from src.core.cache import ASTCache, front_end_files
+
+    # sizes and symbols of the type checker are pickled with the ASTs
+    assert {"type_checker/node_visitor.py", "type_checker/scope_manager.py"} <= set(front_end_files)
+
+    text = """
+    A = ones(3);
+    A .*= A .+ eye(3);
+    print A, A[0, 0] + 1;
+    """
+    expected = run_program("interpreter", text, capfd)
+
+    cache = ASTCache(str(tmp_path))
+    assert cache.load(text) is None
+
+    scanner.lexer.lineno = 1
+    ast = parser_module.parser.parse(text, lexer=scanner.lexer)
+    TypeChecker().visit(ast)
+    cache.store(text, ast)
+
+    assert run_program("interpreter", text, capfd, lambda _: cache.load(text)) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.version = "changed front end"
+    assert cache.load(text) is None
+    cache.store(text, ast)
+    assert len(os.listdir(tmp_path)) == 2
+
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (0, 0))
+    cache.evict()
+    assert os.listdir(tmp_path) == [] and cache.evicted == 2
+
+
+def test_batch(tmp_path):
+    from src.core.batch import expand, run_batch
+
+    programs = {"a.txt": "x = 1; print x;",
+                "b.txt": "A = ones(2); for n = 5:6 { print A[n, 0]; }",
+                "c.txt": "x = ;",
+                "d.txt": "print x;",
+                "e.txt": "y = 2; print y;",
+                "f.txt": "x = 1 / 0;",
+                "g.txt": "V = [1, 2, 3, 4]; V[0:2] = [1, 2, 3];"}
+    for name, text in programs.items():
+        (tmp_path / name).write_text(text)
+
+    results = run_batch(expand([str(tmp_path)]) + [str(tmp_path / "missing.txt")])
+
+    assert [result.status for result in results] == ["ok", "runtime error", "syntax error", "type error", "ok",
+                                                     "runtime error", "runtime error", "cannot open"]
+    assert results[0].output == "1\n" and results[4].output == "2\n"
+    assert results[1].output.startswith("Runtime error")
+    assert type(results[1].error).__name__ == "IndexOutOfBoundsError"
+    assert results[1].error.position == "line 1, column 42"
+    assert results[5].output.startswith("Runtime error") and results[6].output.startswith("Runtime error")
+
+    parallel = run_batch(expand([str(tmp_path)]), jobs=2)
+    assert [(result.status, result.output) for result in parallel] == \
+           [(result.status, result.output) for result in results[:-1]]
+
+
+def test_server(tmp_path):
+    import time
+    import signal
+    import threading
+    from concurrent.futures.process import BrokenProcessPool
+    from src.core.server import create_server
+    from src.core.client import Client
+
+    socket_path = str(tmp_path / "server.sock")
+    server = create_server(socket_path, workers=1)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    try:
+        with Client(socket_path) as client:
+            response = client.run("A = eye(2); print A[1, 1]; return A;", engine="vm")
+            assert (response["status"], response["output"], response["value"]) == \
+                   ("ok", "1.0\n", [[1.0, 0.0], [0.0, 1.0]])
+
+            response = client.run("A = ones(2); for n = 3:4 { print A[n, 0]; }")
+            assert response["status"] == "runtime error"
+            assert response["error"]["kind"] == "IndexOutOfBoundsError"
+
+            assert client.request({"engine": "vm"})["status"] == "bad request"
+            assert client.metrics()["requests"] == 3
+
+            # a worker killed while running a program breaks the pool, which is replaced
+            worker = next(iter(server.executor._processes.values()))
+            threading.Timer(0.5, os.kill, (worker.pid, signal.SIGKILL)).start()
+            response = client.run("x = 0; while (x >= 0) { x += 1; }")
+            assert (response["status"], response["error"]["kind"]) == ("runtime error", "BrokenProcessPool")
+            assert client.run("print 1;")["output"] == "1\n"
+
+            # a worker killed between requests breaks the pool before the next one is submitted
+            executor = server.executor
+            worker = next(iter(executor._processes.values()))
+            os.kill(worker.pid, signal.SIGKILL)
+            worker.join()
+            with pytest.raises(BrokenProcessPool):
+                for _ in range(100):
+                    executor.submit(int).result()
+                    time.sleep(0.01)
+            response = client.run("x = 1;")
+            assert (response["status"], response["error"]["kind"]) == ("runtime error", "BrokenProcessPool")
+            assert client.run("print 2;")["output"] == "2\n"
+            assert client.metrics()["errors"] == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_session(capfd):
+    from src.core.main import engines
+    from src.core.session import Session
+    from src.interpreter.exceptions import ProgramRuntimeError, ShapeMismatchError
+
+    for engine in engines:
+        session = Session(engine)
+        assert session.run("A = ones(3); B = A .+ A; print B[0, 0];") == (True, None)
+        A = session.frame.values[session.resolver.slots["A"]]
+
+        assert session.run("C = A + 1;")[0] is False  # not run, so C stays undefined
+        assert session.run("print C;")[0] is False
+        assert session.run("A .+= B; return A[0, 0];") == (True, 3.0)
+        assert session.frame.values[session.resolver.slots["A"]] is A
+
+        # the runtime error leaves A with another size than checked, so it is checked again at runtime
+        with pytest.raises(ProgramRuntimeError):
+            session.run("A = ones(2); for i = 3:4 { print B[i, 0]; }")
+        with pytest.raises(ShapeMismatchError):
+            session.run("print A .+ B;")
+
+        # the return ends the piece before D is assigned and s reassigned, so their types are not trusted
+        assert session.run('s = "ab"; x = 1; return x; D = ones(3); s = eye(2);') == (True, 1)
+        with pytest.raises(ProgramRuntimeError):
+            session.run("print D[0, 0];")
+        with pytest.raises(ProgramRuntimeError):
+            session.run("print s[0, 0];")
+        assert session.run("x += 1; if (x > 0) return x; E = ones(2);") == (True, 2)
+        with pytest.raises(ProgramRuntimeError):
+            session.run("print E[0, 0];")
+
+        out, err = capfd.readouterr()
+        assert out.startswith("2.0\n"), f"Engine {engine} failed"
+
+
+def test_output(capfd):
+    import io
+    from src.core.main import engines, run
+    from src.interpreter.output import TextSink, StructuredSink, BinarySink
+    from src.interpreter.exceptions import ProgramRuntimeError
+
+    text = """
+    A = [[1.5, 2.0], [3.0, 4.0]];
+    for i = 0:2 {
+        print A, i;
+    }
+    A .*= A;
+    print A;
+    for n = 5:6 {
+        print A[n, 0];
+    }
+    """
+    expected = run_program("interpreter", text, capfd)
+    assert expected.endswith("line 9, column 23\n")
+
+    for engine in engines:
+        with pytest.raises(ProgramRuntimeError):
+            run(text, engine, print_tree=False, output=TextSink(buffer_size=10 ** 6))
+        assert capfd.readouterr()[0] + "Runtime error: index 5 is out of bounds for axis 0 with size 2, " \
+                                       "line 9, column 23\n" == expected, f"Engine {engine} failed"
+
+    stream = io.StringIO()
+    run(text.replace("A[n, 0]", "A[1, 0]"), print_tree=False, output=StructuredSink(stream, print_options={}))
+    assert stream.getvalue().splitlines()[-2:] == ["[[[2.25, 4.0], [9.0, 16.0]]]", "[9.0]"]
+
+    stream = io.TextIOWrapper(io.BytesIO())
+    sink = BinarySink(stream)
+    run("print [[1, 2]], 3; print 0.5;", print_tree=False, output=sink)
+    stream.buffer.seek(0)
+    assert np.load(stream.buffer).tolist() == [[1, 2]]
+    assert [np.load(stream.buffer).item() for _ in range(2)] == [3, 0.5]
+
+    sink = TextSink(io.StringIO(), print_options={"precision": 1})
+    A = np.array([[1.25, 2.0]])
+    sink.write([A])
+    sink.write([A])
+    A *= 2  # changed in place, the cached text is not reused
+    sink.write([A])
+    sink.flush()
+    assert sink.stream.getvalue() == "[[1.2 2. ]]\n[[1.2 2. ]]\n[[2.5 4. ]]\n"
+
+
+def test_runtime_errors():
+    from src.core.main import engines, run
+    from src.interpreter.exceptions import ArithmeticOperationError, ShapeMismatchError, OperandTypeError, \
+        MatrixSizeError
+
+    programs = [("x = 2; y = 0; print x / y;", ArithmeticOperationError, "line 1, column 27"),
+                ("x = 2.0; x /= 0;", ArithmeticOperationError, "line 1, column 18"),
+                ("V = [1, 2, 3, 4]; V[0:2] = [1, 2, 3];", ShapeMismatchError, "line 1, column 39"),
+                ("V = [1, 2, 3, 4]; V[0] = \"a\";", OperandTypeError, "line 1, column 31"),
+                ("x = -1; A = ones(x);", MatrixSizeError, "line 1, column 21"),
+                ("x = 200000; A = ones(x);", MatrixSizeError, "line 1, column 25"),
+                ("x = 1099511627776; A = eye(x);", MatrixSizeError, "line 1, column 31")]
+    for text, error_class, position in programs:
+        for engine in engines:
+            for optimize in (False, True):
+                with pytest.raises(error_class) as error:
+                    run(text, engine, optimize, print_tree=False)
+                assert error.value.position == position, f"Engine {engine} failed on {text}"
+
+
+def test_data_files(capfd, tmp_path):
+    from src.core.main import engines
+
+    np.save(tmp_path / "matrix.npy", np.arange(12.0).reshape(3, 4))
+    np.arange(6.0).tofile(tmp_path / "raw.bin")
+
+    text = """
+    A = load("{0}/matrix.npy");
+    print A[1, 2], A[0:2, 1:3];
+    A[0, 0] = 100;
+    R = load("{0}/raw.bin", 2, 3);
+    print R * A[0:3, 0:2], load("{0}/raw.bin");
+    save(A .+ A, "{0}/out.npy");
+    print load("{0}/out.npy");
+    save(R, "{0}/raw.bin");
+    print A * R;
+    """.format(tmp_path)
+    expected = run_program("interpreter", text, capfd)
+    assert expected.startswith("6.0, [[1. 2.]\n [5. 6.]]\n")
+    assert expected.endswith("Runtime error: incompatible matrices sizes in matrix multiplication. "
+                             "Found (3, 4) and (2, 3), line 10, column 17\n")
+
+    for engine in engines:
+        assert run_program(engine, text, capfd) == expected, f"Engine {engine} failed"
+    assert np.load(tmp_path / "matrix.npy")[0, 0] == 0  # mapped copy-on-write
+
+    assert run_program("interpreter", f'A = load("{tmp_path}/matrix.npy"); B = A * ones(3);', capfd).startswith(
+        "Incompatible matrices sizes in matrix multiplication. Found (3, 4) and (3, 3)")  # read from the header
+
+
+def test_out_of_core(capfd, tmp_path, monkeypatch):
+    from src.core.main import engines
+    from src.core.session import Session
+    from src.interpreter import operations
+    from src.interpreter.exceptions import ShapeMismatchError
+
+    monkeypatch.setattr(operations, "out_of_core_size", 1000)
+    monkeypatch.setattr(operations, "out_of_core_block_size", 70)
+    A = np.lib.format.open_memmap(tmp_path / "A.npy", mode="w+", dtype=np.float64, shape=(40, 30))
+    A[:] = np.arange(1200).reshape(40, 30)
+    B = np.memmap(tmp_path / "B.bin", dtype=np.int64, mode="w+", shape=(40, 30))
+    B[:] = 3
+
+    mapped = []
+    mapped_array = operations.mapped_array
+    monkeypatch.setattr(operations, "mapped_array", lambda *arguments: mapped.append(arguments) or
+                        mapped_array(*arguments))
+
+    for engine in engines:
+        for optimize in (False, True):
+            session = Session(engine, optimize)
+            session.bind("A", A)
+            session.bind("B", B)
+            session.bind("n", 29)
+
+            correct, value = session.run("C = A .+ B .* B ./ B; return C .- A .* B;")
+            assert correct and isinstance(value, np.memmap), f"Engine {engine} failed"
+            assert np.array_equal(value, (A + B * B / B) - A * B)
+            assert session.run("return A[1, 2] + B[1, 2] + n;") == (True, 64.0)
+
+            if engine == "interpreter" or optimize:  # other engines check each operation before computing it
+                mapped.clear()
+                with pytest.raises(ShapeMismatchError):
+                    session.run("E = A[0:B[0, 0] + 36, 0:30]; return (A .+ B) .* E;")
+                assert not mapped, f"Engine {engine} failed"
+
+
+def test_profiler(capfd):
+    from src.core.main import run
+    from src.interpreter.profiler import Profiler
+
+    text = """
+    A = ones(100);
+    for i = 0:10 {
+        A = A .+ A;
+    }
+    print A[0, 0];
+    """
+    profiler = Profiler()
+    assert run(text, print_tree=False, profiler=profiler) == (True, None)
+    assert capfd.readouterr()[0] == "1024.0\n"
+
+    statistics = {(statistics.node, statistics.position[:6]): statistics for statistics in profiler.hot_spots()}
+    assert statistics["MatrixBinExpr", "line 4"].count == 10
+    assert statistics["MatrixBinExpr", "line 4"].allocated == 10 * 100 * 100 * 8
+    assert statistics["Matrix", "line 2"].allocated == 100 * 100 * 8
+    assert all(0 <= statistics.self <= statistics.cumulative for statistics in profiler.hot_spots())
+    assert len(profiler.listing(text).splitlines()) == len(text.splitlines())
+
+
+def test_static_checks(capfd):
+    from src.core.main import run, engines
+    from src.optimizer.optimizer import Optimizer
+    from src.interpreter.exceptions import ShapeMismatchError
+
+    text = """
+    A = ones(3);
+    B = eye(3);
+    C = zeros(3);
+    x = 0;
+    for i = 0:10 {
+        C = A .+ B .* A;
+        x = x + C[1, 1];
+        if (x > 5) {
+            x = x - 1;
+        }
+    }
+    print x, C[0:2, 1];
+    """
+    assert run(text, print_tree=False, check_stats=True) == (True, None)
+    out, err = capfd.readouterr()
+    assert out == "12.0, [1. 2.]\n"
+    assert err == f"runtime checks skipped: {10 * 4 + 8 + 1}\n"  # x + C[1, 1] has an unknown type
+
+    # the body was checked with the sizes of the first iteration, so its checks stay
+    text = """
+    A = ones(3);
+    D = zeros(3);
+    for i = 0:3 {
+        E = D .+ A;
+        D = ones(4);
+    }
+    """
+    with pytest.raises(ShapeMismatchError):
+        run(text, print_tree=False, check_stats=True)
+
+    # the size changed by `*=` in a branch which does not run is unknown, so `.+` is checked at runtime
+    text = """
+    A = ones(3);
+    R = ones(3);
+    R = R[0:3, 0:1];
+    x = 1.0;
+    if (x > 2.0) A *= R;
+    print A .+ R;
+    """
+    for engine in engines:
+        for transform in (None, lambda ast: Optimizer().optimize(ast)):
+            assert run_program(engine, text, capfd, transform).startswith(
+                "Runtime error: incompatible sizes within operation: '.+'"), f"Engine {engine} failed"
+
+
+def test_symbolic_dimensions(capfd):
+    from src.core.main import run, engines
+
+    # sizes depend on n, which changes in every iteration, and are checked once for all of them
+    text = """
+    n = 2;
+    while (n < 5) {
+        A = ones(n);
+        B = zeros(n + 1);
+        C = eye(n);
+        D = A * C .+ A;
+        E = B[0:n, 0:n] .- D;
+        print E[n - 1, 0:n];
+        n = n + 1;
+    }
+    """
+    assert run(text, print_tree=False, check_stats=True) == (True, None)
+    out, err = capfd.readouterr()
+    assert out == "[-3. -3.]\n[-4. -4. -4.]\n[-5. -5. -5. -5.]\n"
+    assert err == f"runtime checks skipped: {4 + 3 * 6}\n"  # the condition and six operations of the body
+    for engine in engines:
+        assert run_program(engine, text, capfd) == out, f"Engine {engine} failed"
+
+    text = """
+    for i = 1:3 {
+        B = zeros(i);
+        C = B * ones(i + 1);
+    }
+    """
+    assert run(text, print_tree=False) == (False, None)
+    out, _ = capfd.readouterr()
+    assert out == "Incompatible matrices sizes in matrix multiplication. Found (i, i) and (i + 1, i + 1), " \
+                  "line 4, column 29\n"